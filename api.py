@@ -1,18 +1,25 @@
 import logging
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware # Para permitir peticiones desde un front (opcional pero común)
 import uvicorn
 import datetime # Necesario para calcular fechas
-import os # Necesario para trabajar con archivos
 from pydantic import BaseModel # Para definir el modelo de respuesta (opcional pero bueno)
+from typing import Optional
 
 # Importar las funciones principales de tus otros scripts
 try:
-    from main_orchestrator import generate_integrated_schedule
-    from calendar_google import GoogleCalendar
+    from main_orchestrator import generate_integrated_schedule, stream_integrated_schedule
+    from clients import get_google_calendar
     # --- Change: Import function from calendar_processor ---
-    from calendar_processor import get_formatted_next_week_schedule
+    from calendar_processor import FORMATTER_MODES, stream_formatted_next_week_schedule
     # --- End Change ---
+    from jobs import QueueFullError, job_manager_from_env
+    from precompute import Precomputer, StaleResultError, scheduler_from_env
+    from gpt_cache import get_default_cache
+    from prompt_registry import get_prompt_registry
+    import metrics
 except ImportError as e:
     logging.error(f"Error al importar módulos necesarios: {e}. Asegúrate de que los archivos .py estén en el directorio correcto.")
     # Podrías decidir salir o manejar esto de otra forma si la API no puede funcionar
@@ -42,6 +49,24 @@ app.add_middleware(
 )
 # --- End Change ---
 
+# Pool de trabajos en segundo plano (JOB_WORKERS / JOB_MAX_QUEUE en el .env)
+job_manager = job_manager_from_env()
+
+# Resultados precalculados de la próxima semana y su scheduler (PRECOMPUTE_ENABLED en el .env)
+precomputer = Precomputer()
+precompute_scheduler = scheduler_from_env(precomputer)
+
+@app.on_event("startup")
+def start_precompute_scheduler():
+    if precompute_scheduler is not None:
+        precompute_scheduler.start()
+
+@app.on_event("shutdown")
+def shutdown_job_manager():
+    job_manager.shutdown(wait=False)
+    if precompute_scheduler is not None:
+        precompute_scheduler.stop()
+
 # --- Constante para el directorio de asistentes ---
 ASSISTANTS_BASE_DIR = "asistentes"
 
@@ -53,8 +78,32 @@ class AssistantPromptResponse(BaseModel):
 # --- Change: Add response model for formatted schedule ---
 class FormattedScheduleResponse(BaseModel):
     formatted_schedule: str
+    week_start: Optional[str] = None
+    generated_at: Optional[str] = None
+    inputs_hash: Optional[str] = None
 # --- End Change ---
 
+# --- Utilidades para Server-Sent Events (SSE) ---
+def _sse_message(data: str, event: str = None) -> str:
+    """Codifica un mensaje SSE; los saltos de línea del contenido van en líneas 'data:' separadas."""
+    lines = [f"event: {event}"] if event else []
+    lines.extend(f"data: {line}" for line in data.split("\n"))
+    return "\n".join(lines) + "\n\n"
+
+def _sse_stream(chunks):
+    """
+    Convierte un generador de fragmentos de texto en un flujo SSE. Termina con un
+    evento 'done', o con un evento 'error' si el generador lanza una excepción
+    (a esa altura ya no se puede cambiar el código HTTP de la respuesta).
+    """
+    try:
+        for chunk in chunks:
+            yield _sse_message(chunk)
+        yield _sse_message("", event="done")
+    except Exception as e:
+        logging.exception("Error durante la respuesta en streaming.")
+        yield _sse_message(str(e), event="error")
+
 # --- Endpoints de la API ---
 
 @app.get("/", summary="Health Check", description="Endpoint básico para verificar si la API está funcionando.")
@@ -65,41 +114,90 @@ async def read_root():
     logging.info("Health check endpoint '/' llamado.")
     return {"status": "Personal Coach API is running!"}
 
-@app.post("/generate-schedule", summary="Generar Planificación Semanal", description="Ejecuta el orquestador completo para generar la planificación y crear eventos en Google Calendar.")
-async def generate_schedule_endpoint():
+@app.post("/generate-schedule", status_code=202, summary="Generar Planificación Semanal", description="Encola el orquestador completo (planificación + creación de eventos en Google Calendar) y devuelve de inmediato el ID del trabajo. Consulta el progreso en /jobs/{job_id}.")
+async def generate_schedule_endpoint(dry_run: bool = Query(False, description="Si es true, el resultado del trabajo lista las operaciones (create/update/delete) sin escribir en Google Calendar."),
+                                     use_precomputed: bool = Query(False, description="Si es true, escribe en Google Calendar la planificación precalculada (ver /schedule/next-week) sin volver a consultar a los asistentes.")):
     """
-    Llama a la función `generate_integrated_schedule` del orquestador.
-    Devuelve el calendario en texto o un error HTTP.
+    Encola `generate_integrated_schedule` en el pool de trabajos y devuelve el ID del
+    trabajo sin esperar a que termine. Responde 503 si la cola está llena.
+    Con `?dry_run=true`, el resultado del trabajo es el calendario junto con las
+    operaciones que se aplicarían en Google Calendar, sin escribir nada.
+    Con `?use_precomputed=true`, el trabajo solo reconcilia el calendario con la
+    planificación precalculada; responde 404 si no hay una para la próxima semana, 409
+    si se calculó con un calendario (o prompts) distinto del actual y 503 si no se pudo
+    sincronizar el calendario para comprobarlo.
     """
-    logging.info("Endpoint '/generate-schedule' llamado.")
+    logging.info(f"Endpoint '/generate-schedule' llamado (dry_run={dry_run}, use_precomputed={use_precomputed}).")
+    if use_precomputed and not dry_run:
+        try:
+            await run_in_threadpool(precomputer.current_schedule)
+        except LookupError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except StaleResultError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except RuntimeError as e:
+            # No se pudo sincronizar el calendario: no se escribe un plan sin comprobar
+            raise HTTPException(status_code=503, detail=str(e))
+        try:
+            job = job_manager.submit("apply-precomputed-schedule", precomputer.apply_schedule)
+        except QueueFullError as e:
+            logging.warning(f"Trabajo rechazado: {e}")
+            raise HTTPException(status_code=503, detail=str(e))
+        return {"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"}
     try:
-        # Ejecutar la lógica principal del orquestador
-        # Nota: Esta llamada puede ser bloqueante y tardar. Considera ejecutarla en un threadpool si es necesario.
-        schedule_result = generate_integrated_schedule()
+        job = job_manager.submit("generate-schedule-dry-run" if dry_run else "generate-schedule",
+                                 generate_integrated_schedule, dry_run=dry_run)
+    except QueueFullError as e:
+        logging.warning(f"Trabajo rechazado: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"}
+
+@app.get("/schedule/next-week", summary="Planificación Precalculada",
+         description="Devuelve la planificación integrada de la próxima semana ya calculada (con su fecha de generación y hash de entradas). Si no existe, el calendario cambió desde que se generó o se pide ?refresh=true, encola su cálculo y responde 202 con el ID del trabajo.")
+async def get_precomputed_schedule_endpoint(response: Response,
+                                            refresh: bool = Query(False, description="Si es true, fuerza a regenerarla.")):
+    if not refresh:
+        # Solo se sirve la guardada si sigue correspondiendo al calendario actual
+        # (o, si Calendar no responde, la última guardada sin comprobar)
+        try:
+            stored = await run_in_threadpool(precomputer.current_schedule, allow_unverified=True)
+        except (LookupError, StaleResultError):
+            stored = None
+        if stored is not None and precomputer.is_fresh(stored):
+            return stored.to_dict()
 
-        # Verificar si el resultado indica un error interno
-        if "Error:" in schedule_result:
-            logging.error(f"Error interno al generar el calendario: {schedule_result}")
-            # Devolver un error HTTP 500 (Internal Server Error)
-            raise HTTPException(status_code=500, detail=schedule_result)
+    def _precompute(timings: dict):
+        return precomputer.integrated_schedule(refresh=refresh, timings=timings).to_dict()
+    try:
+        job = job_manager.submit("precompute-schedule", _precompute)
+    except QueueFullError as e:
+        logging.warning(f"Trabajo rechazado: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    response.status_code = 202
+    return {"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"}
 
-        logging.info("Planificación generada exitosamente.")
-        # Devolver el resultado exitoso
-        return {"schedule": schedule_result}
+@app.get("/metrics", response_class=PlainTextResponse, summary="Métricas (Prometheus)",
+         description="Llamadas a GPT (tokens, latencia, TTFT, reintentos, costo estimado), ejecuciones del pipeline, cola de trabajos y caché de respuestas, en formato de texto de Prometheus.")
+async def metrics_endpoint():
+    metrics.registry.set_gauge("jobs_queue_depth", job_manager.queue_depth(), help_text="Trabajos en espera en la cola.")
+    cache_stats = get_default_cache().stats()
+    metrics.registry.set_gauge("gpt_cache_hits", cache_stats["hits"], help_text="Aciertos acumulados de la caché de respuestas.")
+    metrics.registry.set_gauge("gpt_cache_misses", cache_stats["misses"], help_text="Fallos acumulados de la caché de respuestas.")
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
 
-    except HTTPException as http_exc:
-        # Re-lanzar excepciones HTTP ya manejadas
-        raise http_exc
-    except Exception as e:
-        logging.exception("Error inesperado en el endpoint /generate-schedule.") # Log con traceback
-        # Capturar cualquier otro error inesperado
-        raise HTTPException(status_code=500, detail=f"Error inesperado del servidor: {e}")
+@app.get("/jobs/{job_id}", summary="Estado de un Trabajo", description="Devuelve el estado, los tiempos por etapa y el resultado de un trabajo en segundo plano.")
+async def get_job_endpoint(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Trabajo '{job_id}' no encontrado.")
+    return job.to_dict()
 
 @app.delete("/delete-schedule", summary="Borrar Planificación Semanal", description="Borra TODOS los eventos de la próxima semana en el calendario 'PersonalCoach'.")
 async def delete_schedule_endpoint():
     """
     Borra TODOS los eventos de la próxima semana en el calendario 'PersonalCoach',
-    saltando la confirmación interactiva. Devuelve el número de eventos borrados.
+    saltando la confirmación interactiva. Devuelve el número de eventos borrados
+    junto con los IDs borrados, fallidos y reintentados.
     """
     logging.info("Endpoint '/delete-schedule' llamado.")
     target_calendar = 'PersonalCoach'
@@ -114,17 +212,27 @@ async def delete_schedule_endpoint():
         end_date_str = next_sunday.strftime('%Y-%m-%d')
 
         # Inicializar GoogleCalendar y llamar directamente a delete_events_in_range
-        gc = GoogleCalendar()
-        deleted_count = gc.delete_events_in_range(
-            start_date_str=start_date_str,
-            end_date_str=end_date_str,
-            calendar_target=target_calendar,
-            skip_confirmation=True # ¡Importante para la API!
-        )
+        # OAuth y llamadas a la API son bloqueantes: se ejecutan en el threadpool
+        def _delete():
+            gc = get_google_calendar()
+            return gc.delete_events_in_range(
+                start_date_str=start_date_str,
+                end_date_str=end_date_str,
+                calendar_target=target_calendar,
+                skip_confirmation=True # ¡Importante para la API!
+            )
+        delete_result = await run_in_threadpool(_delete)
+        deleted_count = len(delete_result['deleted'])
 
         logging.info(f"Borrado completado a través de API. Eventos borrados: {deleted_count}")
         # Devolver el resultado al frontend
-        return {"message": f"Borrado completado para la semana {start_date_str} a {end_date_str}.", "deleted_count": deleted_count}
+        return {
+            "message": f"Borrado completado para la semana {start_date_str} a {end_date_str}.",
+            "deleted_count": deleted_count,
+            "deleted": delete_result['deleted'],
+            "failed": delete_result['failed'],
+            "retried": delete_result['retried'],
+        }
 
     except Exception as e:
         logging.exception("Error inesperado en el endpoint /delete-schedule.") # Log con traceback
@@ -135,55 +243,58 @@ async def delete_schedule_endpoint():
 @app.get("/assistant-prompt/{assistant_name}",
          response_model=AssistantPromptResponse, # Usa el modelo de respuesta
          summary="Obtener Prompt de Asistente",
-         description="Devuelve el contenido del archivo Markdown para el asistente especificado.")
-async def get_assistant_prompt(assistant_name: str):
+         description="Devuelve el contenido del archivo Markdown para el asistente especificado. Admite revalidación con ETag / If-None-Match (304).")
+async def get_assistant_prompt(assistant_name: str, request: Request, response: Response):
     """
-    Busca y devuelve el contenido del archivo .md correspondiente al assistant_name.
+    Devuelve el prompt del asistente desde el registro en memoria (se recarga solo si el
+    archivo cambia). El ETag es el hash del contenido: si coincide con If-None-Match,
+    responde 304 sin cuerpo.
     """
     logging.info(f"Solicitud recibida para el prompt del asistente: '{assistant_name}'")
-    # Construir la ruta esperada del archivo
-    # ¡Importante! Asegurarse de que assistant_name no contenga caracteres maliciosos (ej. '../')
-    # Para este caso, asumimos nombres simples. Podrías añadir validación/sanitización.
-    file_path = os.path.join(ASSISTANTS_BASE_DIR, f"{assistant_name}.md")
-    logging.debug(f"Buscando archivo en: {file_path}")
-
-    if not os.path.exists(file_path) or not os.path.isfile(file_path):
-        logging.warning(f"Archivo de prompt no encontrado: {file_path}")
+    # Solo se sirven nombres presentes en el registro: no se construyen rutas con la entrada del usuario
+    entry = get_prompt_registry(ASSISTANTS_BASE_DIR).get(assistant_name)
+    if entry is None:
+        logging.warning(f"Prompt no encontrado para el asistente: '{assistant_name}'")
         raise HTTPException(status_code=404, detail=f"Prompt para el asistente '{assistant_name}' no encontrado.")
 
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        logging.info(f"Prompt para '{assistant_name}' leído exitosamente.")
-        return AssistantPromptResponse(assistant_name=assistant_name, content=content)
-    except Exception as e:
-        logging.exception(f"Error al leer el archivo de prompt: {file_path}")
-        raise HTTPException(status_code=500, detail=f"Error interno al leer el prompt para '{assistant_name}'.")
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    # If-None-Match puede traer varias etiquetas, débiles (W/"...") o '*'
+    if_none_match = request.headers.get("if-none-match", "")
+    if entry.etag in if_none_match or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return AssistantPromptResponse(assistant_name=assistant_name, content=entry.content)
 # --- End Change ---
 
+def _check_formatter_mode(mode: Optional[str]):
+    if mode is not None and mode.strip().lower() not in FORMATTER_MODES:
+        raise HTTPException(status_code=422, detail=f"Modo de formateo desconocido '{mode}'. Opciones: {', '.join(FORMATTER_MODES)}.")
+
 # --- Change: Add endpoint for formatted schedule ---
 @app.get("/formatted-schedule",
          response_model=FormattedScheduleResponse,
-         summary="Obtener Calendario Formateado (GPT)",
-         description="Obtiene los eventos de Google Calendar de la próxima semana y los formatea usando el asistente 'calendar_formatter'.")
-async def get_formatted_schedule_endpoint():
+         summary="Obtener Calendario Formateado",
+         description="Obtiene los eventos de Google Calendar de la próxima semana y los formatea, localmente (modo 'local', por defecto) o usando el asistente 'calendar_formatter' (modo 'llm').")
+async def get_formatted_schedule_endpoint(mode: Optional[str] = Query(None, description="'local' o 'llm'. Por defecto, CALENDAR_FORMATTER_MODE o 'local'."),
+                                          refresh: bool = Query(False, description="Si es true, lo regenera en lugar de usar el precalculado.")):
     """
-    Llama a la función `get_formatted_next_week_schedule` y devuelve el resultado.
+    Devuelve el calendario formateado precalculado de la próxima semana, o lo calcula con
+    `get_formatted_next_week_schedule` (y lo guarda) si no hay uno vigente o se pide `?refresh=true`.
     """
-    logging.info("Endpoint '/formatted-schedule' llamado.")
+    logging.info(f"Endpoint '/formatted-schedule' llamado (refresh={refresh}).")
+    _check_formatter_mode(mode)
     try:
-        # Llamar a la función que obtiene y formatea el calendario
-        # Esta función ya maneja la interacción con Google Calendar y GPT
-        formatted_schedule_result = get_formatted_next_week_schedule()
-
-        # Verificar si la función devolvió un error
-        if "Error:" in formatted_schedule_result:
-            logging.error(f"Error interno al obtener/formatear el calendario: {formatted_schedule_result}")
-            raise HTTPException(status_code=500, detail=formatted_schedule_result)
+        try:
+            result = await run_in_threadpool(precomputer.formatted_schedule, mode=mode, refresh=refresh)
+        except RuntimeError as e:
+            # Error al obtener o formatear el calendario (no se guarda)
+            logging.error(f"Error interno al obtener/formatear el calendario: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
 
         logging.info("Calendario formateado obtenido exitosamente.")
         # Devolver el resultado en el modelo de respuesta esperado
-        return FormattedScheduleResponse(formatted_schedule=formatted_schedule_result)
+        return FormattedScheduleResponse(formatted_schedule=result.value, week_start=result.week_start,
+                                         generated_at=result.generated_at, inputs_hash=result.inputs_hash)
 
     except HTTPException as http_exc:
         # Re-lanzar excepciones HTTP ya manejadas
@@ -193,6 +304,23 @@ async def get_formatted_schedule_endpoint():
         raise HTTPException(status_code=500, detail=f"Error inesperado del servidor al obtener el calendario formateado: {e}")
 # --- End Change ---
 
+# --- Endpoints en streaming (SSE) ---
+# Los generadores son síncronos: Starlette los itera en su threadpool, sin bloquear el event loop.
+@app.get("/formatted-schedule/stream",
+         summary="Obtener Calendario Formateado (streaming SSE)",
+         description="Igual que /formatted-schedule, pero entrega el texto por Server-Sent Events a medida que GPT lo genera. En modo 'local' se envía en un único mensaje.")
+async def stream_formatted_schedule_endpoint(mode: Optional[str] = Query(None, description="'local' o 'llm'. Por defecto, CALENDAR_FORMATTER_MODE o 'local'.")):
+    logging.info("Endpoint '/formatted-schedule/stream' llamado.")
+    _check_formatter_mode(mode)
+    return StreamingResponse(_sse_stream(stream_formatted_next_week_schedule(mode=mode)), media_type="text/event-stream")
+
+@app.post("/generate-schedule/stream",
+          summary="Generar Planificación Semanal (streaming SSE)",
+          description="Igual que /generate-schedule, pero entrega el calendario integrado por Server-Sent Events a medida que GPT lo genera. Los eventos se crean en Google Calendar al terminar el stream.")
+async def stream_generate_schedule_endpoint():
+    logging.info("Endpoint '/generate-schedule/stream' llamado.")
+    return StreamingResponse(_sse_stream(stream_integrated_schedule()), media_type="text/event-stream")
+
 # --- Ejecución con Uvicorn (si se ejecuta este archivo directamente) ---
 if __name__ == "__main__":
     print("Iniciando servidor FastAPI con Uvicorn...")
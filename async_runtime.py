@@ -0,0 +1,69 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import logging
+import threading
+
+_loop = None
+_loop_thread = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Returns the process-wide event loop used by the async pipeline, starting it on a
+    daemon thread the first time. Every coroutine submitted through `run_async` runs
+    on this loop, so async clients created on it can be shared between callers.
+    """
+    global _loop, _loop_thread
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=_loop.run_forever, name="async-runtime", daemon=True)
+            _loop_thread.start()
+            logging.info("Async runtime event loop started.")
+        return _loop
+
+
+def run_async(coro, timeout: float = None):
+    """
+    Runs a coroutine on the shared event loop from synchronous code and waits for its result.
+    The caller's context variables are propagated to the task.
+
+    Args:
+        coro: The coroutine to run.
+        timeout (float, optional): Seconds to wait before raising TimeoutError (the task is cancelled).
+
+    Returns:
+        The coroutine's result. Exceptions raised by the coroutine are re-raised here.
+    """
+    loop = get_event_loop()
+    if threading.current_thread() is _loop_thread:
+        coro.close()
+        raise RuntimeError("run_async() cannot be called from the async runtime thread; await the coroutine instead.")
+
+    result = concurrent.futures.Future()
+    tasks = []
+
+    def _start():
+        # Runs inside the caller's copied context, so the task inherits it
+        task = loop.create_task(coro)
+        tasks.append(task)
+
+        def _done(t):
+            if t.cancelled():
+                result.cancel()
+            elif t.exception() is not None:
+                result.set_exception(t.exception())
+            else:
+                result.set_result(t.result())
+
+        task.add_done_callback(_done)
+
+    loop.call_soon_threadsafe(_start, context=contextvars.copy_context())
+    try:
+        return result.result(timeout)
+    except concurrent.futures.TimeoutError:
+        for task in tasks:
+            loop.call_soon_threadsafe(task.cancel)
+        raise
@@ -0,0 +1,206 @@
+import argparse
+import concurrent.futures
+import datetime
+import json
+import logging
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+import metrics
+from clients import get_gpt_client
+from main_orchestrator import generate_integrated_schedule
+from metrics import track_run
+from tenants import DEFAULT_TENANTS_DIR, TenantStore, UserConfig
+
+# Usuarios procesados a la vez. Cada uno corre su propio pipeline (con sus etapas en paralelo),
+# y todos comparten los clientes GPT del proceso, así que el límite real es el rate limit de OpenAI.
+DEFAULT_BATCH_WORKERS = 4
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+STATUS_SKIPPED = "skipped"
+
+
+@dataclass
+class UserRunResult:
+    user_id: str
+    status: str
+    duration_s: float = 0.0
+    error: Optional[str] = None
+    # Totales de las llamadas al modelo de este usuario (ver metrics.RunMetrics.summary)
+    usage: dict = field(default_factory=dict)
+    # En dry run: resumen de las operaciones que se aplicarían en su calendario
+    summary: Optional[dict] = None
+
+
+@dataclass
+class BatchReport:
+    """Resultado de un batch: un UserRunResult por usuario, en orden de ejecución."""
+    started_at: str
+    duration_s: float = 0.0
+    workers: int = DEFAULT_BATCH_WORKERS
+    dry_run: bool = False
+    results: List[UserRunResult] = field(default_factory=list)
+
+    def count(self, status: str) -> int:
+        return sum(1 for r in self.results if r.status == status)
+
+    def to_dict(self) -> dict:
+        """Resumen del batch: conteos, throughput, latencias por usuario, costo y fallos."""
+        durations = sorted(r.duration_s for r in self.results if r.status != STATUS_SKIPPED)
+        processed = len(durations)
+        return {
+            "started_at": self.started_at,
+            "duration_s": round(self.duration_s, 3),
+            "workers": self.workers,
+            "dry_run": self.dry_run,
+            "users": len(self.results),
+            "succeeded": self.count(STATUS_OK),
+            "failed": self.count(STATUS_ERROR),
+            "skipped": self.count(STATUS_SKIPPED),
+            "throughput_users_per_min": round(processed / self.duration_s * 60, 2) if self.duration_s else 0.0,
+            "user_duration_p50_s": round(statistics.median(durations), 3) if durations else None,
+            "user_duration_max_s": round(durations[-1], 3) if durations else None,
+            "cost_usd": round(sum(r.usage.get("cost_usd", 0.0) for r in self.results), 6),
+            "failures": [{"user_id": r.user_id, "status": r.status, "error": r.error}
+                         for r in self.results if r.status != STATUS_OK],
+            "results": [asdict(r) for r in self.results],
+        }
+
+
+def _fair_order(users: List[UserConfig]) -> List[UserConfig]:
+    """
+    Orden de ejecución: primero quien nunca tuvo una ejecución exitosa, luego por antigüedad
+    de la última. Los usuarios que un batch anterior dejó sin procesar o que fallaron van al
+    principio del siguiente.
+    """
+    return sorted(users, key=lambda u: (u.last_success_at is not None, u.last_success_at or "", u.user_id))
+
+
+@track_run("batch_user")
+def _run_user(store: TenantStore, config: UserConfig, gpt_client, dry_run: bool) -> UserRunResult:
+    """Genera el calendario de un usuario. Nunca lanza: cualquier error queda en el resultado."""
+    started = time.perf_counter()
+    result = UserRunResult(user_id=config.user_id, status=STATUS_ERROR)
+    gc = None
+    try:
+        gc = store.calendar_client(config.user_id)
+        output = generate_integrated_schedule(gc=gc, gpt_client=gpt_client, dry_run=dry_run,
+                                              calendars=config.calendars, target_calendar=config.target_calendar)
+        if isinstance(output, dict):
+            result.status, result.summary = STATUS_OK, output['summary']
+        elif isinstance(output, str) and output.startswith("Error"):
+            result.error = output
+        else:
+            result.status = STATUS_OK
+    except Exception as e:
+        logging.error(f"[{config.user_id}] Error al generar el calendario: {e}", exc_info=True)
+        result.error = f"{type(e).__name__}: {e}"
+    finally:
+        # Cada usuario abre su propio almacén de eventos (SQLite); no se deja abierto
+        if gc is not None:
+            gc.close()
+    result.duration_s = round(time.perf_counter() - started, 3)
+    result.usage = metrics.current_run().summary()
+    return result
+
+
+def run_batch(store: TenantStore, user_ids: List[str] = None, max_workers: int = DEFAULT_BATCH_WORKERS,
+              dry_run: bool = False, deadline_seconds: float = None, gpt_client=None) -> BatchReport:
+    """
+    Genera el calendario semanal de varios usuarios con un pool acotado de hilos.
+
+    Cada usuario corre aislado: su propio cliente de Calendar (token y almacén de eventos
+    propios) y sus errores no afectan al resto. Los clientes GPT y su caché son compartidos,
+    de modo que las consultas idénticas a los expertos se pagan una sola vez por batch.
+    Los usuarios se ejecutan en el orden de `_fair_order`; con `deadline_seconds`, los que no
+    alcanzaron a empezar se marcan como 'skipped' y encabezan el siguiente batch. Un usuario
+    no registrado o con configuración inválida queda como 'error' sin detener el batch, y uno
+    deshabilitado que se pidió explícitamente, como 'skipped'.
+
+    Args:
+        store (TenantStore): Almacén de usuarios.
+        user_ids (list, opcional): Usuarios a procesar. Por defecto, todos los habilitados.
+        max_workers (int): Usuarios procesados simultáneamente.
+        dry_run (bool): Calcula los cambios de cada calendario sin escribirlos.
+        deadline_seconds (float, opcional): Tiempo tras el cual no se inician más usuarios.
+        gpt_client (GPTClient, opcional): Cliente GPT. Por defecto, el compartido del proceso.
+
+    Returns:
+        BatchReport: Resultado por usuario, throughput y fallos.
+    """
+    report = BatchReport(started_at=datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                         workers=max_workers, dry_run=dry_run)
+    started = time.perf_counter()
+
+    def _record(result: UserRunResult):
+        report.results.append(result)
+        metrics.registry.inc("batch_user_runs_total", help_text="Users processed by the batch driver, by outcome.",
+                             status=result.status)
+
+    explicit = user_ids is not None
+    users = []
+    for user_id in (dict.fromkeys(user_ids) if explicit else store.user_ids()):
+        try:
+            config = store.get(user_id)
+        except (KeyError, ValueError) as e:
+            logging.error(f"[{user_id}] No se pudo cargar la configuración: {e}")
+            _record(UserRunResult(user_id=user_id, status=STATUS_ERROR, error=f"{type(e).__name__}: {e}"))
+            continue
+        if not config.enabled:
+            if explicit:
+                _record(UserRunResult(user_id=user_id, status=STATUS_SKIPPED, error="User is disabled."))
+            continue
+        users.append(config)
+    if gpt_client is None:
+        gpt_client = get_gpt_client()
+    deadline = started + deadline_seconds if deadline_seconds is not None else None
+    logging.info(f"Batch iniciado: {len(users)} usuarios, {max_workers} workers{' (dry run)' if dry_run else ''}.")
+
+    def _task(config: UserConfig) -> UserRunResult:
+        if deadline is not None and time.perf_counter() >= deadline:
+            return UserRunResult(user_id=config.user_id, status=STATUS_SKIPPED, error="Batch deadline reached before start.")
+        logging.info(f"[{config.user_id}] Generando calendario...")
+        result = _run_user(store, config, gpt_client, dry_run)
+        logging.info(f"[{config.user_id}] {result.status} en {result.duration_s:.1f}s.")
+        return result
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch") as executor:
+        # map conserva el orden de envío: el pool toma los usuarios en orden justo
+        for result in executor.map(_task, _fair_order(users)):
+            _record(result)
+            if result.status != STATUS_SKIPPED:
+                metrics.registry.observe("batch_user_duration_seconds", result.duration_s,
+                                         help_text="Wall time of one user's schedule generation.")
+                if not dry_run:
+                    try:
+                        store.record_run(result.user_id, result.status)
+                    except (KeyError, ValueError) as e:
+                        # La configuración se borró o editó durante el batch
+                        logging.error(f"[{result.user_id}] No se pudo registrar la ejecución: {e}")
+
+    report.duration_s = time.perf_counter() - started
+    summary = report.to_dict()
+    logging.info(f"Batch completado en {summary['duration_s']:.1f}s: {summary['succeeded']} ok, "
+                 f"{summary['failed']} fallidos, {summary['skipped']} omitidos "
+                 f"({summary['throughput_users_per_min']} usuarios/min).")
+    return report
+
+
+if __name__ == "__main__":
+    # Uso: python batch_runner.py [--users a,b] [--workers 4] [--dry-run] [--deadline SEGUNDOS]
+    parser = argparse.ArgumentParser(description="Genera el calendario semanal de todos los usuarios registrados.")
+    parser.add_argument('--root', default=DEFAULT_TENANTS_DIR, help="Directorio del almacén de usuarios.")
+    parser.add_argument('--users', help="user_id separados por coma (por defecto, todos los habilitados).")
+    parser.add_argument('--workers', type=int, default=DEFAULT_BATCH_WORKERS)
+    parser.add_argument('--dry-run', action='store_true')
+    parser.add_argument('--deadline', type=float, help="Segundos tras los cuales no se inician más usuarios.")
+    args = parser.parse_args()
+
+    batch = run_batch(TenantStore(args.root), user_ids=args.users.split(',') if args.users else None,
+                      max_workers=args.workers, dry_run=args.dry_run, deadline_seconds=args.deadline)
+    summary = batch.to_dict()
+    summary.pop('results')
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
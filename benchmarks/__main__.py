@@ -0,0 +1,6 @@
+"""Punto de entrada de `python -m benchmarks`: corre el benchmark offline del pipeline (benchmarks.pipelines)."""
+import sys
+
+from benchmarks.pipelines import main
+
+sys.exit(main())
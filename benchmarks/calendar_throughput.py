@@ -0,0 +1,154 @@
+"""
+Benchmark de throughput de Google Calendar a escala: GoogleCalendar contra el emulador
+en memoria de calendar_emulator.py (rutas HTTP reales de la API vía googleapiclient,
+sin red ni credenciales), con decenas de calendarios y miles de eventos.
+
+Escenarios:
+    list_all       buscar_eventos_todos sobre la semana en todos los calendarios.
+    delete_range   delete_events_in_range de la semana en un calendario (batch).
+
+Por escenario reporta el tiempo de pared (mediana de --repeat corridas), eventos por
+segundo, peticiones HTTP, llamadas a la API (las partes de un batch cuentan por
+separado), errores y rechazos por cuota. Con --quota-per-second y --error-rate se
+mide cómo se comportan los reintentos bajo throttling y errores transitorios.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.calendar_throughput --calendars 24 --events-per-day 60
+    python -m benchmarks.calendar_throughput --latency 0.05:0.3 --quota-per-second 50 --error-rate 0.02
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+from dataclasses import replace
+
+from benchmarks.fakes import Latency, populate_week
+from calendar_emulator import CalendarEmulator
+from calendar_google import MAX_RESULTS_PER_PAGE
+from retry import CALENDAR_RETRY_POLICY
+
+TARGET_CALENDAR = 'PersonalCoach'
+WEEK_START = datetime.date(2026, 1, 5)  # lunes fijo: los resultados no dependen de la fecha
+
+
+def build_emulator(args, seed):
+    """Crea el emulador con los calendarios de la prueba; el primero es TARGET_CALENDAR."""
+    rng = random.Random(seed)
+    emulator = CalendarEmulator(
+        latency=lambda: args.latency.sample(rng),
+        quota_per_second=args.quota_per_second, quota_status=args.quota_status,
+        error_rate=args.error_rate, max_page_size=args.page_size, seed=seed,
+    )
+    calendar_ids = [emulator.add_calendar(TARGET_CALENDAR)]
+    calendar_ids += [emulator.add_calendar(f"Calendario {number}") for number in range(2, args.calendars + 1)]
+    populate_week(emulator, calendar_ids, WEEK_START, events_per_day=args.events_per_day)
+    return emulator
+
+
+def _client(emulator, args):
+    gc = emulator.client(retry_policy=replace(CALENDAR_RETRY_POLICY, max_attempts=args.max_attempts))
+    gc.list_available_calendars()
+    return gc
+
+
+def _list_all(gc, args):
+    week_end = WEEK_START + datetime.timedelta(days=6)
+    eventos_por_dia = gc.buscar_eventos_todos(WEEK_START.isoformat(), week_end.isoformat(), max_workers=args.workers)
+    return sum(len(eventos) for eventos in eventos_por_dia.values())
+
+
+def _delete_range(gc, args):
+    week_end = WEEK_START + datetime.timedelta(days=6)
+    result = gc.delete_events_in_range(WEEK_START.isoformat(), week_end.isoformat(),
+                                       calendar_target=TARGET_CALENDAR, skip_confirmation=True)
+    return len(result['deleted']) if isinstance(result, dict) else 0
+
+
+SCENARIOS = {'list_all': _list_all, 'delete_range': _delete_range}
+
+
+def run_scenario(name, args):
+    """Corre un escenario --repeat veces, cada una sobre un emulador recién poblado."""
+    operation = SCENARIOS[name]
+    timings, counts, stats = [], [], []
+    for run in range(args.repeat):
+        emulator = build_emulator(args, seed=args.seed + run)
+        gc = _client(emulator, args)
+        emulator.reset_stats()
+        started = time.perf_counter()
+        counts.append(operation(gc, args))
+        timings.append(time.perf_counter() - started)
+        stats.append(emulator.stats())
+    median = statistics.median(timings)
+    last = stats[-1]
+    return {
+        'scenario': name,
+        'wall_s': {'median': median, 'min': min(timings), 'max': max(timings)},
+        'events': counts[-1],
+        'events_per_s': counts[-1] / median if median else 0.0,
+        'http_requests': last['http_requests'],
+        'batch_requests': last['batch_requests'],
+        'api_calls': last['calls'],
+        'errors': {str(status): count for status, count in last['errors'].items()},
+        'throttled': last['throttled'],
+    }
+
+
+def _print_table(results):
+    print(f"\n{'escenario':<14} {'mediana (s)':>11} {'eventos':>8} {'eventos/s':>10} {'http':>6} "
+          f"{'llamadas':>9} {'errores':>8} {'cuota':>6}")
+    for r in results:
+        print(f"{r['scenario']:<14} {r['wall_s']['median']:>11.3f} {r['events']:>8} {r['events_per_s']:>10.0f} "
+              f"{r['http_requests']:>6} {sum(r['api_calls'].values()):>9} {sum(r['errors'].values()):>8} "
+              f"{r['throttled']:>6}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='Escenario a correr (repetible). Default: todos.')
+    parser.add_argument('--repeat', type=int, default=3, help='Corridas medidas por escenario (default 3).')
+    parser.add_argument('--calendars', type=int, default=24, help='Calendarios en el emulador (default 24).')
+    parser.add_argument('--events-per-day', type=int, default=40,
+                        help='Eventos por día y calendario (default 40, máximo 108).')
+    parser.add_argument('--latency', type=Latency.parse, default=Latency(),
+                        help='Latencia de cada petición HTTP: mediana[:sigma[:máximo]] en s (default 0).')
+    parser.add_argument('--page-size', type=int, default=MAX_RESULTS_PER_PAGE,
+                        help=f'Máximo de eventos por página de events.list (default {MAX_RESULTS_PER_PAGE}).')
+    parser.add_argument('--workers', type=int, default=8, help='Calendarios consultados a la vez (default 8).')
+    parser.add_argument('--quota-per-second', type=float, help='Llamadas por segundo permitidas. Default: sin límite.')
+    parser.add_argument('--quota-status', type=int, choices=(403, 429), default=403,
+                        help='Código de los rechazos por cuota (default 403 rateLimitExceeded).')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Fracción de llamadas que fallan con 503 (default 0).')
+    parser.add_argument('--max-attempts', type=int, default=5, help='Intentos por llamada (default 5).')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='Imprime los resultados en JSON.')
+    parser.add_argument('--verbose', action='store_true', help='Muestra los logs y prints de GoogleCalendar.')
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+    results = []
+    with open(os.devnull, 'w') as devnull:
+        quiet = contextlib.redirect_stdout(devnull) if not args.verbose else contextlib.nullcontext()
+        for name in args.scenario or list(SCENARIOS):
+            print(f"Corriendo {name}...", file=sys.stderr)
+            with quiet:
+                results.append(run_scenario(name, args))
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        _print_table(results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Benchmark de descarga de eventos: compara el camino anterior (una sola petición
+events().list por calendario, recurso completo, maxResults por defecto) con
+GoogleCalendar.iter_events (paginación completa, máscara de campos y maxResults alto).
+
+Mide bytes de payload recibidos, número de peticiones, eventos y tiempo de pared.
+Usa la cuenta configurada en credentials.json / token.json.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.event_listing --repeat 5 --calendar diego.arredondom@gmail.com
+"""
+import argparse
+import datetime
+import statistics
+import time
+
+from google_auth_httplib2 import AuthorizedHttp
+import httplib2
+
+from calendar_google import GoogleCalendar
+
+
+class CountingHttp:
+    """Envoltorio de un cliente HTTP que cuenta peticiones y bytes de respuesta."""
+
+    def __init__(self, http):
+        self.http = http
+        self.requests = 0
+        self.bytes = 0
+
+    def request(self, *args, **kwargs):
+        resp, content = self.http.request(*args, **kwargs)
+        self.requests += 1
+        self.bytes += len(content or b'')
+        return resp, content
+
+    def __getattr__(self, name):
+        return getattr(self.http, name)
+
+
+def _next_week_range():
+    today = datetime.date.today()
+    days_until_monday = (0 - today.weekday() + 7) % 7 or 7
+    next_monday = today + datetime.timedelta(days=days_until_monday)
+    next_sunday = next_monday + datetime.timedelta(days=6)
+    time_min = datetime.datetime.combine(next_monday, datetime.time.min).isoformat() + 'Z'
+    time_max = datetime.datetime.combine(next_sunday, datetime.time(23, 59, 59)).isoformat() + 'Z'
+    return time_min, time_max
+
+
+def legacy_path(gc, calendar_ids, time_min, time_max, http):
+    """Camino anterior: una petición por calendario, sin fields y sin seguir nextPageToken."""
+    count = 0
+    for calendar_id in calendar_ids:
+        events_result = gc.service.events().list(
+            calendarId=calendar_id,
+            timeMin=time_min,
+            timeMax=time_max,
+            singleEvents=True,
+            orderBy='startTime'
+        ).execute(http=http)
+        count += len(events_result.get('items', []))
+    return count
+
+
+def iterator_path(gc, calendar_ids, time_min, time_max, http):
+    """Camino nuevo: iter_event_pages con máscara de campos y paginación completa."""
+    count = 0
+    for calendar_id in calendar_ids:
+        for page in gc.iter_event_pages(calendar_id, time_min, time_max, http=http, orderBy='startTime'):
+            count += len(page.get('items', []))
+    return count
+
+
+def run(gc, calendar_ids, repeat):
+    time_min, time_max = _next_week_range()
+    results = {}
+    for name, path in (('actual', legacy_path), ('iter_events', iterator_path)):
+        timings = []
+        for _ in range(repeat):
+            http = CountingHttp(AuthorizedHttp(gc.creds, http=httplib2.Http()))
+            start = time.perf_counter()
+            events = path(gc, calendar_ids, time_min, time_max, http)
+            timings.append(time.perf_counter() - start)
+        results[name] = {
+            'eventos': events,
+            'peticiones': http.requests,
+            'bytes': http.bytes,
+            'mediana_s': statistics.median(timings),
+            'min_s': min(timings),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calendar', action='append', help='ID de calendario (repetible). Default: todos.')
+    parser.add_argument('--repeat', type=int, default=5, help='Repeticiones por camino (default 5).')
+    args = parser.parse_args()
+
+    gc = GoogleCalendar()
+    calendar_ids = args.calendar or [cal.get('id') for cal in gc.list_available_calendars()]
+    results = run(gc, calendar_ids, args.repeat)
+
+    print(f"\n{'camino':<12} {'eventos':>8} {'peticiones':>10} {'bytes':>10} {'mediana (s)':>12} {'min (s)':>9}")
+    for name, r in results.items():
+        print(f"{name:<12} {r['eventos']:>8} {r['peticiones']:>10} {r['bytes']:>10} "
+              f"{r['mediana_s']:>12.3f} {r['min_s']:>9.3f}")
+    actual, nuevo = results['actual'], results['iter_events']
+    if actual['bytes']:
+        print(f"\nReducción de payload: {100 * (1 - nuevo['bytes'] / actual['bytes']):.1f}%")
+    if nuevo['eventos'] > actual['eventos']:
+        print(f"El camino actual truncó {nuevo['eventos'] - actual['eventos']} eventos (sin paginación).")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,388 @@
+"""
+Dobles locales de OpenAI y de Google Calendar para medir el pipeline sin red ni costo.
+
+Las llamadas simuladas duermen una latencia muestreada de una distribución configurable
+y quedan registradas (llamadas, tiempo ocupado e intervalo de cada una) para poder
+contar peticiones y reconstruir el tiempo de cada etapa. Los clientes GPT falsos son
+los GPTClient / AsyncGPTClient reales con el SDK de OpenAI reemplazado, así que caché,
+reintentos, métricas y hedging se ejercitan igual que en producción. Google Calendar se
+reemplaza en la capa HTTP (SimulatedCalendarHttp sobre calendar_emulator), así que el
+GoogleCalendar medido también es el real.
+"""
+import asyncio
+import datetime
+import json
+import math
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+from calendar_emulator import CalendarEmulator
+from gpt import AsyncGPTClient, GPTClient
+from gpt_cache import ResponseCache
+from schedule_schema import Schedule, ScheduleDay, ScheduleEvent
+
+INTEGRATOR_ASSISTANT = "schedule_integrator"
+FORMATTER_ASSISTANT = "calendar_formatter"
+PLANNER_ASSISTANT = "planner"
+
+# Actividades que el integrador falso agrega a cada día, en orden
+PLAN_ACTIVITIES = [
+    ("Trote suave", "30 minutos a ritmo conversacional.", "Parque"),
+    ("Meditación guiada", "Respiración 4-7-8 y escaneo corporal.", None),
+    ("Preparar almuerzos", "Cocinar las porciones de los próximos dos días.", "Casa"),
+    ("Estiramientos", "Movilidad de cadera y espalda.", None),
+    ("Caminata", "Caminata después de la jornada.", "Barrio"),
+    ("Lectura", "Lectura sin pantallas antes de dormir.", "Casa"),
+]
+# Huecos (inicio, fin) donde el integrador falso pone las actividades: antes y después de la jornada
+PLAN_SLOTS = [
+    ("06:00", "06:45"), ("07:00", "07:45"), ("18:30", "19:15"), ("19:30", "20:15"),
+    ("20:30", "21:15"), ("21:30", "22:15"), ("22:30", "23:15"),
+]
+
+# Reuniones por día y calendario que caben entre las 9:00 y las 18:00 en bloques de 5 minutos
+MAX_EVENTS_PER_DAY = 108
+
+EXPERT_RESPONSE = (
+    "Recomendaciones para la semana:\n"
+    "- Tres sesiones de actividad aeróbica moderada de 30 a 45 minutos.\n"
+    "- Dos sesiones cortas de fuerza o movilidad.\n"
+    "- Diez minutos diarios de respiración o meditación, idealmente a la misma hora.\n"
+    "- Preparar comidas con anticipación para los días de oficina.\n"
+    "- Dormir entre 7 y 8 horas, evitando pantallas la última hora del día.\n"
+)
+PLANNER_RESPONSE = "\n".join(
+    f"**{day}:** " + "; ".join(f"{name} ({description})" for name, description, _ in PLAN_ACTIVITIES[:3])
+    for day in ("Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo")
+)
+
+
+@dataclass(frozen=True)
+class Latency:
+    """
+    Distribución de latencia de una llamada simulada: lognormal con mediana `median_s` y
+    dispersión `sigma` (0 = latencia fija), acotada a `max_s` si se indica.
+    """
+    median_s: float = 0.0
+    sigma: float = 0.0
+    max_s: float = None
+
+    @classmethod
+    def parse(cls, text: str) -> "Latency":
+        """Lee 'mediana[:sigma[:máximo]]' en segundos, p. ej. '1.5:0.4:10'."""
+        values = [float(part) for part in text.split(":")]
+        if not 1 <= len(values) <= 3 or any(value < 0 for value in values):
+            raise ValueError(f"Latencia inválida '{text}': se espera mediana[:sigma[:máximo]] en segundos.")
+        return cls(*values)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.median_s <= 0:
+            return 0.0
+        value = self.median_s * math.exp(rng.gauss(0.0, self.sigma)) if self.sigma else self.median_s
+        return min(value, self.max_s) if self.max_s is not None else value
+
+
+class SimulatedService:
+    """Latencia simulada y registro de llamadas de un servicio remoto falso."""
+
+    def __init__(self, name: str, latency: Latency = Latency(), seed: int = 0):
+        self.name = name
+        self.latency = latency
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._calls = {}  # endpoint -> {'calls', 'busy_s'}
+        self._spans = {}  # endpoint -> [(inicio, fin)] en time.perf_counter
+
+    def _sample(self) -> float:
+        with self._lock:
+            return self.latency.sample(self._rng)
+
+    def _record(self, endpoint: str, started: float, count: int = 1):
+        ended = time.perf_counter()
+        with self._lock:
+            totals = self._calls.setdefault(endpoint, {"calls": 0, "busy_s": 0.0})
+            totals["calls"] += count
+            totals["busy_s"] += ended - started
+            self._spans.setdefault(endpoint, []).append((started, ended))
+
+    def call(self, endpoint: str):
+        """Simula una petición HTTP: duerme una latencia muestreada y la registra."""
+        started = time.perf_counter()
+        time.sleep(self._sample())
+        self._record(endpoint, started)
+
+    async def acall(self, endpoint: str):
+        """Versión async de `call`."""
+        started = time.perf_counter()
+        await asyncio.sleep(self._sample())
+        self._record(endpoint, started)
+
+    def count(self, endpoint: str, count: int = 1):
+        """Registra `count` operaciones sin latencia propia (p. ej. las partes de un batch)."""
+        self._record(endpoint, time.perf_counter(), count)
+
+    def calls(self) -> dict:
+        """Retorna {endpoint: {'calls', 'busy_s'}}."""
+        with self._lock:
+            return {endpoint: {"calls": t["calls"], "busy_s": round(t["busy_s"], 4)}
+                    for endpoint, t in sorted(self._calls.items())}
+
+    def span(self, endpoints) -> float:
+        """Segundos entre el inicio de la primera y el fin de la última llamada a `endpoints`."""
+        with self._lock:
+            spans = [span for endpoint in endpoints for span in self._spans.get(endpoint, ())]
+        if not spans:
+            return 0.0
+        return max(end for _, end in spans) - min(start for start, _ in spans)
+
+
+def _event_time(value: dict):
+    """Hora HH:MM de un start/end de la API, o None si es de todo el día."""
+    date_time = value.get("dateTime")
+    return datetime.datetime.fromisoformat(date_time).time().replace(second=0, microsecond=0) if date_time else None
+
+
+def canned_schedule(week_start: datetime.date, existing_events: list, planned_per_day: int = 3) -> Schedule:
+    """
+    Calendario integrado de referencia para la semana de `week_start`: los eventos
+    existentes (recursos de la API) más `planned_per_day` actividades [PLAN] por día.
+    """
+    planned_per_day = min(planned_per_day, len(PLAN_SLOTS))
+    days = {week_start + datetime.timedelta(days=offset): ScheduleDay(date=week_start + datetime.timedelta(days=offset))
+            for offset in range(7)}
+    for event in existing_events:
+        start = event["start"]
+        date = datetime.date.fromisoformat(start.get("date") or start["dateTime"][:10])
+        if date not in days:
+            continue
+        days[date].events.append(ScheduleEvent(summary=event.get("summary") or "Sin título",
+                                               start=_event_time(start), end=_event_time(event["end"]),
+                                               location=event.get("location")))
+        if "date" in start and not days[date].main_locations:
+            days[date].main_locations = event.get("summary") or ""
+    for day in days.values():
+        for index in range(planned_per_day):
+            name, description, location = PLAN_ACTIVITIES[index % len(PLAN_ACTIVITIES)]
+            start, end = (datetime.datetime.strptime(value, "%H:%M").time() for value in PLAN_SLOTS[index])
+            day.events.append(ScheduleEvent(summary=name, start=start, end=end, description=description,
+                                            location=location, planned=True))
+    return Schedule(days=list(days.values()))
+
+
+def schedule_to_json(schedule: Schedule) -> str:
+    """Serializa un Schedule con la forma de SCHEDULE_RESPONSE_SCHEMA (la salida estructurada del integrador)."""
+    def _time(value):
+        return value.strftime("%H:%M") if value is not None else None
+
+    return json.dumps({"days": [
+        {"date": day.date.isoformat(), "main_locations": day.main_locations, "events": [
+            {"start": _time(event.start), "end": _time(event.end), "summary": event.summary,
+             "description": event.description, "location": event.location, "planned": event.planned}
+            for event in day.events
+        ]}
+        for day in schedule.days
+    ]}, ensure_ascii=False)
+
+
+class FakeOpenAIBackend(SimulatedService):
+    """
+    Servidor de chat completions falso compartido por los clientes síncrono y async.
+    Reconoce al asistente por su prompt de sistema y responde con textos fijos; el
+    integrador responde con `schedule` en Markdown o, si se pide json_schema, en JSON.
+    """
+
+    def __init__(self, schedule: Schedule, latency: Latency = Latency(), seed: int = 0):
+        super().__init__("openai", latency, seed)
+        self.schedule = schedule
+        self._integrator_markdown = schedule.to_markdown()
+        self._integrator_json = schedule_to_json(schedule)
+        existing = Schedule(days=[ScheduleDay(day.date, day.main_locations, [e for e in day.events if not e.planned])
+                                  for day in schedule.days])
+        self._formatter_markdown = existing.to_markdown()
+        self.prompts = {}  # prompt de sistema -> nombre del asistente, ver `bind_prompts`
+
+    def bind_prompts(self, assistants: dict):
+        """Registra los prompts base ({nombre: prompt}) con los que se reconoce a cada asistente."""
+        self.prompts = {prompt: name for name, prompt in assistants.items()}
+
+    def respond(self, assistant: str, response_format: dict = None) -> str:
+        if assistant == INTEGRATOR_ASSISTANT:
+            return self._integrator_json if response_format else self._integrator_markdown
+        if assistant == FORMATTER_ASSISTANT:
+            return self._formatter_markdown
+        if assistant == PLANNER_ASSISTANT:
+            return PLANNER_RESPONSE
+        return EXPERT_RESPONSE
+
+    def _completion(self, messages: list, response_format: dict = None):
+        assistant = self.prompts.get(messages[0]["content"], "unknown")
+        content = self.respond(assistant, response_format)
+        return assistant, content, _usage(messages, content)
+
+    def create(self, messages: list, stream: bool = False, response_format: dict = None, **kwargs):
+        assistant, content, usage = self._completion(messages, response_format)
+        self.call(assistant)
+        if stream:
+            return _stream_chunks(content, usage)
+        return _response(content, usage)
+
+    async def acreate(self, messages: list, response_format: dict = None, **kwargs):
+        assistant, content, usage = self._completion(messages, response_format)
+        await self.acall(assistant)
+        return _response(content, usage)
+
+
+def _usage(messages: list, content: str):
+    """Tokens aproximados (4 caracteres por token), con la forma del objeto usage del SDK."""
+    return SimpleNamespace(
+        prompt_tokens=sum(len(m["content"]) for m in messages) // 4,
+        completion_tokens=len(content) // 4,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=0),
+    )
+
+
+def _response(content: str, usage):
+    message = SimpleNamespace(content=content, refusal=None)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+def _stream_chunks(content: str, usage, chunk_chars: int = 200):
+    for start in range(0, len(content), chunk_chars):
+        delta = SimpleNamespace(content=content[start:start + chunk_chars])
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+    yield SimpleNamespace(choices=[], usage=usage)
+
+
+class _FakeOpenAI:
+    """Sustituto de openai.OpenAI: solo chat.completions.create."""
+
+    def __init__(self, backend: FakeOpenAIBackend):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=backend.create))
+
+
+class _FakeAsyncOpenAI:
+    """Sustituto de openai.AsyncOpenAI: solo chat.completions.create y close."""
+
+    def __init__(self, backend: FakeOpenAIBackend):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=backend.acreate))
+
+    async def close(self):
+        pass
+
+
+def _offline_api_key():
+    # Los clientes reales exigen una API key; el doble nunca la envía a ningún lado
+    os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+
+
+class FakeGPTClient(GPTClient):
+    """GPTClient con el SDK de OpenAI reemplazado por `backend` y una caché en memoria propia."""
+
+    def __init__(self, backend: FakeOpenAIBackend, assistants_dir: str = "asistentes", cache: ResponseCache = None):
+        self.backend = backend
+        _offline_api_key()
+        super().__init__(assistants_dir, cache=cache if cache is not None else ResponseCache())
+        backend.bind_prompts(self.assistants)
+
+    def _create_client(self, api_key: str):
+        return _FakeOpenAI(self.backend)
+
+
+class FakeAsyncGPTClient(AsyncGPTClient):
+    """AsyncGPTClient con el SDK de OpenAI reemplazado por `backend` y una caché en memoria propia."""
+
+    def __init__(self, backend: FakeOpenAIBackend, assistants_dir: str = "asistentes", cache: ResponseCache = None):
+        self.backend = backend
+        _offline_api_key()
+        super().__init__(assistants_dir, cache=cache if cache is not None else ResponseCache())
+        backend.bind_prompts(self.assistants)
+
+    def _create_client(self, api_key: str):
+        return _FakeAsyncOpenAI(self.backend)
+
+
+class SimulatedCalendarHttp:
+    """
+    Transporte HTTP de GoogleCalendar (`GoogleCalendar(http=...)`) para el benchmark: cada
+    petición duerme la latencia simulada de `service`, queda registrada por endpoint y la
+    atiende `emulator` (calendar_emulator.CalendarEmulator). Todo el cliente es el real:
+    paginación, máscaras de campos, batch, reintentos y sincronización incremental.
+    """
+
+    def __init__(self, emulator: CalendarEmulator, service: SimulatedService):
+        self.emulator = emulator
+        self.service = service
+
+    @staticmethod
+    def endpoint(method: str, uri: str) -> str:
+        """Método de la API de una petición: 'batch' para las batch, p. ej. 'events.list' para el resto."""
+        path = urlsplit(uri).path
+        if path.startswith("/batch"):
+            return "batch"
+        if path.endswith("/calendarList"):
+            return "calendarList.list"
+        if path.endswith("/events"):
+            return "events.list" if method == "GET" else "events.insert"
+        return {"GET": "events.get", "PATCH": "events.patch", "DELETE": "events.delete"}.get(method, method)
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=5, connection_type=None):
+        started = time.perf_counter()
+        time.sleep(self.service._sample())
+        response = self.emulator.request(uri, method, body=body, headers=headers)
+        self.service._record(self.endpoint(method, uri), started)
+        return response
+
+    def calls(self) -> dict:
+        """
+        Retorna {endpoint: {'calls', 'busy_s'}}: 'batch' cuenta peticiones batch y el resto
+        llamadas a la API, incluidas las que viajan dentro de un batch.
+        """
+        http = self.service.calls()
+        calls = {endpoint: {"calls": count, "busy_s": http.get(endpoint, {}).get("busy_s", 0.0)}
+                 for endpoint, count in self.emulator.stats()["calls"].items()}
+        if "batch" in http:
+            calls["batch"] = http["batch"]
+        return dict(sorted(calls.items()))
+
+    def span(self, endpoints) -> float:
+        return self.service.span(endpoints)
+
+
+def populate_week(emulator: CalendarEmulator, calendar_ids: list, week_start: datetime.date,
+                  events_per_day: int = 4) -> list:
+    """
+    Llena los calendarios con una semana típica a partir de `week_start`: un evento de
+    todo el día con la ubicación principal en días hábiles (solo en el primer calendario)
+    y `events_per_day` reuniones repartidas entre las 9:00 y las 18:00 en cada calendario.
+
+    Returns:
+        list: Los eventos creados.
+    """
+    if not 0 <= events_per_day <= MAX_EVENTS_PER_DAY:
+        raise ValueError(f"events_per_day debe estar entre 0 y {MAX_EVENTS_PER_DAY}, no {events_per_day}.")
+    created = []
+    step = 540 // max(events_per_day, 1)
+    for offset in range(7):
+        date = week_start + datetime.timedelta(days=offset)
+        if offset < 5 and calendar_ids:
+            created.append(emulator.add_event(calendar_ids[0], {
+                "summary": "Oficina" if offset % 2 == 0 else "Casa",
+                "start": {"date": date.isoformat()},
+                "end": {"date": (date + datetime.timedelta(days=1)).isoformat()},
+            }))
+        for number, calendar_id in enumerate(calendar_ids):
+            for index in range(events_per_day):
+                start = datetime.datetime.combine(date, datetime.time(9)) + datetime.timedelta(minutes=index * step)
+                created.append(emulator.add_event(calendar_id, {
+                    "summary": f"Reunión {number + 1}.{index + 1}",
+                    "description": "Revisión semanal del proyecto.",
+                    "location": "Sala 2" if index % 2 else None,
+                    "start": {"dateTime": start.isoformat()},
+                    "end": {"dateTime": (start + datetime.timedelta(minutes=step * 3 // 4)).isoformat()},
+                }))
+    return created
@@ -0,0 +1,269 @@
+"""
+Benchmark offline del pipeline completo: weekly_plan, generate_integrated_schedule
+(salida JSON y Markdown) y parse_and_create_events, con OpenAI y Google Calendar
+reemplazados por los dobles locales de benchmarks/fakes.py (latencia configurable,
+respuestas fijas en el formato de asistentes/schedule_integrator.md). No usa red,
+credenciales ni dinero.
+
+Por escenario reporta el tiempo de pared (mediana, mínimo y máximo de --repeat
+corridas), el tiempo de cada etapa, las llamadas a cada API y el pico de memoria
+(tracemalloc, en una corrida aparte para no distorsionar los tiempos). Con --save se
+guardan los resultados en JSON y con --compare se contrastan con un archivo anterior:
+el comando termina con código 1 si algún escenario empeora más allá de la tolerancia.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks --repeat 5 --openai-latency 2:0.5 --calendar-latency 0.1:0.3
+    python -m benchmarks --save baseline.json
+    python -m benchmarks --compare baseline.json --tolerance 0.2
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+from benchmarks.fakes import (
+    FakeAsyncGPTClient, FakeGPTClient, FakeOpenAIBackend, Latency, PLANNER_ASSISTANT, SimulatedCalendarHttp,
+    SimulatedService, canned_schedule, populate_week,
+)
+from calendar_emulator import CalendarEmulator
+from calendar_google import GoogleCalendar
+from calendar_processor import DEFAULT_CALENDARS_TO_INCLUDE
+from clients import reset_clients, set_clients
+from main_orchestrator import DEFAULT_TARGET_CALENDAR, generate_integrated_schedule, parse_and_create_events
+from weekly_planner import EXPERT_ASSISTANTS, get_weekly_plan
+
+# Endpoints de Calendar que son siempre peticiones HTTP propias (el resto puede viajar dentro de un batch)
+CALENDAR_HTTP_ENDPOINTS = ("calendarList.list", "events.list", "batch")
+
+
+@dataclass(frozen=True)
+class BenchmarkConfig:
+    openai_latency: Latency = Latency(0.2, 0.3)
+    calendar_latency: Latency = Latency(0.02, 0.3)
+    calendars: int = 2
+    events_per_day: int = 4
+    planned_per_day: int = 3
+    seed: int = 0
+
+
+def _next_week_start() -> datetime.date:
+    today = datetime.date.today()
+    return today + datetime.timedelta(days=(0 - today.weekday() + 7) % 7 or 7)
+
+
+class Environment:
+    """Dobles de una corrida: calendarios poblados, backend de OpenAI y clientes compartidos."""
+
+    def __init__(self, config: BenchmarkConfig):
+        week_start = _next_week_start()
+        self.emulator = CalendarEmulator()
+        self.calendar_http = SimulatedCalendarHttp(self.emulator, SimulatedService("calendar", config.calendar_latency,
+                                                                                   config.seed))
+        self.gc = GoogleCalendar(http=self.calendar_http, event_store_path=':memory:')
+        self.calendar_names = (DEFAULT_CALENDARS_TO_INCLUDE
+                               + [f"Calendario {n}" for n in range(3, config.calendars + 1)])[:config.calendars]
+        calendar_ids = [self.emulator.add_calendar(name, name if '@' in name else None) for name in self.calendar_names]
+        self.emulator.add_calendar(DEFAULT_TARGET_CALENDAR)
+        events = populate_week(self.emulator, calendar_ids, week_start, config.events_per_day)
+
+        self.schedule = canned_schedule(week_start, events, config.planned_per_day)
+        self.backend = FakeOpenAIBackend(self.schedule, config.openai_latency, seed=config.seed)
+        self.gpt_client = FakeGPTClient(self.backend)
+        self.async_gpt_client = FakeAsyncGPTClient(self.backend)
+        # Las etapas que no reciben clientes (p. ej. weekly_plan dentro del DAG) usan los compartidos
+        set_clients(google_calendar=self.gc, gpt_client=self.gpt_client, async_gpt_client=self.async_gpt_client)
+
+    def api_calls(self) -> dict:
+        return {"openai": self.backend.calls(), "calendar": self.calendar_http.calls()}
+
+
+def _check(result):
+    if result is None or (isinstance(result, str) and (result.startswith("Error") or "Error:" in result)):
+        raise RuntimeError(f"El pipeline falló: {str(result)[:300]}")
+    return result
+
+
+def _weekly_plan(env: Environment) -> dict:
+    _check(get_weekly_plan(gpt_client=env.async_gpt_client))
+    return {"experts": env.backend.span(EXPERT_ASSISTANTS), "planner": env.backend.span([PLANNER_ASSISTANT])}
+
+
+def _integrated(output_mode: str):
+    def run(env: Environment) -> dict:
+        timings = {}
+        _check(generate_integrated_schedule(timings=timings, gc=env.gc, gpt_client=env.gpt_client,
+                                            output_mode=output_mode, calendars=env.calendar_names))
+        return timings
+    return run
+
+
+def _parse_and_create(env: Environment) -> dict:
+    markdown = env.schedule.to_markdown()
+    started = time.perf_counter()
+    results = parse_and_create_events(markdown, env.gc, target_calendar=DEFAULT_TARGET_CALENDAR)
+    elapsed = time.perf_counter() - started
+    expected = sum(1 for _ in env.schedule.planned_events())
+    if len(results) != expected or any(r['error'] for r in results):
+        raise RuntimeError(f"Se esperaban {expected} eventos [PLAN] creados, hubo {len(results)}.")
+    calendar_write = env.calendar_http.span(CALENDAR_HTTP_ENDPOINTS)
+    return {"parse": max(0.0, elapsed - calendar_write), "calendar_write": calendar_write}
+
+
+SCENARIOS = {
+    "weekly_plan": _weekly_plan,
+    "integrated_json": _integrated("json"),
+    "integrated_markdown": _integrated("markdown"),
+    "parse_and_create_events": _parse_and_create,
+}
+
+
+def _run_once(scenario, config: BenchmarkConfig, trace_memory: bool = False) -> dict:
+    env = Environment(config)
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        started = time.perf_counter()
+        stages = scenario(env)
+        wall = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+        reset_clients()
+    return {"wall_s": wall, "stages": stages, "api_calls": env.api_calls(), "peak_bytes": peak}
+
+
+def run_scenario(name: str, config: BenchmarkConfig, repeat: int = 3, warmup: int = 1) -> dict:
+    """
+    Corre un escenario `warmup` veces sin medir, `repeat` veces midiendo tiempos y una vez
+    más con tracemalloc. Cada corrida usa dobles nuevos, así que todas parten del mismo estado.
+    """
+    scenario = SCENARIOS[name]
+    for _ in range(warmup):
+        _run_once(scenario, config)
+    runs = [_run_once(scenario, config) for _ in range(repeat)]
+    memory_run = _run_once(scenario, config, trace_memory=True)
+    walls = [run["wall_s"] for run in runs]
+    stage_names = runs[0]["stages"].keys()
+    return {
+        "scenario": name,
+        "repeat": repeat,
+        "wall_s": {"median": round(statistics.median(walls), 4), "min": round(min(walls), 4), "max": round(max(walls), 4)},
+        "stages_s": {stage: round(statistics.median(run["stages"][stage] for run in runs), 4) for stage in stage_names},
+        # Las llamadas no dependen de la corrida: son las de la última
+        "api_calls": runs[-1]["api_calls"],
+        "peak_memory_mb": round(memory_run["peak_bytes"] / 2 ** 20, 3),
+    }
+
+
+def _total_calls(calls: dict, endpoints=None) -> int:
+    return sum(c["calls"] for endpoint, c in calls.items() if endpoints is None or endpoint in endpoints)
+
+
+def compare(results: list, baseline: list, tolerance: float = 0.2, memory_tolerance: float = 0.2) -> list:
+    """
+    Compara resultados con los de una corrida anterior. Es una regresión que la mediana del
+    tiempo de pared o el pico de memoria crezcan más que la tolerancia (fracción), o que
+    aumente el número de llamadas a cualquier endpoint.
+
+    Returns:
+        list: Descripción de cada regresión encontrada (vacía si no hay).
+    """
+    previous = {result["scenario"]: result for result in baseline}
+    regressions = []
+    for result in results:
+        base = previous.get(result["scenario"])
+        if base is None:
+            continue
+        name = result["scenario"]
+        wall, base_wall = result["wall_s"]["median"], base["wall_s"]["median"]
+        if wall > base_wall * (1 + tolerance):
+            regressions.append(f"{name}: tiempo de pared {base_wall:.3f}s -> {wall:.3f}s")
+        memory, base_memory = result["peak_memory_mb"], base["peak_memory_mb"]
+        if memory > base_memory * (1 + memory_tolerance):
+            regressions.append(f"{name}: pico de memoria {base_memory:.2f} MB -> {memory:.2f} MB")
+        for service, calls in result["api_calls"].items():
+            for endpoint, counts in calls.items():
+                base_calls = base["api_calls"].get(service, {}).get(endpoint, {}).get("calls", 0)
+                if counts["calls"] > base_calls:
+                    regressions.append(f"{name}: llamadas a {service} {endpoint} {base_calls} -> {counts['calls']}")
+    return regressions
+
+
+def _print_table(results: list):
+    print(f"\n{'escenario':<24} {'mediana (s)':>11} {'min (s)':>8} {'max (s)':>8} {'openai':>7} "
+          f"{'calendar':>9} {'memoria (MB)':>13}  etapas (s)")
+    for r in results:
+        stages = ", ".join(f"{stage}={seconds:.3f}" for stage, seconds in r["stages_s"].items())
+        print(f"{r['scenario']:<24} {r['wall_s']['median']:>11.3f} {r['wall_s']['min']:>8.3f} "
+              f"{r['wall_s']['max']:>8.3f} {_total_calls(r['api_calls']['openai']):>7} "
+              f"{_total_calls(r['api_calls']['calendar'], CALENDAR_HTTP_ENDPOINTS):>9} "
+              f"{r['peak_memory_mb']:>13.2f}  {stages}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='Escenario a correr (repetible). Default: todos.')
+    parser.add_argument('--repeat', type=int, default=3, help='Corridas medidas por escenario (default 3).')
+    parser.add_argument('--warmup', type=int, default=1, help='Corridas previas sin medir (default 1).')
+    parser.add_argument('--openai-latency', type=Latency.parse, default=BenchmarkConfig.openai_latency,
+                        help="Latencia de cada llamada a OpenAI: mediana[:sigma[:máximo]] en s (default 0.2:0.3).")
+    parser.add_argument('--calendar-latency', type=Latency.parse, default=BenchmarkConfig.calendar_latency,
+                        help="Latencia de cada petición a Calendar (default 0.02:0.3).")
+    parser.add_argument('--calendars', type=int, default=BenchmarkConfig.calendars,
+                        help='Calendarios leídos (default 2).')
+    parser.add_argument('--events-per-day', type=int, default=BenchmarkConfig.events_per_day,
+                        help='Eventos existentes por día y calendario (default 4).')
+    parser.add_argument('--planned-per-day', type=int, default=BenchmarkConfig.planned_per_day,
+                        help='Eventos [PLAN] por día en la salida del integrador (default 3).')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='Imprime los resultados en JSON.')
+    parser.add_argument('--save', help='Guarda los resultados en este archivo JSON.')
+    parser.add_argument('--compare', help='Archivo JSON de una corrida anterior (--save) contra el que comparar.')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Aumento tolerado de tiempo y memoria, como fracción (default 0.2).')
+    parser.add_argument('--verbose', action='store_true', help='Muestra los logs y prints del pipeline.')
+    args = parser.parse_args(argv)
+
+    config = BenchmarkConfig(openai_latency=args.openai_latency, calendar_latency=args.calendar_latency,
+                             calendars=args.calendars, events_per_day=args.events_per_day,
+                             planned_per_day=args.planned_per_day, seed=args.seed)
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+    results = []
+    with open(os.devnull, 'w') as devnull:
+        quiet = contextlib.redirect_stdout(devnull) if not args.verbose else contextlib.nullcontext()
+        for name in args.scenario or list(SCENARIOS):
+            print(f"Corriendo {name}...", file=sys.stderr)
+            with quiet:
+                results.append(run_scenario(name, config, repeat=args.repeat, warmup=args.warmup))
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        _print_table(results)
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), tolerance=args.tolerance, memory_tolerance=args.tolerance)
+        if regressions:
+            print("\nRegresiones respecto de " + args.compare + ":")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\nSin regresiones respecto de {args.compare}.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,544 @@
+"""
+Emulador en memoria de la API de Google Calendar v3 para pruebas de carga y escala sin red.
+
+CalendarEmulator es un cliente HTTP compatible con httplib2 (`request(uri, method, body, headers)`)
+que responde las rutas REST que usa GoogleCalendar, así que `build('calendar', 'v3', http=emulador)`
+funciona sin cambios en el resto del código:
+
+    calendarList.list                       GET    /calendar/v3/users/me/calendarList
+    events.list                             GET    /calendar/v3/calendars/{calendarId}/events
+    events.insert                           POST   /calendar/v3/calendars/{calendarId}/events
+    events.get / events.patch / events.delete  GET / PATCH / DELETE  .../events/{eventId}
+    batch (multipart/mixed)                 POST   /batch/calendar/v3
+
+events.list implementa paginación (pageToken, maxResults), sincronización incremental
+(syncToken, nextSyncToken, 410 al expirar), timeMin/timeMax, orderBy=startTime, showDeleted
+y máscaras de campos (fields). Se pueden inyectar latencia, una cuota de llamadas por
+segundo (403 rateLimitExceeded o 429) y errores, tanto aleatorios como programados.
+
+Uso:
+    emulator = CalendarEmulator(latency=0.05, quota_per_second=50)
+    calendar_id = emulator.add_calendar('Trabajo')
+    gc = emulator.client()          # GoogleCalendar apuntando al emulador
+"""
+import datetime
+import email.parser
+import http.client
+import json
+import random
+import threading
+import time
+import uuid
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import httplib2
+
+CALENDAR_PATH = '/calendar/v3/'
+BATCH_PATH = '/batch'
+# Límites de la API real
+DEFAULT_MAX_RESULTS = 250
+MAX_RESULTS_LIMIT = 2500
+CALENDAR_LIST_MAX_RESULTS = 250
+DEFAULT_MAX_BATCH_SIZE = 50
+# Parámetros de events.list que la API rechaza junto con syncToken
+_SYNC_INCOMPATIBLE_PARAMS = ('timeMin', 'timeMax', 'orderBy', 'q', 'updatedMin', 'iCalUID')
+
+
+class ApiError(Exception):
+    """Error de una llamada emulada; se responde con el cuerpo de error de la API de Google."""
+
+    def __init__(self, status, reason, message=None, headers=None):
+        super().__init__(message or reason)
+        self.status = status
+        self.reason = reason
+        self.message = message or http.client.responses.get(status, reason)
+        self.headers = headers or {}
+
+    def body(self):
+        return {'error': {
+            'errors': [{'domain': 'global', 'reason': self.reason, 'message': self.message}],
+            'code': self.status,
+            'message': self.message,
+        }}
+
+
+def _rfc3339(moment):
+    return moment.astimezone(datetime.timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def _parse_instant(value, name):
+    """RFC3339 (con Z, offset o sin zona, que se toma como UTC) a datetime aware."""
+    try:
+        moment = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        raise ApiError(400, 'badRequest', f"Invalid value for {name}: {value}") from None
+    return moment if moment.tzinfo else moment.replace(tzinfo=datetime.timezone.utc)
+
+
+def _event_instant(value, name):
+    """Inicio o fin de un evento ({'dateTime'} o {'date'} de todo el día) como datetime aware."""
+    if not isinstance(value, dict) or not (value.get('dateTime') or value.get('date')):
+        raise ApiError(400, 'required', f"Missing {name} time.")
+    if value.get('dateTime'):
+        return _parse_instant(value['dateTime'], name)
+    try:
+        day = datetime.date.fromisoformat(value['date'])
+    except ValueError:
+        raise ApiError(400, 'badRequest', f"Invalid {name} date: {value['date']}") from None
+    return datetime.datetime.combine(day, datetime.time.min, tzinfo=datetime.timezone.utc)
+
+
+def parse_fields(mask):
+    """
+    Interpreta una máscara de campos de la API ('nextPageToken,items(id,start/dateTime)')
+    como un árbol {campo: subárbol}; None selecciona el campo completo.
+
+    Raises:
+        ValueError: Si la máscara no es válida.
+    """
+    tree, position = _parse_field_list(mask, 0)
+    if position != len(mask):
+        raise ValueError(f"Unexpected ')' at position {position}.")
+    return tree
+
+
+def _parse_field_list(mask, position):
+    tree = {}
+    while position < len(mask):
+        end = position
+        while end < len(mask) and mask[end] not in ',()':
+            end += 1
+        path = mask[position:end].strip()
+        if not path:
+            raise ValueError(f"Empty field name at position {position}.")
+        subtree = None
+        if end < len(mask) and mask[end] == '(':
+            subtree, end = _parse_field_list(mask, end + 1)
+            if end >= len(mask) or mask[end] != ')':
+                raise ValueError("Unbalanced parentheses.")
+            end += 1
+        _merge_field(tree, path.split('/'), subtree)
+        if end < len(mask) and mask[end] == ')':
+            return tree, end
+        if end < len(mask) and mask[end] == ',':
+            end += 1
+        position = end
+    return tree, position
+
+
+def _merge_field(tree, parts, subtree):
+    for part in parts[:-1]:
+        if part in tree and tree[part] is None:
+            return  # el campo ya está seleccionado completo
+        tree = tree.setdefault(part, {})
+    leaf = parts[-1]
+    if subtree is None or tree.get(leaf, {}) is None:
+        tree[leaf] = None
+    else:
+        for name, child in subtree.items():
+            _merge_field(tree.setdefault(leaf, {}), [name], child)
+
+
+def apply_fields(value, tree):
+    """Recorta `value` (respuesta JSON) a los campos del árbol de `parse_fields`."""
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [apply_fields(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {name: apply_fields(value[name], subtree) for name, subtree in tree.items() if name in value}
+    return value
+
+
+class CalendarEmulator:
+    """
+    Servidor en memoria de la API de Calendar con interfaz de cliente httplib2. Es
+    thread-safe: un mismo emulador puede compartirse entre todos los hilos de GoogleCalendar.
+
+    Cuota y errores se aplican por llamada (cada parte de un batch cuenta como una), la
+    latencia por petición HTTP (un batch es una sola).
+    """
+
+    def __init__(self, latency=0.0, quota_per_second=None, quota_burst=None, quota_status=403,
+                 retry_after=None, error_rate=0.0, error_status=503, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_page_size=MAX_RESULTS_LIMIT, seed=0):
+        """
+        Parámetros:
+           latency: Segundos de cada petición HTTP, o una función sin argumentos que los retorna.
+           quota_per_second (opcional): Llamadas por segundo permitidas (token bucket). None = sin límite.
+           quota_burst (opcional): Capacidad del bucket. Default quota_per_second.
+           quota_status: Código de las llamadas sobre la cuota: 403 (rateLimitExceeded, como
+                         responde Calendar) o 429.
+           retry_after (opcional): Segundos a indicar en la cabecera Retry-After de los rechazos por cuota.
+           error_rate: Probabilidad de que una llamada falle con error_status.
+           error_status: Código de los errores aleatorios. Default 503.
+           max_batch_size: Máximo de llamadas por batch; un batch mayor se rechaza con 400.
+           max_page_size: Máximo de eventos por página de events.list (la API admite 2500).
+           seed: Semilla de los errores aleatorios.
+        """
+        self.latency = latency
+        self.quota_per_second = quota_per_second
+        self.quota_burst = quota_burst if quota_burst is not None else quota_per_second
+        self.quota_status = quota_status
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.max_batch_size = max_batch_size
+        self.max_page_size = max_page_size
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._calendars = {}  # calendar_id -> entrada de calendarList
+        self._events = {}  # calendar_id -> {event_id: {'resource': evento, 'seq': int}}
+        self._seq = 0  # contador de cambios, base de los sync tokens
+        self._sync_floor = 0  # los sync tokens anteriores a este valor responden 410
+        self._injected = []  # errores programados: [{'status', 'reason', 'method', 'remaining'}]
+        self._tokens = float(self.quota_burst or 0)
+        self._refilled_at = time.monotonic()
+        self.reset_stats()
+
+    # --- Datos ---
+
+    def add_calendar(self, summary, calendar_id=None, primary=False, time_zone='UTC'):
+        """Crea un calendario (visible en calendarList) y retorna su ID."""
+        calendar_id = calendar_id or f"{uuid.uuid4().hex}@group.calendar.google.com"
+        with self._lock:
+            self._calendars[calendar_id] = {
+                'kind': 'calendar#calendarListEntry',
+                'etag': f'"{len(self._calendars) + 1}"',
+                'id': calendar_id,
+                'summary': summary,
+                'timeZone': time_zone,
+                'accessRole': 'owner',
+                'primary': primary,
+            }
+            self._events.setdefault(calendar_id, {})
+        return calendar_id
+
+    def add_event(self, calendar_id, body):
+        """Inserta un evento directamente, sin latencia, cuota ni errores (para poblar el emulador)."""
+        with self._lock:
+            return dict(self._insert(calendar_id, body))
+
+    def add_events(self, calendar_id, bodies):
+        """Inserta varios eventos directamente (ver `add_event`) y retorna cuántos se crearon."""
+        with self._lock:
+            for body in bodies:
+                self._insert(calendar_id, body)
+        return len(bodies)
+
+    def events(self, calendar_id, include_deleted=False):
+        """Retorna los eventos de un calendario en orden de inserción."""
+        with self._lock:
+            return [dict(record['resource']) for record in self._calendar_events(calendar_id).values()
+                    if include_deleted or record['resource']['status'] != 'cancelled']
+
+    def expire_sync_tokens(self):
+        """Invalida todos los sync tokens emitidos: la próxima sincronización delta recibe 410 Gone."""
+        with self._lock:
+            self._seq += 1
+            self._sync_floor = self._seq
+
+    def inject_error(self, status, count=1, method=None, reason=None, retry_after=None):
+        """
+        Programa que las próximas `count` llamadas (de `method`, p. ej. 'events.delete' o
+        'batch', o de cualquiera si es None) fallen con `status`.
+        """
+        with self._lock:
+            self._injected.append({'status': status, 'reason': reason, 'method': method,
+                                   'retry_after': retry_after, 'remaining': count})
+
+    # --- Estadísticas ---
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {'http_requests': 0, 'batch_requests': 0, 'calls': {}, 'errors': {}, 'throttled': 0}
+
+    def stats(self):
+        """
+        Retorna {'http_requests', 'batch_requests', 'calls': {método: n}, 'errors': {código: n},
+        'throttled'}. Las llamadas de un batch cuentan en 'calls' y el batch en 'batch_requests'.
+        """
+        with self._lock:
+            return dict(self._stats, calls=dict(self._stats['calls']), errors=dict(self._stats['errors']))
+
+    # --- Cliente GoogleCalendar ---
+
+    def client(self, **kwargs):
+        """Retorna un GoogleCalendar que hace todas sus peticiones a este emulador (sin OAuth)."""
+        from calendar_google import GoogleCalendar
+        kwargs.setdefault('event_store_path', ':memory:')
+        return GoogleCalendar(http=self, **kwargs)
+
+    # --- Interfaz httplib2 ---
+
+    def request(self, uri, method='GET', body=None, headers=None, redirections=5, connection_type=None):
+        """Atiende una petición como httplib2.Http.request: retorna (httplib2.Response, bytes)."""
+        delay = self.latency() if callable(self.latency) else self.latency
+        if delay:
+            time.sleep(delay)
+        if isinstance(body, bytes):
+            body = body.decode('utf-8')
+        headers = {name.lower(): value for name, value in (headers or {}).items()}
+        parts = urlsplit(uri)
+        with self._lock:
+            self._stats['http_requests'] += 1
+        if parts.path.startswith(BATCH_PATH) and method == 'POST':
+            return self._batch(body or '', headers.get('content-type', ''))
+        status, response_headers, payload = self._call(method, parts.path, parts.query, body)
+        return self._response(status, response_headers), payload
+
+    @staticmethod
+    def _response(status, headers=None):
+        info = {'status': str(status), 'content-type': 'application/json; charset=UTF-8'}
+        info.update(headers or {})
+        return httplib2.Response(info)
+
+    def _call(self, method, path, query, body):
+        """Atiende una llamada (directa o parte de un batch): retorna (status, cabeceras, cuerpo en bytes)."""
+        params = {name: values[-1] for name, values in parse_qs(query, keep_blank_values=True).items()}
+        name, handler, args = self._route(method, path)
+        try:
+            with self._lock:
+                self._stats['calls'][name] = self._stats['calls'].get(name, 0) + 1
+                self._admit(name)
+                if handler is None:
+                    raise ApiError(404, 'notFound', f"No route for {method} {path}.")
+                try:
+                    data = json.loads(body) if body else {}
+                except ValueError:
+                    raise ApiError(400, 'parseError', "Parse Error") from None
+                status, result = handler(*args, params=params, body=data)
+            if 'fields' in params and result is not None:
+                try:
+                    result = apply_fields(result, parse_fields(params['fields']))
+                except ValueError as e:
+                    raise ApiError(400, 'invalidParameter', f"Invalid field selection: {e}") from None
+            return status, {}, json.dumps(result).encode('utf-8') if result is not None else b''
+        except ApiError as e:
+            with self._lock:
+                self._stats['errors'][e.status] = self._stats['errors'].get(e.status, 0) + 1
+            return e.status, e.headers, json.dumps(e.body()).encode('utf-8')
+
+    def _route(self, method, path):
+        """Retorna (nombre del método de la API, handler, argumentos de la ruta)."""
+        if not path.startswith(CALENDAR_PATH):
+            return 'unknown', None, ()
+        segments = [unquote(segment) for segment in path[len(CALENDAR_PATH):].split('/')]
+        if segments == ['users', 'me', 'calendarList'] and method == 'GET':
+            return 'calendarList.list', self._calendar_list, ()
+        if len(segments) == 3 and segments[0] == 'calendars' and segments[2] == 'events':
+            if method == 'GET':
+                return 'events.list', self._list_events, (segments[1],)
+            if method == 'POST':
+                return 'events.insert', self._insert_event, (segments[1],)
+        if len(segments) == 4 and segments[0] == 'calendars' and segments[2] == 'events':
+            handlers = {'GET': ('events.get', self._get_event), 'PATCH': ('events.patch', self._patch_event),
+                        'DELETE': ('events.delete', self._delete_event)}
+            if method in handlers:
+                name, handler = handlers[method]
+                return name, handler, (segments[1], segments[3])
+        return 'unknown', None, ()
+
+    def _admit(self, name):
+        """Aplica errores programados, errores aleatorios y la cuota a una llamada. Requiere el lock."""
+        for injected in self._injected:
+            if injected['method'] in (None, name):
+                injected['remaining'] -= 1
+                if injected['remaining'] <= 0:
+                    self._injected.remove(injected)
+                retry_after = injected['retry_after']
+                raise ApiError(injected['status'], injected['reason'] or self._reason(injected['status']),
+                               headers={'retry-after': str(retry_after)} if retry_after is not None else None)
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise ApiError(self.error_status, self._reason(self.error_status))
+        if self.quota_per_second:
+            now = time.monotonic()
+            self._tokens = min(self.quota_burst, self._tokens + (now - self._refilled_at) * self.quota_per_second)
+            self._refilled_at = now
+            if self._tokens < 1:
+                self._stats['throttled'] += 1
+                raise ApiError(self.quota_status, 'rateLimitExceeded', "Rate Limit Exceeded",
+                               headers={'retry-after': str(self.retry_after)} if self.retry_after is not None else None)
+            self._tokens -= 1
+
+    @staticmethod
+    def _reason(status):
+        return {400: 'badRequest', 403: 'forbidden', 404: 'notFound', 409: 'duplicate', 410: 'deleted',
+                429: 'rateLimitExceeded'}.get(status, 'backendError')
+
+    # --- Batch ---
+
+    def _batch(self, body, content_type):
+        message = email.parser.Parser().parsestr(f"Content-Type: {content_type}\r\n\r\n{body}")
+        if not message.is_multipart():
+            return self._response(400), json.dumps(ApiError(400, 'badRequest', "Batch body is not multipart/mixed.").body()).encode('utf-8')
+        parts = message.get_payload()
+        if len(parts) > self.max_batch_size:
+            error = ApiError(400, 'badRequest', f"Too many requests in batch ({len(parts)} > {self.max_batch_size}).")
+            return self._response(400), json.dumps(error.body()).encode('utf-8')
+        with self._lock:
+            self._stats['batch_requests'] += 1
+
+        boundary = f"batch_{uuid.uuid4().hex}"
+        chunks = []
+        for part in parts:
+            request_line, _, rest = part.get_payload().partition('\n')
+            method, target = request_line.split(' ')[:2]
+            request = email.parser.Parser().parsestr(rest)
+            target_parts = urlsplit(target)
+            status, headers, payload = self._call(method, target_parts.path, target_parts.query,
+                                                  request.get_payload() or None)
+            response_headers = ''.join(f"{name}: {value}\r\n" for name, value in headers.items())
+            # El Content-ID puede venir plegado en varias líneas
+            content_id = ''.join(part.get('Content-ID', '<>').splitlines())
+            chunks.append(
+                f"--{boundary}\r\n"
+                f"Content-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id[1:-1]}>\r\n\r\n"
+                f"HTTP/1.1 {status} {http.client.responses.get(status, '')}\r\n"
+                f"Content-Type: application/json; charset=UTF-8\r\n{response_headers}"
+                f"Content-Length: {len(payload)}\r\n\r\n"
+                f"{payload.decode('utf-8')}\r\n"
+            )
+        chunks.append(f"--{boundary}--\r\n")
+        return (self._response(200, {'content-type': f"multipart/mixed; boundary={boundary}"}),
+                ''.join(chunks).encode('utf-8'))
+
+    # --- Métodos de la API (se llaman con el lock tomado) ---
+
+    def _calendar_events(self, calendar_id):
+        events = self._events.get(calendar_id)
+        if events is None:
+            raise ApiError(404, 'notFound', "Not Found")
+        return events
+
+    def _calendar_list(self, params, body):
+        entries = list(self._calendars.values())
+        max_results = min(int(params.get('maxResults', CALENDAR_LIST_MAX_RESULTS)), CALENDAR_LIST_MAX_RESULTS)
+        offset = self._page_offset(params.get('pageToken'))
+        result = {'kind': 'calendar#calendarList', 'etag': f'"{self._seq}"',
+                  'items': [dict(entry) for entry in entries[offset:offset + max_results]]}
+        if offset + max_results < len(entries):
+            result['nextPageToken'] = f"page-{offset + max_results}"
+        return 200, result
+
+    @staticmethod
+    def _page_offset(page_token, snapshot=False):
+        """Decodifica 'page-<offset>[-<snapshot>]'."""
+        if not page_token:
+            return (0, None) if snapshot else 0
+        try:
+            values = [int(value) for value in page_token.split('-')[1:]]
+            offset = values[0]
+        except (ValueError, IndexError):
+            raise ApiError(400, 'invalid', "Invalid page token.") from None
+        if snapshot:
+            return offset, values[1] if len(values) > 1 else None
+        return offset
+
+    def _list_events(self, calendar_id, params, body):
+        events = self._calendar_events(calendar_id)
+        max_results = min(int(params.get('maxResults', DEFAULT_MAX_RESULTS)), MAX_RESULTS_LIMIT, self.max_page_size)
+        if max_results < 1:
+            raise ApiError(400, 'invalid', "Invalid value for maxResults.")
+        offset, snapshot = self._page_offset(params.get('pageToken'), snapshot=True)
+        snapshot = self._seq if snapshot is None else snapshot
+        sync_token = params.get('syncToken')
+
+        if sync_token:
+            incompatible = [name for name in _SYNC_INCOMPATIBLE_PARAMS if name in params]
+            if incompatible:
+                raise ApiError(400, 'invalid', f"Parameters {incompatible} cannot be used with syncToken.")
+            try:
+                since = int(sync_token.rsplit('-', 1)[1])
+            except (ValueError, IndexError):
+                raise ApiError(400, 'invalid', "Invalid sync token.") from None
+            if since < self._sync_floor:
+                raise ApiError(410, 'fullSyncRequired', "Sync token is no longer valid, a full sync is required.")
+            # Los cambios posteriores al snapshot quedan para la próxima sincronización
+            items = [record['resource'] for record in events.values() if since < record['seq'] <= snapshot]
+        else:
+            if params.get('orderBy') == 'startTime' and params.get('singleEvents', '').lower() != 'true':
+                raise ApiError(400, 'invalid', "The requested ordering is not available for the particular query.")
+            show_deleted = params.get('showDeleted', '').lower() == 'true'
+            time_min = _parse_instant(params['timeMin'], 'timeMin') if 'timeMin' in params else None
+            time_max = _parse_instant(params['timeMax'], 'timeMax') if 'timeMax' in params else None
+            items = []
+            for record in events.values():
+                event = record['resource']
+                if event['status'] == 'cancelled' and not show_deleted:
+                    continue
+                # Se incluyen los eventos que se superponen con [timeMin, timeMax)
+                if time_min is not None and record['end'] <= time_min:
+                    continue
+                if time_max is not None and record['start'] >= time_max:
+                    continue
+                items.append(event)
+            if params.get('orderBy') == 'startTime':
+                items.sort(key=lambda event: events[event['id']]['start'])
+
+        calendar = self._calendars.get(calendar_id, {})
+        result = {'kind': 'calendar#events', 'summary': calendar.get('summary'),
+                  'timeZone': calendar.get('timeZone', 'UTC'), 'updated': _rfc3339(datetime.datetime.now(datetime.timezone.utc)),
+                  'items': [dict(event) for event in items[offset:offset + max_results]]}
+        if offset + max_results < len(items):
+            result['nextPageToken'] = f"page-{offset + max_results}-{snapshot}"
+        else:
+            result['nextSyncToken'] = f"sync-{snapshot}"
+        return 200, result
+
+    def _insert(self, calendar_id, body):
+        events = self._calendar_events(calendar_id)
+        start = _event_instant(body.get('start'), 'start')
+        end = _event_instant(body.get('end'), 'end')
+        if end < start:
+            raise ApiError(400, 'timeRangeEmpty', "The specified time range is empty.")
+        event_id = body.get('id') or uuid.uuid4().hex
+        if event_id in events:
+            raise ApiError(409, 'duplicate', "The requested identifier already exists.")
+        now = _rfc3339(datetime.datetime.now(datetime.timezone.utc))
+        self._seq += 1
+        resource = dict(body, kind='calendar#event', etag=f'"{self._seq}"', id=event_id,
+                        status=body.get('status') or 'confirmed',
+                        htmlLink=f"https://www.google.com/calendar/event?eid={event_id}",
+                        created=now, updated=now, iCalUID=f"{event_id}@google.com",
+                        creator={'email': calendar_id, 'self': True}, organizer={'email': calendar_id, 'self': True})
+        events[event_id] = {'resource': resource, 'seq': self._seq, 'start': start, 'end': end}
+        return resource
+
+    def _insert_event(self, calendar_id, params, body):
+        return 200, self._insert(calendar_id, body)
+
+    def _live_event(self, calendar_id, event_id):
+        record = self._calendar_events(calendar_id).get(event_id)
+        if record is None:
+            raise ApiError(404, 'notFound', "Not Found")
+        if record['resource']['status'] == 'cancelled':
+            raise ApiError(410, 'deleted', "Resource has been deleted")
+        return record
+
+    def _get_event(self, calendar_id, event_id, params, body):
+        record = self._calendar_events(calendar_id).get(event_id)
+        if record is None:
+            raise ApiError(404, 'notFound', "Not Found")
+        return 200, record['resource']
+
+    def _patch_event(self, calendar_id, event_id, params, body):
+        record = self._live_event(calendar_id, event_id)
+        resource = dict(record['resource'], **{name: value for name, value in body.items() if name != 'id'})
+        start = _event_instant(resource.get('start'), 'start')
+        end = _event_instant(resource.get('end'), 'end')
+        self._seq += 1
+        resource.update(etag=f'"{self._seq}"', updated=_rfc3339(datetime.datetime.now(datetime.timezone.utc)))
+        record.update(resource=resource, seq=self._seq, start=start, end=end)
+        return 200, resource
+
+    def _delete_event(self, calendar_id, event_id, params, body):
+        record = self._live_event(calendar_id, event_id)
+        self._seq += 1
+        # Como en la API, el evento queda como 'cancelled' y aparece en la próxima sincronización delta
+        record.update(resource={'kind': 'calendar#event', 'etag': f'"{self._seq}"', 'id': event_id,
+                                'status': 'cancelled',
+                                'start': record['resource']['start'], 'end': record['resource']['end']},
+                      seq=self._seq)
+        return 204, None
@@ -10,22 +10,169 @@ from googleapiclient.discovery import build
 from google.auth.exceptions import RefreshError
 import json # Importar json para pretty printing
 import time # Import time for potential delays if needed
+import concurrent.futures
+import heapq
+import threading
+import uuid
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
+from event_store import EventStore, DEFAULT_EVENT_STORE_FILE
+from retry import CALENDAR_RETRY_POLICY, call_with_retry, parse_retry_after
+import metrics
+
+# Calendar acepta hasta 50 llamadas por petición batch antes de empezar a rechazar
+BATCH_SIZE = 50
+# Reintentos del borrado batch: número de rondas y pausa inicial (se duplica si hay rate limit)
+DELETE_MAX_ATTEMPTS = 5
+DELETE_BACKOFF_SECONDS = 1.0
+# Margen antes del vencimiento del access token para refrescarlo de forma proactiva
+TOKEN_REFRESH_MARGIN_SECONDS = 300
+# Calendarios consultados en paralelo por buscar_eventos_todos
+DEFAULT_FETCH_WORKERS = 4
+# Días hacia atrás y hacia adelante que cubre una sincronización completa del almacén local.
+# Sin límite hacia adelante, singleEvents=True expande las series recurrentes sin fin hasta
+# años en el futuro; las consultas que pasan del horizonte fuerzan una nueva sincronización completa.
+SYNC_LOOKBACK_DAYS = 7
+SYNC_HORIZON_DAYS = 35
+# Máximo de eventos por página que admite events().list (el default de la API es 250)
+MAX_RESULTS_PER_PAGE = 2500
+# Máscaras de campos: solo lo que usa evento_info (más status para detectar borrados en la sincronización)
+EVENT_LIST_FIELDS = (
+    'nextPageToken,nextSyncToken,'
+    'items(id,status,summary,description,start,end,location,'
+    'attendees(email,displayName,self,responseStatus),htmlLink)'
+)
+DELETE_LIST_FIELDS = 'nextPageToken,items(id,summary)'
+# Campos que compara la reconciliación entre el plan y el calendario destino
+RECONCILE_LIST_FIELDS = 'nextPageToken,items(id,summary,description,location,start,end)'
+# Códigos HTTP que vale la pena reintentar (rate limit y errores transitorios del servidor)
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+# Código con el que events.insert rechaza un ID ya existente
+CONFLICT_STATUS_CODE = 409
+
+
+class AuthorizationRequiredError(RuntimeError):
+    """El token no es válido ni renovable y no se permite abrir el flujo OAuth interactivo."""
+
+
+def _http_status(exception):
+    """Retorna el código HTTP de un HttpError de la API, o None si no aplica."""
+    resp = getattr(exception, 'resp', None)
+    status = getattr(resp, 'status', None)
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_rate_limit_error(exception):
+    """Calendar señala el rate limit con 429 o con 403 (rateLimitExceeded / userRateLimitExceeded)."""
+    status = _http_status(exception)
+    if status == 429:
+        return True
+    return status == 403 and 'ratelimitexceeded' in str(exception).lower()
+
+
+def _is_retryable_error(exception):
+    return _is_rate_limit_error(exception) or _http_status(exception) in RETRYABLE_STATUS_CODES
+
+
+def _is_transient_error(exception):
+    """Errores que la política de reintentos vuelve a intentar: los reintentables de la API y los de red."""
+    return _is_retryable_error(exception) or isinstance(exception, (TimeoutError, ConnectionError))
+
+
+def _new_event_ids(count):
+    """
+    IDs de evento generados por el cliente para `count` inserciones de una misma corrida.
+    events.insert no es idempotente: con el ID fijado de antemano, reenviar una inserción
+    que el servidor ya aplicó (timeout, 5xx) responde 409 en vez de crear un duplicado.
+    La API acepta IDs en base32hex (0-9, a-v) de 5 a 1024 caracteres; un uuid4 en hex lo es.
+    """
+    run_id = uuid.uuid4().hex
+    return [f"{run_id}{index:x}" for index in range(count)]
+
+
+def _is_conflict_error(exception):
+    return _http_status(exception) == CONFLICT_STATUS_CODE
+
+
+def _retry_after(exception):
+    """Pausa pedida por la API en la cabecera Retry-After de un HttpError, o None."""
+    resp = getattr(exception, 'resp', None)
+    return parse_retry_after(resp.get('retry-after')) if hasattr(resp, 'get') else None
+
+
+def _is_accepted_or_own(event):
+    """
+    Indica si el evento debe incluirse: los eventos propios siempre, y las
+    invitaciones para el usuario solo si las aceptó.
+    """
+    # --- Change: Filter by attendee status ---
+    for attendee in event.get('attendees', []):
+        if attendee.get('self'): # Check if this attendee is the user
+            # If it's an invitation for the user, only include if accepted
+            return attendee.get('responseStatus') == 'accepted'
+    return True
+    # --- End Change ---
+
+
+def _evento_info(event, calendar_id, calendar_summary):
+    """Reduce un recurso de evento de la API a los campos que usa el resto del pipeline."""
+    return {
+        'calendar_id': calendar_id,
+        'calendar_summary': calendar_summary,
+        'id': event.get('id'),
+        'summary': event.get('summary'),
+        'description': event.get('description'),
+        'start': event.get('start'),
+        'end': event.get('end'),
+        'location': event.get('location'),
+        # Attendees might still be useful for the formatter, keep it for now
+        'attendees': event.get('attendees'),
+        'htmlLink': event.get('htmlLink')
+    }
+
+
+def _event_start_key(event):
+    """Clave de orden cronológico de un evento: su dateTime de inicio, o date si es de todo el día."""
+    return event['start'].get('dateTime', event['start'].get('date'))
+
 
 class GoogleCalendar:
-    def __init__(self, credentials_file='credentials.json', token_file='token.json'):
+    def __init__(self, credentials_file='credentials.json', token_file='token.json', event_store_path=DEFAULT_EVENT_STORE_FILE,
+                 retry_policy=None, interactive=True, http=None):
         """
         Inicializa la clase, realizando la autenticación con la API de Google Calendar.
         Parámetros:
            credentials_file: Ruta al archivo de credenciales OAuth 2.0.
            token_file: Archivo en el que se almacenan los tokens de acceso.
+           event_store_path: Archivo SQLite del almacén local usado por la sincronización incremental.
+           retry_policy: RetryPolicy de las llamadas a la API (backoff, timeout por intento y
+                         presupuesto total). Default CALENDAR_RETRY_POLICY.
+           interactive: Si es False (procesos batch, servidores), nunca abre el navegador para
+                        autorizar: sin un token válido o renovable lanza AuthorizationRequiredError.
+           http (opcional): Cliente HTTP compatible con httplib2 y thread-safe al que se envían todas
+                            las peticiones, sin OAuth (p. ej. calendar_emulator.CalendarEmulator para
+                            pruebas de carga sin red). Con http no se leen credentials_file ni token_file.
         """
+        self.retry_policy = retry_policy or CALENDAR_RETRY_POLICY
         self.credentials_file = credentials_file
         self.token_file = token_file
+        self.interactive = interactive
+        self.event_store_path = event_store_path
+        self._event_store = None
         self.scopes = ['https://www.googleapis.com/auth/calendar']
         self.creds = None
         # --- Change: Store calendars list on init for reuse ---
         self._calendars_cache = None
         # --- End Change ---
+        self._thread_local = threading.local()
+        self._auth_lock = threading.Lock()
+        self._http = http
+        if http is not None:
+            self.service = build('calendar', 'v3', http=http)
+            return
         self.authenticate()
         # Construir el servicio para interactuar con la API
         self.service = build('calendar', 'v3', credentials=self.creds)
@@ -42,7 +189,12 @@ class GoogleCalendar:
                     self.creds.refresh(Request())
                 else:
                     raise RefreshError("No hay refresh_token válido")
-            except RefreshError:
+            except RefreshError as e:
+                if not self.interactive:
+                    # Se conserva el token: lo repara una autorización interactiva posterior
+                    raise AuthorizationRequiredError(
+                        f"'{self.token_file}' no tiene credenciales válidas y el modo no interactivo "
+                        f"no puede abrir el flujo OAuth: {e}") from e
                 # Borramos el token viejo y forzamos un nuevo login
                 if os.path.exists(self.token_file):
                     os.remove(self.token_file)
@@ -53,6 +205,29 @@ class GoogleCalendar:
             with open(self.token_file, 'w') as token:
                 token.write(self.creds.to_json())
 
+    def ensure_fresh_credentials(self, margin_seconds=TOKEN_REFRESH_MARGIN_SECONDS):
+        """
+        Refresca el access token de forma proactiva si vence dentro de margin_seconds,
+        para que ninguna petición en curso tenga que esperar un refresh por un 401.
+        Guarda el token renovado en token_file.
+
+        Retorna:
+           bool: True si se refrescó el token.
+        """
+        with self._auth_lock:
+            expiry = self.creds.expiry if self.creds else None
+            if not expiry or not self.creds.refresh_token:
+                return False
+            # google-auth guarda expiry como datetime naive en UTC
+            remaining = (expiry - datetime.datetime.utcnow()).total_seconds()
+            if remaining > margin_seconds:
+                return False
+            print(f"El token vence en {remaining:.0f}s; refrescando de forma proactiva...")
+            self.creds.refresh(Request())
+            with open(self.token_file, 'w') as token:
+                token.write(self.creds.to_json())
+            return True
+
     def list_available_calendars(self, force_refresh=False):
         """
         Obtiene y retorna la lista de todos los calendarios accesibles por la cuenta autenticada.
@@ -67,7 +242,7 @@ class GoogleCalendar:
         # --- End Change ---
         try:
             print("Obteniendo lista de calendarios desde la API...")
-            calendar_list_result = self.service.calendarList().list().execute()
+            calendar_list_result = self._execute(self.service.calendarList().list(), "calendarList.list")
             calendars = calendar_list_result.get('items', [])
             # --- Change: Update cache ---
             self._calendars_cache = calendars
@@ -91,6 +266,85 @@ class GoogleCalendar:
         return None
     # --- End Change ---
 
+    def resolve_calendar_id(self, calendar_target):
+        """
+        Traduce un nombre (summary) de calendario a su ID. Si el target ya parece
+        un ID (heurística simple: contiene '@' o '.') se retorna tal cual.
+        Retorna None si no se encuentra el calendario.
+        """
+        if '@' in calendar_target or '.' in calendar_target:
+            return calendar_target
+        return self.get_calendar_id_by_summary(calendar_target)
+
+    def _execute(self, request, description="API", http=None):
+        """
+        Ejecuta una petición de la API con la política de reintentos del cliente
+        (backoff exponencial con jitter, Retry-After y presupuesto total).
+
+        Parámetros:
+           request: HttpRequest de googleapiclient.
+           description (str): Nombre de la llamada para los logs.
+           http (opcional): Cliente HTTP a usar; por defecto el del hilo actual.
+        """
+        return call_with_retry(
+            lambda timeout: request.execute(http=http or self._thread_http()),
+            self.retry_policy, _is_transient_error, _retry_after,
+            client="calendar", description=f"Calendar {description}",
+        )
+
+    def _execute_batch(self, requests, batch_size=BATCH_SIZE, retry_items=True):
+        """
+        Ejecuta una lista de peticiones de la API agrupándolas en peticiones batch
+        de hasta batch_size llamadas cada una. Cada petición batch se reintenta con la
+        política del cliente si falla completa; con retry_items, las llamadas individuales
+        que fallan por rate limit o errores transitorios se reenvían en rondas sucesivas
+        con el mismo backoff.
+
+        Parámetros:
+           requests: Lista de tuplas (request_id, HttpRequest). Los request_id deben ser únicos.
+           batch_size (int): Máximo de llamadas por petición batch. Default BATCH_SIZE.
+           retry_items (bool): Reintentar las llamadas individuales transitorias. Default True.
+
+        Retorna:
+           Un diccionario {request_id: (respuesta, excepción)}; uno de los dos es None.
+        """
+        results = {}
+
+        def _callback(request_id, response, exception):
+            results[request_id] = (response, exception)
+
+        pending = list(requests)
+        deadline = time.monotonic() + self.retry_policy.total_budget
+        for round_number in range(1, self.retry_policy.max_attempts + 1):
+            for start in range(0, len(pending), batch_size):
+                chunk = pending[start:start + batch_size]
+                batch = self.service.new_batch_http_request(callback=_callback)
+                for request_id, request in chunk:
+                    batch.add(request, request_id=request_id)
+                try:
+                    self._execute(batch, "batch")
+                except Exception as e:
+                    # Falla la petición batch completa (red, auth...): todas sus llamadas fallan
+                    print(f"Error al ejecutar petición batch: {e}")
+                    for request_id, _ in chunk:
+                        results[request_id] = (None, e)
+
+            if not retry_items or round_number == self.retry_policy.max_attempts:
+                break
+            pending = [(request_id, request) for request_id, request in pending
+                       if results.get(request_id, (None, None))[1] is not None
+                       and _is_retryable_error(results[request_id][1])]
+            if not pending:
+                break
+            delay = max([self.retry_policy.backoff(round_number)]
+                        + [_retry_after(results[request_id][1]) or 0 for request_id, _ in pending])
+            if time.monotonic() + delay >= deadline:
+                break
+            print(f"Reintentando {len(pending)} llamadas del batch en {delay:.1f}s (ronda {round_number + 1})...")
+            metrics.registry.inc("retries_total", len(pending), help_text="Retried API calls by client.", client="calendar")
+            time.sleep(delay)
+        return results
+
     def buscar_eventos(self, fecha_inicio, fecha_fin):
         """
         Busca eventos en el calendario primario (original) para el rango de fechas especificado y 
@@ -114,15 +368,9 @@ class GoogleCalendar:
         time_min = datetime.datetime(start_date.year, start_date.month, start_date.day, 0, 0, 0).isoformat() + 'Z'
         time_max = datetime.datetime(end_date.year, end_date.month, end_date.day, 23, 59, 59).isoformat() + 'Z'
         
-        events_result = self.service.events().list(
-            calendarId='primary',
-            timeMin=time_min,
-            timeMax=time_max,
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
-        events = events_result.get('items', [])
-        
+        # Los eventos llegan página a página; se agrupan a medida que van llegando
+        events = self.iter_events('primary', time_min, time_max, orderBy='startTime')
+
         eventos_por_dia = {}
         for event in events:
             start_str = event['start'].get('dateTime', event['start'].get('date'))
@@ -148,10 +396,20 @@ class GoogleCalendar:
         
         return eventos_por_dia
 
-    def buscar_eventos_todos(self, fecha_inicio, fecha_fin, filter_summaries=None):
+    def buscar_eventos_todos(self, fecha_inicio, fecha_fin, filter_summaries=None, max_workers=DEFAULT_FETCH_WORKERS):
         """
         Busca eventos en los calendarios especificados, filtrando por estado 'accepted'
         si es una invitación, y retorna un diccionario agrupado por días.
+
+        Los calendarios se consultan en paralelo (hasta max_workers a la vez) y las
+        listas de cada calendario, que la API ya entrega ordenadas por inicio, se
+        combinan con un k-way merge en vez de reordenar cada día.
+
+        Parámetros:
+           fecha_inicio: String en formato 'YYYY-MM-DD' indicando el inicio del rango.
+           fecha_fin: String en formato 'YYYY-MM-DD' indicando el fin del rango.
+           filter_summaries (list, opcional): Nombres de los calendarios a consultar.
+           max_workers (int): Máximo de calendarios consultados a la vez. 1 = consulta secuencial.
         """
         # Convertir las cadenas de fecha a objetos datetime
         start_date = datetime.datetime.strptime(fecha_inicio, '%Y-%m-%d')
@@ -160,11 +418,139 @@ class GoogleCalendar:
         time_min = datetime.datetime(start_date.year, start_date.month, start_date.day, 0, 0, 0).isoformat() + 'Z'
         time_max = datetime.datetime(end_date.year, end_date.month, end_date.day, 23, 59, 59).isoformat() + 'Z'
         
+        calendars_to_search = self._select_calendars(filter_summaries)
+
+        def _fetch(calendar):
+            try:
+                return self._fetch_calendar_events(calendar, time_min, time_max)
+            except Exception as e:
+                # En ocasiones puede haber errores con algún calendario; se pueden omitir o manejar según convenga
+                print(f"Error al obtener eventos del calendario {calendar.get('id')}: {e}")
+                return []
+
+        streams = self._map_calendars(_fetch, calendars_to_search, max_workers)
+        return self._merge_events_by_day(streams)
+
+    def buscar_eventos_sincronizados(self, fecha_inicio, fecha_fin, filter_summaries=None, max_workers=DEFAULT_FETCH_WORKERS):
+        """
+        Igual que buscar_eventos_todos, pero leyendo desde el almacén local de eventos.
+        Antes de leer, cada calendario se sincroniza de forma incremental con su
+        syncToken, por lo que en llamadas repetidas solo se descarga una petición de
+        cambios por calendario. Si la sincronización de un calendario falla, se usan
+        los datos que ya estaban guardados.
+
+        Retorna:
+           Un diccionario {'YYYY-MM-DD': [ {evento1}, {evento2}, ... ]} con el mismo formato
+           que buscar_eventos_todos.
+        """
+        calendars_to_search = self._select_calendars(filter_summaries)
+
+        def _sync_and_read(calendar):
+            calendar_id = calendar.get('id')
+            try:
+                self.sync_calendar(calendar_id, until=fecha_fin)
+            except Exception as e:
+                print(f"Error al sincronizar el calendario {calendar_id}, usando datos locales: {e}")
+            return [
+                _evento_info(event, calendar_id, calendar.get('summary'))
+                for event in self.event_store.events_in_range(calendar_id, fecha_inicio, fecha_fin)
+                if _is_accepted_or_own(event)
+            ]
+
+        streams = self._map_calendars(_sync_and_read, calendars_to_search, max_workers)
+        return self._merge_events_by_day(streams)
+
+    def sync_calendar(self, calendar_id, until=None):
+        """
+        Sincroniza un calendario con el almacén local. Si hay un syncToken guardado
+        solo se piden los cambios desde la última sincronización; si no lo hay, si
+        la API responde 410 Gone (token expirado) o si `until` queda más allá de lo que
+        cubrió la última sincronización completa, se hace una sincronización completa
+        desde SYNC_LOOKBACK_DAYS días atrás hasta SYNC_HORIZON_DAYS días adelante
+        (o hasta `until`, si es posterior).
+
+        Parámetros:
+           calendar_id (str): ID del calendario.
+           until (str, opcional): Último día ('YYYY-MM-DD') que se va a leer del almacén.
+
+        Retorna:
+           int: Número de eventos cambiados (insertados, actualizados o borrados).
+        """
+        sync_token = self.event_store.get_sync_token(calendar_id)
+        if sync_token and until is not None:
+            synced_until = self.event_store.get_synced_until(calendar_id)
+            # Los eventos que ya existían más allá del horizonte no llegan en los deltas
+            if synced_until is None or until >= synced_until:
+                print(f"El almacén de {calendar_id} no cubre hasta {until}. Sincronización completa...")
+                sync_token = None
+        if sync_token:
+            try:
+                return self._sync_pages(calendar_id, sync_token)
+            except Exception as e:
+                if _http_status(e) != 410:
+                    raise
+                print(f"Sync token expirado para {calendar_id} (410 Gone). Sincronización completa...")
+        return self._sync_pages(calendar_id, None, until=until)
+
+    def _sync_pages(self, calendar_id, sync_token, until=None):
+        """Descarga todas las páginas de una sincronización (delta o completa) y las guarda."""
+        synced_until = None
+        if sync_token:
+            pages = self.iter_event_pages(calendar_id, syncToken=sync_token)
+        else:
+            # La sincronización completa no necesita la historia entera del calendario
+            # ni las repeticiones de las series recurrentes en años futuros
+            now = datetime.datetime.utcnow().replace(microsecond=0)
+            since = now - datetime.timedelta(days=SYNC_LOOKBACK_DAYS)
+            horizon = now.date() + datetime.timedelta(days=SYNC_HORIZON_DAYS)
+            if until is not None:
+                horizon = max(horizon, datetime.datetime.strptime(until, '%Y-%m-%d').date() + datetime.timedelta(days=1))
+            synced_until = horizon.isoformat()
+            # Un día de margen: el almacén indexa por la fecha local del inicio y timeMax va en UTC
+            time_max = datetime.datetime.combine(horizon + datetime.timedelta(days=1), datetime.time())
+            pages = self.iter_event_pages(calendar_id, time_min=since.isoformat() + 'Z',
+                                          time_max=time_max.isoformat() + 'Z')
+
+        upserts, deleted_ids = [], []
+        next_sync_token = None
+        for page in pages:
+            for event in page.get('items', []):
+                if event.get('status') == 'cancelled':
+                    deleted_ids.append(event['id'])
+                else:
+                    upserts.append(event)
+            # Solo la última página trae nextSyncToken
+            next_sync_token = page.get('nextSyncToken', next_sync_token)
+
+        self.event_store.apply_changes(
+            calendar_id, upserts, deleted_ids,
+            sync_token=next_sync_token,
+            full_resync=sync_token is None,
+            synced_until=synced_until
+        )
+        return len(upserts) + len(deleted_ids)
+
+    @property
+    def event_store(self):
+        """Almacén local de eventos, creado al usarse por primera vez."""
+        if self._event_store is None:
+            self._event_store = EventStore(self.event_store_path)
+        return self._event_store
+
+    def close(self):
+        """Cierra la conexión del almacén local de eventos, si llegó a abrirse."""
+        if self._event_store is not None:
+            self._event_store.close()
+            self._event_store = None
+
+    def _select_calendars(self, filter_summaries=None):
+        """Retorna los calendarios disponibles, filtrados por nombre si se indica filter_summaries."""
         # Obtener la lista de calendarios disponibles usando el nuevo método
         all_calendars = self.list_available_calendars() # Usa el método interno
 
         # --- Change: Filter calendars if filter_summaries is provided ---
-        if filter_summaries:
+        # Una lista vacía no selecciona ningún calendario (solo None significa todos)
+        if filter_summaries is not None:
             calendars_to_search = [
                 cal for cal in all_calendars if cal.get('summary') in filter_summaries
             ]
@@ -173,82 +559,105 @@ class GoogleCalendar:
             calendars_to_search = all_calendars
             print("No se especificó filtro, buscando en todos los calendarios.")
         # --- End Change ---
+        return calendars_to_search
 
-        eventos_por_dia = {}
-        
-        # Iterar sobre cada calendario filtrado
-        # --- Change: Iterate over calendars_to_search ---
-        for calendar in calendars_to_search:
-        # --- End Change ---
-            calendar_id = calendar.get('id')
-            calendar_summary = calendar.get('summary')
-            try:
-                events_result = self.service.events().list(
-                    calendarId=calendar_id,
-                    timeMin=time_min,
-                    timeMax=time_max,
-                    singleEvents=True,
-                    orderBy='startTime'
-                ).execute()
-            except Exception as e:
-                # En ocasiones puede haber errores con algún calendario; se pueden omitir o manejar según convenga
-                print(f"Error al obtener eventos del calendario {calendar_id}: {e}")
-                continue
-
-            events = events_result.get('items', [])
-            for event in events:
-                # --- Change: Filter by attendee status ---
-                include_event = True # Default to include
-                attendees = event.get('attendees', [])
-                user_status = None
-                is_invitation_for_user = False
-
-                for attendee in attendees:
-                    if attendee.get('self'): # Check if this attendee is the user
-                        is_invitation_for_user = True
-                        user_status = attendee.get('responseStatus')
-                        break # Found the user's status
-
-                # If it's an invitation for the user, only include if accepted
-                if is_invitation_for_user and user_status != 'accepted':
-                    include_event = False
-                    # Optional logging for skipped events:
-                    # print(f"Skipping event '{event.get('summary')}' (status: {user_status})")
-
-                if not include_event:
-                    continue # Skip this event and go to the next one
-                # --- End Change ---
+    @staticmethod
+    def _map_calendars(func, calendars, max_workers):
+        """Aplica func a cada calendario, en paralelo si max_workers > 1, preservando el orden."""
+        if max_workers and max_workers > 1 and len(calendars) > 1:
+            workers = min(max_workers, len(calendars))
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                # map() preserva el orden de los calendarios, lo que mantiene estable el merge
+                return list(executor.map(func, calendars))
+        return [func(calendar) for calendar in calendars]
 
-                # --- Process event only if include_event is True ---
-                start_str = event['start'].get('dateTime', event['start'].get('date'))
-                event_date = start_str.split('T')[0] if 'T' in start_str else start_str
-
-                evento_info = {
-                    'calendar_id': calendar_id,
-                    'calendar_summary': calendar_summary,
-                    'id': event.get('id'),
-                    'summary': event.get('summary'),
-                    'description': event.get('description'),
-                    'start': event.get('start'),
-                    'end': event.get('end'),
-                    'location': event.get('location'),
-                    # Attendees might still be useful for the formatter, keep it for now
-                    'attendees': event.get('attendees'),
-                    'htmlLink': event.get('htmlLink')
-                }
-
-                if event_date in eventos_por_dia:
-                    eventos_por_dia[event_date].append(evento_info)
-                else:
-                    eventos_por_dia[event_date] = [evento_info]
-                # --- End event processing ---
-        
-        # Ordenar la lista de eventos de cada día por la hora de inicio
-        for dia, lista_eventos in eventos_por_dia.items():
-            lista_eventos.sort(key=lambda ev: ev['start'].get('dateTime', ev['start'].get('date')))
-        
+    def _fetch_calendar_events(self, calendar, time_min, time_max):
+        """
+        Descarga los eventos de un calendario en el rango dado y los retorna como una
+        lista de evento_info, en el orden cronológico entregado por la API. Se omiten
+        las invitaciones que el usuario no ha aceptado.
+        """
+        calendar_id = calendar.get('id')
+        calendar_summary = calendar.get('summary')
+        return [
+            _evento_info(event, calendar_id, calendar_summary)
+            for event in self.iter_events(calendar_id, time_min, time_max, orderBy='startTime')
+            if _is_accepted_or_own(event)
+        ]
+
+    def iter_event_pages(self, calendar_id, time_min=None, time_max=None, fields=EVENT_LIST_FIELDS,
+                         max_results=MAX_RESULTS_PER_PAGE, http=None, **params):
+        """
+        Generador que recorre todas las páginas (nextPageToken) de events().list para
+        un calendario, pidiendo solo los campos indicados en la máscara fields.
+
+        Parámetros:
+           calendar_id (str): ID del calendario.
+           time_min, time_max (str, opcional): Límites RFC3339 del rango.
+           fields (str): Máscara de campos de la respuesta. None = recurso completo.
+           max_results (int): Eventos por página (la API permite hasta 2500).
+           http (opcional): Cliente HTTP a usar; por defecto el del hilo actual.
+           **params: Parámetros adicionales de events().list (orderBy, syncToken, ...).
+
+        Yields:
+           dict: Cada página de la respuesta, con 'items', 'nextPageToken' y 'nextSyncToken'.
+        """
+        params = dict(params, calendarId=calendar_id, singleEvents=True, maxResults=max_results)
+        if time_min:
+            params['timeMin'] = time_min
+        if time_max:
+            params['timeMax'] = time_max
+        if fields:
+            params['fields'] = fields
+
+        page_token = None
+        while True:
+            page = self._execute(
+                self.service.events().list(pageToken=page_token, **params), "events.list", http=http
+            )
+            yield page
+            page_token = page.get('nextPageToken')
+            if not page_token:
+                break
+
+    def iter_events(self, calendar_id, time_min=None, time_max=None, fields=EVENT_LIST_FIELDS,
+                    max_results=MAX_RESULTS_PER_PAGE, **params):
+        """
+        Generador de eventos de un calendario que sigue la paginación de forma perezosa:
+        el llamador puede procesar los primeros eventos antes de que llegue la última página.
+        Acepta los mismos parámetros que iter_event_pages().
+        """
+        for page in self.iter_event_pages(calendar_id, time_min, time_max, fields=fields,
+                                          max_results=max_results, **params):
+            yield from page.get('items', [])
+
+    @staticmethod
+    def _merge_events_by_day(streams):
+        """
+        Combina listas de eventos ya ordenadas por inicio (una por calendario) en un
+        diccionario {'YYYY-MM-DD': [eventos]} usando un k-way merge (heapq.merge).
+        Como el flujo combinado ya está ordenado, los días quedan ordenados sin sort.
+        """
+        eventos_por_dia = {}
+        for evento_info in heapq.merge(*streams, key=_event_start_key):
+            start_str = _event_start_key(evento_info)
+            event_date = start_str.split('T')[0] if 'T' in start_str else start_str
+            eventos_por_dia.setdefault(event_date, []).append(evento_info)
         return eventos_por_dia
 
+    def _thread_http(self):
+        """
+        Retorna un cliente HTTP autorizado propio del hilo actual. httplib2 no es
+        thread-safe, así que cada hilo que ejecuta peticiones necesita el suyo.
+        """
+        if self._http is not None:
+            return self._http
+        http = getattr(self._thread_local, 'http', None)
+        if http is None:
+            http = AuthorizedHttp(self.creds, http=httplib2.Http(timeout=self.retry_policy.attempt_timeout))
+            self._thread_local.http = http
+        return http
+
     # --- Change: Modify create_event default and logic ---
     def create_event(self, summary, start_datetime, end_datetime, description=None, location=None, calendar_target='PersonalCoach'):
         """
@@ -263,16 +672,43 @@ class GoogleCalendar:
            location (str, opcional): Ubicación del evento.
            calendar_target (str): Nombre (summary) o ID del calendario. Default 'PersonalCoach'.
         """
-        target_id = calendar_target
-        # Si el target parece un nombre y no un ID (heurística simple: contiene '@' o '.'), buscar ID
-        if '@' not in calendar_target and '.' not in calendar_target:
-             found_id = self.get_calendar_id_by_summary(calendar_target)
-             if found_id:
-                 target_id = found_id
-             else:
-                 print(f"No se pudo encontrar el ID para el calendario '{calendar_target}'. Usando 'primary' como fallback.")
-                 target_id = 'primary' # Fallback a primario si no se encuentra
+        target_id = self.resolve_calendar_id(calendar_target)
+        if not target_id:
+            print(f"No se pudo encontrar el ID para el calendario '{calendar_target}'. Usando 'primary' como fallback.")
+            target_id = 'primary' # Fallback a primario si no se encuentra
+
+        event_body = self.build_event_body(summary, start_datetime, end_datetime, description, location)
+        event_body['id'] = _new_event_ids(1)[0]
 
+        try:
+            print(f"Intentando crear evento: '{summary}' en calendario ID: '{target_id}' (Target: '{calendar_target}')")
+            try:
+                created_event = self._execute(self.service.events().insert(calendarId=target_id, body=event_body), "events.insert")
+            except Exception as e:
+                if not _is_conflict_error(e):
+                    raise
+                # Un intento anterior que pareció fallar (timeout, 5xx) ya creó el evento
+                created_event = self._execute(self.service.events().get(calendarId=target_id, eventId=event_body['id']), "events.get")
+            print(f"Evento creado exitosamente! ID: {created_event.get('id')}")
+            print(f"Link: {created_event.get('htmlLink')}")
+            return created_event
+        except Exception as e:
+            print(f"Error al crear el evento: {e}")
+            return None
+    # --- End Change ---
+
+    @staticmethod
+    def build_event_body(summary, start_datetime, end_datetime, description=None, location=None):
+        """
+        Construye el cuerpo (resource) de un evento para la API de Calendar.
+
+        Parámetros:
+           summary (str): Título del evento.
+           start_datetime (datetime.datetime): Inicio del evento (idealmente con timezone).
+           end_datetime (datetime.datetime): Fin del evento (idealmente con timezone).
+           description (str, opcional): Descripción del evento.
+           location (str, opcional): Ubicación del evento.
+        """
         # Por simplicidad, aquí asumiremos que los datetimes ya vienen con timezone
         # o la API usará la timezone por defecto del calendario.
         # Es MUY recomendable manejar timezones explícitamente en producción.
@@ -301,18 +737,181 @@ class GoogleCalendar:
             #     ],
             # },
         }
+        return event_body
 
-        try:
-            print(f"Intentando crear evento: '{summary}' en calendario ID: '{target_id}' (Target: '{calendar_target}')")
-            created_event = self.service.events().insert(calendarId=target_id, body=event_body).execute()
-            print(f"Evento creado exitosamente! ID: {created_event.get('id')}")
-            print(f"Link: {created_event.get('htmlLink')}")
-            return created_event
-        except Exception as e:
-            print(f"Error al crear el evento: {e}")
-            return None
+    def create_events_batch(self, event_bodies, calendar_target='PersonalCoach'):
+        """
+        Crea varios eventos en el calendario especificado usando peticiones batch
+        (una petición HTTP por cada BATCH_SIZE eventos en vez de una por evento).
+        Los cuerpos sin 'id' reciben uno generado por el cliente, así que los reintentos
+        no crean duplicados; un 409 (evento ya creado por un intento anterior) es éxito.
+
+        Parámetros:
+           event_bodies (list): Cuerpos de evento, por ejemplo construidos con build_event_body().
+           calendar_target (str): Nombre (summary) o ID del calendario. Default 'PersonalCoach'.
+
+        Retorna:
+           Una lista con un resultado por evento, en el mismo orden de event_bodies:
+             [ {'index': 0, 'summary': ..., 'event': {evento creado} o None, 'error': str o None}, ... ]
+        """
+        if not event_bodies:
+            return []
+
+        target_id = self.resolve_calendar_id(calendar_target)
+        if not target_id:
+            print(f"No se pudo encontrar el ID para el calendario '{calendar_target}'. Usando 'primary' como fallback.")
+            target_id = 'primary'
+
+        print(f"Creando {len(event_bodies)} eventos en calendario ID: '{target_id}' (Target: '{calendar_target}') mediante batch...")
+        # Con IDs fijados por el cliente, los reintentos (del batch completo o de llamadas
+        # sueltas) no duplican eventos: la inserción ya aplicada responde 409
+        event_bodies = [body if body.get('id') else dict(body, id=event_id)
+                        for body, event_id in zip(event_bodies, _new_event_ids(len(event_bodies)))]
+        requests = [
+            (str(index), self.service.events().insert(calendarId=target_id, body=body))
+            for index, body in enumerate(event_bodies)
+        ]
+        responses = self._execute_batch(requests)
+
+        conflicts = [index for index in range(len(event_bodies))
+                     if _is_conflict_error(responses.get(str(index), (None, None))[1])]
+        if conflicts:
+            # Ya creados por un intento anterior: se leen para retornar el evento como si se hubiera creado ahora
+            existing = self._execute_batch([
+                (str(index), self.service.events().get(calendarId=target_id, eventId=event_bodies[index]['id']))
+                for index in conflicts
+            ])
+            for index in conflicts:
+                event, exception = existing.get(str(index), (None, None))
+                responses[str(index)] = (event or dict(event_bodies[index]), None)
+
+        results = []
+        for index, body in enumerate(event_bodies):
+            created_event, exception = responses.get(str(index), (None, None))
+            error = None
+            if exception is not None:
+                error = str(exception)
+            elif created_event is None:
+                error = "Sin respuesta de la API para este evento."
+            results.append({
+                'index': index,
+                'summary': body.get('summary'),
+                'event': created_event,
+                'error': error,
+            })
+
+        failed = [r for r in results if r['error']]
+        print(f"Eventos creados: {len(results) - len(failed)}/{len(results)}")
+        for r in failed:
+            print(f"  Error al crear evento '{r['summary']}': {r['error']}")
+        return results
     # --- End Change ---
 
+    def patch_events_batch(self, patches, calendar_id):
+        """
+        Actualiza parcialmente (PATCH) varios eventos usando peticiones batch.
+
+        Parámetros:
+           patches (list): Tuplas (event_id, cuerpo parcial) con solo los campos a cambiar.
+           calendar_id (str): ID del calendario (no el nombre).
+
+        Retorna:
+           Una lista con un resultado por evento, en el mismo orden de patches:
+             [ {'id': ..., 'summary': ..., 'event': {evento actualizado} o None, 'error': str o None}, ... ]
+        """
+        if not patches:
+            return []
+
+        print(f"Actualizando {len(patches)} eventos en calendario ID: '{calendar_id}' mediante batch...")
+        requests = [
+            (str(index), self.service.events().patch(calendarId=calendar_id, eventId=event_id, body=body))
+            for index, (event_id, body) in enumerate(patches)
+        ]
+        responses = self._execute_batch(requests)
+
+        results = []
+        for index, (event_id, body) in enumerate(patches):
+            updated_event, exception = responses.get(str(index), (None, None))
+            error = None
+            if exception is not None:
+                error = str(exception)
+            elif updated_event is None:
+                error = "Sin respuesta de la API para este evento."
+            results.append({
+                'id': event_id,
+                'summary': (updated_event or {}).get('summary', body.get('summary')),
+                'event': updated_event,
+                'error': error,
+            })
+
+        failed = [r for r in results if r['error']]
+        print(f"Eventos actualizados: {len(results) - len(failed)}/{len(results)}")
+        for r in failed:
+            print(f"  Error al actualizar evento ID {r['id']}: {r['error']}")
+        return results
+
+    def delete_events_batch(self, event_ids, calendar_id, max_attempts=DELETE_MAX_ATTEMPTS):
+        """
+        Borra eventos por ID usando peticiones batch. Las llamadas que fallan por
+        rate limit o errores transitorios (429, 403 rateLimitExceeded, 5xx) se reintentan
+        en rondas sucesivas con backoff adaptativo: si hubo rate limit, la pausa se
+        duplica y el tamaño del batch se reduce a la mitad.
+
+        Parámetros:
+           event_ids (list): IDs de los eventos a borrar.
+           calendar_id (str): ID del calendario (no el nombre).
+           max_attempts (int): Número máximo de rondas. Default DELETE_MAX_ATTEMPTS.
+
+        Retorna:
+           Un diccionario con la estructura:
+             {
+               'deleted': [id, ...],                      # borrados (o que ya no existían)
+               'failed': [ {'id': id, 'error': str}, ... ],
+               'retried': [id, ...]                       # necesitaron al menos un reintento
+             }
+        """
+        result = {'deleted': [], 'failed': [], 'retried': []}
+        pending = list(dict.fromkeys(event_ids))  # sin duplicados, preservando el orden
+        retried = set()
+        batch_size = BATCH_SIZE
+        delay = DELETE_BACKOFF_SECONDS
+
+        for attempt in range(1, max_attempts + 1):
+            if not pending:
+                break
+            requests = [
+                (event_id, self.service.events().delete(calendarId=calendar_id, eventId=event_id))
+                for event_id in pending
+            ]
+            # Este método hace sus propias rondas (con batch adaptativo), sin las de _execute_batch
+            responses = self._execute_batch(requests, batch_size=batch_size, retry_items=False)
+
+            to_retry = []
+            rate_limited = False
+            for event_id in pending:
+                _, exception = responses.get(event_id, (None, None))
+                if exception is None or _http_status(exception) in (404, 410):
+                    # 404/410: el evento ya no existe, el objetivo del borrado se cumple
+                    result['deleted'].append(event_id)
+                elif _is_retryable_error(exception) and attempt < max_attempts:
+                    rate_limited = rate_limited or _is_rate_limit_error(exception)
+                    to_retry.append(event_id)
+                else:
+                    result['failed'].append({'id': event_id, 'error': str(exception)})
+
+            pending = to_retry
+            if pending:
+                retried.update(pending)
+                if rate_limited:
+                    batch_size = max(1, batch_size // 2)
+                print(f"Reintentando {len(pending)} borrados en {delay:.1f}s "
+                      f"(ronda {attempt + 1}/{max_attempts}, batch de {batch_size})...")
+                time.sleep(delay)
+                delay = delay * 2 if rate_limited else delay
+
+        result['retried'] = [event_id for event_id in event_ids if event_id in retried]
+        return result
+
     # --- Change: Add method to delete events ---
     def delete_events_in_range(self, start_date_str, end_date_str, calendar_target='PersonalCoach', summary_prefix_filter=None, skip_confirmation=False):
         """
@@ -329,16 +928,14 @@ class GoogleCalendar:
            skip_confirmation (bool, opcional): Si es True, no pedirá confirmación interactiva al borrar sin filtro.
 
         Returns:
-            int: El número de eventos borrados.
+            dict: Resultado estructurado de delete_events_batch(), con las listas
+                  'deleted', 'failed' y 'retried'. Todas vacías si no se borró nada.
         """
-        target_id = calendar_target
-        if '@' not in calendar_target and '.' not in calendar_target:
-             found_id = self.get_calendar_id_by_summary(calendar_target)
-             if found_id:
-                 target_id = found_id
-             else:
-                 print(f"No se pudo encontrar el ID para el calendario '{calendar_target}' para borrar eventos. Abortando borrado.")
-                 return 0 # No se borró nada
+        empty_result = {'deleted': [], 'failed': [], 'retried': []}
+        target_id = self.resolve_calendar_id(calendar_target)
+        if not target_id:
+            print(f"No se pudo encontrar el ID para el calendario '{calendar_target}' para borrar eventos. Abortando borrado.")
+            return empty_result # No se borró nada
 
         print(f"Buscando eventos para borrar en '{calendar_target}' (ID: {target_id}) entre {start_date_str} y {end_date_str}")
         if summary_prefix_filter:
@@ -355,36 +952,20 @@ class GoogleCalendar:
             time_max = datetime.datetime(end_dt.year, end_dt.month, end_dt.day, 23, 59, 59).isoformat() + 'Z'
 
             events_to_delete = []
-            page_token = None
-            while True:
-                events_result = self.service.events().list(
-                    calendarId=target_id,
-                    timeMin=time_min,
-                    timeMax=time_max,
-                    singleEvents=True,
-                    pageToken=page_token
-                ).execute()
-                events = events_result.get('items', [])
-
-                for event in events:
-                    # --- Change: Append all events if no filter ---
-                    if summary_prefix_filter:
-                        summary = event.get('summary', '')
-                        if summary.startswith(summary_prefix_filter):
-                            events_to_delete.append(event)
-                    else:
-                        # Si no hay filtro, añadir todos para borrar
+            for event in self.iter_events(target_id, time_min, time_max, fields=DELETE_LIST_FIELDS):
+                # --- Change: Append all events if no filter ---
+                if summary_prefix_filter:
+                    summary = event.get('summary', '')
+                    if summary.startswith(summary_prefix_filter):
                         events_to_delete.append(event)
-                    # --- End Change ---
-
-                page_token = events_result.get('nextPageToken')
-                if not page_token:
-                    break
+                else:
+                    # Si no hay filtro, añadir todos para borrar
+                    events_to_delete.append(event)
+                # --- End Change ---
 
-            deleted_count = 0
             if not events_to_delete:
                 print("No se encontraron eventos que coincidan para borrar.")
-                return 0
+                return empty_result
 
             print(f"Se encontraron {len(events_to_delete)} eventos para borrar:")
             for event in events_to_delete:
@@ -396,29 +977,25 @@ class GoogleCalendar:
                      confirm = input("¡CONFIRMACIÓN ADICIONAL! ¿Realmente quieres borrar TODOS estos eventos? (s/N): ")
                      if confirm.lower() != 's':
                          print("Borrado cancelado por el usuario.")
-                         return 0
+                         return empty_result
                  except EOFError:
                       # Si no hay terminal interactiva (ej. corriendo bajo Uvicorn sin tty)
                       print("No se puede pedir confirmación interactiva. Abortando borrado por seguridad.")
-                      return 0
+                      return empty_result
             # --- End Change ---
 
-            print("Borrando eventos...")
-            for event in events_to_delete:
-                try:
-                    self.service.events().delete(calendarId=target_id, eventId=event['id']).execute()
-                    print(f"  Evento '{event.get('summary')}' (ID: {event['id']}) borrado.")
-                    deleted_count += 1
-                    # time.sleep(0.1) # Pequeña pausa para evitar rate limits si son muchos eventos
-                except Exception as e:
-                    print(f"  Error al borrar evento ID {event.get('id')}: {e}")
+            print("Borrando eventos (batch)...")
+            result = self.delete_events_batch([event['id'] for event in events_to_delete], target_id)
+            for failure in result['failed']:
+                print(f"  Error al borrar evento ID {failure['id']}: {failure['error']}")
 
-            print(f"Total de eventos borrados: {deleted_count}")
-            return deleted_count
+            print(f"Total de eventos borrados: {len(result['deleted'])} "
+                  f"(fallidos: {len(result['failed'])}, reintentados: {len(result['retried'])})")
+            return result
 
         except Exception as e:
             print(f"Error durante el proceso de borrado de eventos: {e}")
-            return 0
+            return empty_result
     # --- End Change ---
 
 # Ejemplo de uso:
@@ -510,7 +1087,7 @@ if __name__ == '__main__':
         end_date_str = next_sunday.strftime('%Y-%m-%d')
 
         # Borrar eventos en la próxima semana que comiencen con el prefijo del evento de prueba
-        deleted_count = gc.delete_events_in_range(
+        delete_result = gc.delete_events_in_range(
             start_date_str=start_date_str,
             end_date_str=end_date_str,
             calendar_target='PersonalCoach',
@@ -518,7 +1095,7 @@ if __name__ == '__main__':
             skip_confirmation=False # No saltar confirmación al ejecutar directamente
             # summary_prefix_filter="[PLAN]" # Ejemplo para borrar eventos planificados
         )
-        print(f"Proceso de borrado completado. Eventos borrados: {deleted_count}")
+        print(f"Proceso de borrado completado. Eventos borrados: {len(delete_result['deleted'])}")
 
     except Exception as e:
         print(f"Error durante el borrado de eventos de prueba: {e}")
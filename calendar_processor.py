@@ -1,11 +1,32 @@
 import logging
 import datetime
+import os
+from dotenv import load_dotenv
 from calendar_google import GoogleCalendar # Asume que calendar_google.py está accesible
 from gpt import GPTClient # Asume que gpt.py está accesible
+from clients import get_google_calendar, get_gpt_client
+from schedule_schema import DIAS_SEMANA
+from metrics import track_run
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Modos de formateo del calendario: 'local' lo renderiza en Python, 'llm' lo delega al
+# asistente calendar_formatter. Se elige por parámetro o con CALENDAR_FORMATTER_MODE.
+FORMATTER_MODE_LOCAL = "local"
+FORMATTER_MODE_LLM = "llm"
+FORMATTER_MODES = (FORMATTER_MODE_LOCAL, FORMATTER_MODE_LLM)
+
+# Calendarios (summary) cuyos eventos forman el calendario existente, si no se indican otros
+DEFAULT_CALENDARS_TO_INCLUDE = ["diego.arredondom@gmail.com", "diego.arredondo@cenia.cl"]
+
+# Eventos de todo el día que marcan la ubicación principal (ver asistentes/calendar_formatter.md)
+UBICACIONES_PRINCIPALES = {
+    "Oficina": "Oficina (San Joaquín, Santiago)",
+    "Oficina Rial": "Oficina Rial (Vitacura, Santiago)",
+    "Casa": "Casa (Viña del Mar)",
+}
+
 def format_event_details(event):
     """Formatea los detalles de un evento individual para el prompt de GPT."""
     details = []
@@ -34,12 +55,10 @@ def format_event_details(event):
 def format_calendar_data_for_gpt(events_by_day, start_date, end_date):
     """Convierte el diccionario de eventos en un string formateado para el prompt de GPT."""
     prompt_lines = [f"Eventos de la semana del {start_date.strftime('%Y-%m-%d')} al {end_date.strftime('%Y-%m-%d')}:\n"]
-    dias_semana = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
-
     current_date = start_date
     while current_date <= end_date:
         date_str = current_date.strftime('%Y-%m-%d')
-        day_name = dias_semana[current_date.weekday()]
+        day_name = DIAS_SEMANA[current_date.weekday()]
         prompt_lines.append(f"--- {day_name.upper()} {date_str} ---")
         if date_str in events_by_day and events_by_day[date_str]:
             for event in events_by_day[date_str]:
@@ -51,51 +70,181 @@ def format_calendar_data_for_gpt(events_by_day, start_date, end_date):
 
     return "\n".join(prompt_lines)
 
-def get_formatted_next_week_schedule():
+def _clean_text(text):
+    return text.replace('\n', ' ').replace('\r', '')
+
+def _event_time_label(event):
+    """Retorna "**HH:MM - HH:MM**" para eventos con hora, o "**Todo el día**"."""
+    start_time = event.get('start', {}).get('dateTime')
+    end_time = event.get('end', {}).get('dateTime')
+    if not start_time:
+        return "**Todo el día**"
+    start_dt = datetime.datetime.fromisoformat(start_time)
+    end_dt = datetime.datetime.fromisoformat(end_time) if end_time else start_dt
+    return f"**{start_dt.strftime('%H:%M')} - {end_dt.strftime('%H:%M')}**"
+
+def _is_main_location_event(event):
+    return 'dateTime' not in event.get('start', {}) and event.get('summary', '').strip() in UBICACIONES_PRINCIPALES
+
+def render_schedule_markdown(events_by_day, start_date, end_date):
     """
-    Obtiene los eventos de la próxima semana de calendarios específicos del Google Calendar,
-    y los formatea usando un asistente GPT. Imprime los datos crudos antes del formateo GPT.
+    Renderiza los eventos en el mismo formato Markdown que produce el asistente
+    calendar_formatter, sin llamar a GPT.
+
+    Args:
+        events_by_day (dict): Eventos por fecha 'YYYY-MM-DD', como los retorna `buscar_eventos_todos`.
+        start_date (datetime.date): Primer día a incluir.
+        end_date (datetime.date): Último día a incluir.
 
     Returns:
-        str: El calendario formateado por GPT, o un mensaje de error.
+        str: El calendario formateado, un bloque por día.
+    """
+    blocks = []
+    current_date = start_date
+    while current_date <= end_date:
+        date_str = current_date.strftime('%Y-%m-%d')
+        day_events = events_by_day.get(date_str) or []
+
+        # Ubicación principal: eventos de todo el día "Oficina", "Oficina Rial" o "Casa".
+        # Solo se listan como evento si traen información adicional.
+        main_events = [e for e in day_events if _is_main_location_event(e)]
+        other_events = [e for e in day_events if not _is_main_location_event(e)]
+        listed_events = [e for e in day_events
+                         if not _is_main_location_event(e) or e.get('description') or e.get('location')]
+
+        if main_events:
+            locations = list(dict.fromkeys(UBICACIONES_PRINCIPALES[e['summary'].strip()] for e in main_events))
+        else:
+            locations = list(dict.fromkeys(_clean_text(e['location']) for e in other_events if e.get('location')))
+
+        lines = [
+            f"**{DIAS_SEMANA[current_date.weekday()]} {date_str}**",
+            "",
+            f"*   **Ubicaciones Principales:** {', '.join(locations) if locations else 'No especificadas'}",
+            "*   **Eventos:**",
+        ]
+        for event in listed_events:
+            lines.append(f"    *   {_event_time_label(event)}: {event.get('summary', 'Sin título')}")
+            if event.get('description'):
+                lines.append(f"        *   Descripción: {_clean_text(event['description'])}")
+            if event.get('location'):
+                lines.append(f"        *   Ubicación: {_clean_text(event['location'])}")
+        if not listed_events:
+            lines.append("    *   Sin otros eventos programados." if main_events else "    *   Sin eventos programados.")
+
+        blocks.append("\n".join(lines))
+        current_date += datetime.timedelta(days=1)
+
+    return "\n\n".join(blocks) + "\n"
+
+def resolve_formatter_mode(mode=None):
+    """
+    Retorna el modo de formateo a usar: `mode` si se indica, si no CALENDAR_FORMATTER_MODE,
+    y por defecto 'local'.
+
+    Raises:
+        ValueError: Si el modo no es 'local' ni 'llm'.
+    """
+    if mode is None:
+        load_dotenv()
+    mode = (mode or os.getenv("CALENDAR_FORMATTER_MODE") or FORMATTER_MODE_LOCAL).strip().lower()
+    if mode not in FORMATTER_MODES:
+        raise ValueError(f"Modo de formateo desconocido '{mode}'. Opciones: {', '.join(FORMATTER_MODES)}.")
+    return mode
+
+def get_next_week_events(gc: GoogleCalendar = None, calendars: list = None):
+    """
+    Obtiene los eventos de la próxima semana (Lunes a Domingo) de los calendarios configurados.
+
+    Args:
+        gc (GoogleCalendar, opcional): Cliente a usar. Por defecto, el compartido del proceso.
+        calendars (list, opcional): Nombres (summary) de los calendarios a incluir.
+            Por defecto DEFAULT_CALENDARS_TO_INCLUDE.
+
+    Returns:
+        tuple: (eventos por día, lunes, domingo) de la próxima semana.
+    """
+    # 1. Calcular fechas de la próxima semana (Lunes a Domingo)
+    today = datetime.date.today()
+    days_until_monday = (0 - today.weekday() + 7) % 7
+    if days_until_monday == 0: # Si hoy es lunes, queremos el *próximo* lunes
+         days_until_monday = 7
+    next_monday = today + datetime.timedelta(days_until_monday)
+    next_sunday = next_monday + datetime.timedelta(days=6)
+    start_date_str = next_monday.strftime('%Y-%m-%d')
+    end_date_str = next_sunday.strftime('%Y-%m-%d')
+    logging.info(f"Calculando calendario para la semana: {start_date_str} a {end_date_str}")
+
+    # Una lista vacía no se reemplaza por los calendarios por defecto
+    calendars_to_include = calendars if calendars is not None else DEFAULT_CALENDARS_TO_INCLUDE
+
+    # 2. Obtener eventos del calendario
+    if gc is None:
+        gc = get_google_calendar() # Asume que credentials.json y token.json están configurados
+    logging.info(f"Buscando eventos en Google Calendar para: {', '.join(calendars_to_include)}...")
+    # Lectura desde el almacén local tras una sincronización incremental (una petición de cambios por calendario)
+    events_data = gc.buscar_eventos_sincronizados(start_date_str, end_date_str, filter_summaries=calendars_to_include)
+    logging.info(f"Se encontraron eventos para {len(events_data)} días en el rango para los calendarios especificados.")
+    return events_data, next_monday, next_sunday
+
+def get_next_week_calendar_input(gc: GoogleCalendar = None, calendars: list = None, week_events: tuple = None):
+    """
+    Obtiene los eventos de la próxima semana (Lunes a Domingo) de los calendarios
+    configurados y los convierte al texto de entrada del asistente formateador.
+    Imprime los datos crudos antes del formateo GPT.
+
+    Args:
+        gc (GoogleCalendar, opcional): Cliente a usar. Por defecto, el compartido del proceso.
+        calendars (list, opcional): Calendarios a incluir (ver `get_next_week_events`).
+        week_events (tuple, opcional): Resultado ya obtenido de `get_next_week_events`; si se
+            indica, no se vuelve a consultar el calendario.
+
+    Returns:
+        str: Los eventos de la semana en texto plano, agrupados por día.
+    """
+    events_data, next_monday, next_sunday = week_events or get_next_week_events(gc, calendars)
+
+    # 3. Formatear datos para GPT
+    calendar_prompt_input = format_calendar_data_for_gpt(events_data, next_monday, next_sunday)
+
+    # --- Change: Print raw data before sending to GPT ---
+    print("\n===== DATOS CRUDOS DEL CALENDARIO (PARA GPT) =====")
+    print(calendar_prompt_input)
+    print("=================================================\n")
+    # --- End Change ---
+    return calendar_prompt_input
+
+@track_run("get_formatted_next_week_schedule")
+def get_formatted_next_week_schedule(gc: GoogleCalendar = None, gpt_client: GPTClient = None, mode: str = None,
+                                     calendars: list = None, week_events: tuple = None):
+    """
+    Obtiene los eventos de la próxima semana de calendarios específicos del Google Calendar
+    y los formatea, localmente o usando un asistente GPT. En modo 'llm' imprime los datos
+    crudos antes del formateo GPT.
+
+    Args:
+        gc (GoogleCalendar, opcional): Cliente de Calendar. Por defecto, el compartido del proceso.
+        gpt_client (GPTClient, opcional): Cliente GPT (solo modo 'llm'). Por defecto, el compartido del proceso.
+        mode (str, opcional): 'local' o 'llm'. Por defecto, CALENDAR_FORMATTER_MODE o 'local'.
+        calendars (list, opcional): Calendarios a incluir (ver `get_next_week_events`).
+        week_events (tuple, opcional): Resultado ya obtenido de `get_next_week_events` (ver
+            `get_next_week_calendar_input`).
+
+    Returns:
+        str: El calendario formateado, o un mensaje de error.
     """
     try:
-        # 1. Calcular fechas de la próxima semana (Lunes a Domingo)
-        today = datetime.date.today()
-        days_until_monday = (0 - today.weekday() + 7) % 7
-        if days_until_monday == 0: # Si hoy es lunes, queremos el *próximo* lunes
-             days_until_monday = 7
-        next_monday = today + datetime.timedelta(days_until_monday)
-        next_sunday = next_monday + datetime.timedelta(days=6)
-        start_date_str = next_monday.strftime('%Y-%m-%d')
-        end_date_str = next_sunday.strftime('%Y-%m-%d')
-        logging.info(f"Calculando calendario para la semana: {start_date_str} a {end_date_str}")
-
-        # --- Change: Define calendars to filter ---
-        calendars_to_include = ["diego.arredondom@gmail.com", "diego.arredondo@cenia.cl"]
-        # --- End Change ---
-
-        # 2. Obtener eventos del calendario
-        logging.info("Inicializando Google Calendar...")
-        gc = GoogleCalendar() # Asume que credentials.json y token.json están configurados
-        logging.info(f"Buscando eventos en Google Calendar para: {', '.join(calendars_to_include)}...")
-        # --- Change: Pass filter list to buscar_eventos_todos ---
-        events_data = gc.buscar_eventos_todos(start_date_str, end_date_str, filter_summaries=calendars_to_include)
-        # --- End Change ---
-        logging.info(f"Se encontraron eventos para {len(events_data)} días en el rango para los calendarios especificados.")
-
-        # 3. Formatear datos para GPT
-        calendar_prompt_input = format_calendar_data_for_gpt(events_data, next_monday, next_sunday)
-
-        # --- Change: Print raw data before sending to GPT ---
-        print("\n===== DATOS CRUDOS DEL CALENDARIO (PARA GPT) =====")
-        print(calendar_prompt_input)
-        print("=================================================\n")
-        # --- End Change ---
+        mode = resolve_formatter_mode(mode)
+        if mode == FORMATTER_MODE_LOCAL:
+            events_data, next_monday, next_sunday = week_events or get_next_week_events(gc, calendars)
+            logging.info("Formateando el calendario localmente...")
+            return render_schedule_markdown(events_data, next_monday, next_sunday)
+
+        calendar_prompt_input = get_next_week_calendar_input(gc, calendars, week_events)
 
         # 4. Consultar a GPT para formateo final
-        logging.info("Inicializando GPTClient...")
-        gpt_client = GPTClient()
+        if gpt_client is None:
+            gpt_client = get_gpt_client()
         formatter_assistant = "calendar_formatter"
 
         if formatter_assistant not in gpt_client.assistants:
@@ -116,6 +265,35 @@ def get_formatted_next_week_schedule():
         logging.error(f"Error en el proceso de obtención y formato del calendario: {e}", exc_info=True)
         return f"Error al generar el calendario formateado: {e}"
 
+def stream_formatted_next_week_schedule(gc: GoogleCalendar = None, gpt_client: GPTClient = None, mode: str = None,
+                                        calendars: list = None):
+    """
+    Variante en streaming de `get_formatted_next_week_schedule`: generador que entrega
+    el calendario formateado por fragmentos a medida que GPT los produce. En modo
+    'local' entrega el calendario completo en un único fragmento.
+    Las excepciones se propagan al consumidor del generador.
+
+    Yields:
+        str: Fragmentos consecutivos del calendario formateado.
+    """
+    mode = resolve_formatter_mode(mode)
+    if mode == FORMATTER_MODE_LOCAL:
+        events_data, next_monday, next_sunday = get_next_week_events(gc, calendars)
+        yield render_schedule_markdown(events_data, next_monday, next_sunday)
+        return
+
+    calendar_prompt_input = get_next_week_calendar_input(gc, calendars)
+    if gpt_client is None:
+        gpt_client = get_gpt_client()
+    formatter_assistant = "calendar_formatter"
+    if formatter_assistant not in gpt_client.assistants:
+        logging.error(f"Asistente '{formatter_assistant}' no encontrado. Devolviendo datos crudos.")
+        yield calendar_prompt_input
+        return
+
+    logging.info(f"Consultando al asistente '{formatter_assistant}' en streaming...")
+    yield from gpt_client.query_stream(formatter_assistant, calendar_prompt_input)
+
 if __name__ == "__main__":
     print("Obteniendo y formateando el calendario de la próxima semana...")
     schedule = get_formatted_next_week_schedule()
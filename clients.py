@@ -0,0 +1,76 @@
+import logging
+import threading
+
+from calendar_google import GoogleCalendar
+from gpt import AsyncGPTClient, GPTClient
+
+# Registro de clientes compartidos por todo el proceso. Construir un cliente es caro:
+# GoogleCalendar lee token.json, puede refrescar OAuth y construye el servicio de
+# discovery; los clientes GPT leen el .env y cargan los prompts de asistentes/.
+_lock = threading.Lock()
+_google_calendar = None
+_gpt_client = None
+_async_gpt_client = None
+
+
+def get_google_calendar() -> GoogleCalendar:
+    """
+    Retorna el GoogleCalendar compartido, creándolo en el primer uso. En cada llamada
+    refresca el access token si está por vencer, para que las peticiones no lo hagan.
+    """
+    global _google_calendar
+    with _lock:
+        if _google_calendar is None:
+            logging.info("Creando cliente GoogleCalendar compartido...")
+            _google_calendar = GoogleCalendar()
+        gc = _google_calendar
+    gc.ensure_fresh_credentials()
+    return gc
+
+
+def get_gpt_client() -> GPTClient:
+    """Retorna el GPTClient compartido, creándolo en el primer uso."""
+    global _gpt_client
+    with _lock:
+        if _gpt_client is None:
+            logging.info("Creando GPTClient compartido...")
+            _gpt_client = GPTClient()
+        return _gpt_client
+
+
+def get_async_gpt_client() -> AsyncGPTClient:
+    """
+    Retorna el AsyncGPTClient compartido, creándolo en el primer uso. Debe usarse solo
+    desde el event loop de async_runtime: su pool de conexiones queda ligado a ese loop.
+    """
+    global _async_gpt_client
+    with _lock:
+        if _async_gpt_client is None:
+            logging.info("Creando AsyncGPTClient compartido...")
+            _async_gpt_client = AsyncGPTClient()
+        return _async_gpt_client
+
+
+def reset_clients():
+    """Descarta los clientes compartidos; se volverán a crear en el próximo uso."""
+    global _google_calendar, _gpt_client, _async_gpt_client
+    with _lock:
+        _google_calendar = None
+        _gpt_client = None
+        _async_gpt_client = None
+
+
+def set_clients(google_calendar: GoogleCalendar = None, gpt_client: GPTClient = None,
+                async_gpt_client: AsyncGPTClient = None):
+    """
+    Instala clientes ya construidos como los compartidos del proceso (p. ej. los dobles
+    locales de benchmarks/fakes.py). Los que no se indican no cambian.
+    """
+    global _google_calendar, _gpt_client, _async_gpt_client
+    with _lock:
+        if google_calendar is not None:
+            _google_calendar = google_calendar
+        if gpt_client is not None:
+            _gpt_client = gpt_client
+        if async_gpt_client is not None:
+            _async_gpt_client = async_gpt_client
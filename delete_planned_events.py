@@ -28,12 +28,16 @@ def delete_next_week_all_events(calendar_name='PersonalCoach'):
         gc = GoogleCalendar()
 
         # Llamar a la función de borrado SIN filtro y SIN saltar confirmación
-        deleted_count = gc.delete_events_in_range(
+        delete_result = gc.delete_events_in_range(
             start_date_str=start_date_str,
             end_date_str=end_date_str,
             calendar_target=calendar_name,
             skip_confirmation=False # Asegura que pida confirmación
         )
+        deleted_count = len(delete_result['deleted'])
+        if delete_result['failed']:
+            logging.warning(f"No se pudieron borrar {len(delete_result['failed'])} eventos: "
+                            f"{[failure['id'] for failure in delete_result['failed']]}")
 
     except Exception as e:
         logging.error(f"Error durante el borrado de eventos: {e}", exc_info=True)
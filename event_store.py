@@ -0,0 +1,136 @@
+import json
+import sqlite3
+import threading
+import datetime
+
+# Archivo por defecto del almacén local de eventos
+DEFAULT_EVENT_STORE_FILE = 'calendar_events.db'
+
+
+class EventStore:
+    """
+    Almacén local (SQLite) de eventos de Google Calendar, indexado por
+    (calendar_id, event_id), junto con el último nextSyncToken de cada calendario
+    y la fecha hasta la que llegó su última sincronización completa.
+    Permite que GoogleCalendar descargue solo los cambios (deltas) en cada sincronización.
+    """
+
+    def __init__(self, path=DEFAULT_EVENT_STORE_FILE):
+        """
+        Parámetros:
+           path: Ruta del archivo SQLite. Usar ':memory:' para un almacén temporal.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # Las sincronizaciones de varios calendarios corren en hilos distintos
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS events (
+                       calendar_id TEXT NOT NULL,
+                       event_id TEXT NOT NULL,
+                       start_key TEXT NOT NULL,
+                       payload TEXT NOT NULL,
+                       PRIMARY KEY (calendar_id, event_id)
+                   )"""
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_events_start ON events (calendar_id, start_key)"
+            )
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS sync_state (
+                       calendar_id TEXT PRIMARY KEY,
+                       sync_token TEXT,
+                       synced_at TEXT,
+                       synced_until TEXT
+                   )"""
+            )
+            # Almacenes creados antes de que existiera synced_until
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sync_state)")}
+            if 'synced_until' not in columns:
+                self._conn.execute("ALTER TABLE sync_state ADD COLUMN synced_until TEXT")
+
+    def get_sync_token(self, calendar_id):
+        """Retorna el último nextSyncToken guardado para el calendario, o None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sync_token FROM sync_state WHERE calendar_id = ?", (calendar_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_synced_until(self, calendar_id):
+        """
+        Retorna el primer día ('YYYY-MM-DD') que no cubrió la última sincronización
+        completa del calendario, o None si no se conoce.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT synced_until FROM sync_state WHERE calendar_id = ?", (calendar_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def apply_changes(self, calendar_id, upserts, deleted_ids, sync_token, full_resync=False, synced_until=None):
+        """
+        Aplica en una sola transacción los cambios de una sincronización y guarda el
+        nuevo sync token. Si full_resync es True, primero descarta todo lo guardado
+        para el calendario (la sincronización completa lo reemplaza).
+
+        Parámetros:
+           calendar_id (str): ID del calendario.
+           upserts (list): Eventos (recursos de la API) a insertar o actualizar.
+           deleted_ids (list): IDs de eventos cancelados/borrados.
+           sync_token (str): nextSyncToken entregado por la última página.
+           full_resync (bool): Reemplazar por completo los eventos del calendario.
+           synced_until (str, opcional): Primer día ('YYYY-MM-DD') fuera del rango de una
+                                         sincronización completa. Si es None se conserva el guardado.
+        """
+        rows = []
+        for event in upserts:
+            start = event.get('start', {})
+            start_key = start.get('dateTime', start.get('date'))
+            if not start_key:
+                continue
+            rows.append((calendar_id, event['id'], start_key, json.dumps(event)))
+
+        with self._lock, self._conn:
+            if full_resync:
+                self._conn.execute("DELETE FROM events WHERE calendar_id = ?", (calendar_id,))
+            if deleted_ids:
+                self._conn.executemany(
+                    "DELETE FROM events WHERE calendar_id = ? AND event_id = ?",
+                    [(calendar_id, event_id) for event_id in deleted_ids],
+                )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO events (calendar_id, event_id, start_key, payload) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.execute(
+                """INSERT INTO sync_state (calendar_id, sync_token, synced_at, synced_until) VALUES (?, ?, ?, ?)
+                   ON CONFLICT (calendar_id) DO UPDATE SET
+                       sync_token = excluded.sync_token,
+                       synced_at = excluded.synced_at,
+                       synced_until = COALESCE(excluded.synced_until, sync_state.synced_until)""",
+                (calendar_id, sync_token, datetime.datetime.now().isoformat(), synced_until),
+            )
+
+    def events_in_range(self, calendar_id, fecha_inicio, fecha_fin):
+        """
+        Retorna los eventos guardados del calendario que comienzan entre fecha_inicio y
+        fecha_fin (ambas 'YYYY-MM-DD', inclusive), ordenados por inicio.
+        """
+        # El start_key empieza por la fecha, así que basta comparar strings
+        end_exclusive = (
+            datetime.datetime.strptime(fecha_fin, '%Y-%m-%d') + datetime.timedelta(days=1)
+        ).strftime('%Y-%m-%d')
+        with self._lock:
+            rows = self._conn.execute(
+                """SELECT payload FROM events
+                   WHERE calendar_id = ? AND start_key >= ? AND start_key < ?
+                   ORDER BY start_key""",
+                (calendar_id, fecha_inicio, end_exclusive),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,25 +1,68 @@
 import os
+from abc import ABC, abstractmethod
 from dotenv import load_dotenv
-from openai import OpenAI
+import asyncio
+import json
+import math
+import threading
+import time
+from collections import deque
+import openai
+from openai import OpenAI, AsyncOpenAI
 import logging
+from gpt_cache import ResponseCache, get_default_cache
+from prompt_registry import PromptEntry, PromptRegistry, get_prompt_registry
+import metrics
+from retry import OPENAI_RETRY_POLICY, RetryPolicy, async_call_with_retry, call_with_retry, parse_retry_after
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-class GPTClient:
+# HTTP statuses worth retrying: timeout, conflict, rate limit and server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# Latency history kept per assistant for hedged requests (see AsyncGPTClient.query_hedged)
+LATENCY_HISTORY_SIZE = 200
+HEDGE_MIN_SAMPLES = 5
+
+
+def _is_retryable_error(error: Exception) -> bool:
+    """Rate limits, server errors, connection errors and timeouts are retried; other API errors are not."""
+    if isinstance(error, (openai.APIConnectionError, asyncio.TimeoutError, TimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+    return False
+
+
+def _retry_after(error: Exception) -> float:
+    """Delay requested by the server through the retry-after-ms or Retry-After headers."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    if headers.get("retry-after-ms"):
+        delay = parse_retry_after(headers["retry-after-ms"])
+        return delay / 1000 if delay is not None else None
+    return parse_retry_after(headers.get("retry-after"))
+
+
+class _BaseGPTClient(ABC):
     """
-    A client to interact with OpenAI's GPT-4o model using specific assistant prompts.
+    Shared setup for GPTClient and AsyncGPTClient: API key, assistant prompts,
+    response cache and request building. Subclasses create the OpenAI client.
     """
-    def __init__(self, assistants_dir="asistentes"):
+    def __init__(self, assistants_dir="asistentes", cache: ResponseCache = None, retry_policy: RetryPolicy = None):
         """
         Initializes the GPTClient.
 
         Loads the OpenAI API key from environment variables, initializes the OpenAI client,
-        and loads assistant prompts from the specified directory.
+        and attaches the shared prompt registry of the specified directory.
 
         Args:
-            assistants_dir (str): The directory containing assistant prompt files (.txt).
+            assistants_dir (str): The directory containing assistant prompt files (.md).
                                   Defaults to "asistentes".
+            cache (ResponseCache, optional): Response cache to use. Defaults to the
+                                  process-wide cache from `get_default_cache()`.
+            retry_policy (RetryPolicy, optional): Backoff, per-attempt timeout and total budget
+                                  for API calls. Defaults to OPENAI_RETRY_POLICY.
         """
         load_dotenv()
         self.api_key = os.getenv("OPENAI_API_KEY")
@@ -27,80 +70,206 @@ class GPTClient:
             logging.error("OPENAI_API_KEY not found in environment variables.")
             raise ValueError("OPENAI_API_KEY must be set in your .env file.")
 
-        self.client = OpenAI(api_key=self.api_key)
+        # Retries are done by our own policy (see retry.py), not by the SDK
+        self.retry_policy = retry_policy or OPENAI_RETRY_POLICY
+        self.client = self._create_client(self.api_key)
         self.assistants_dir = assistants_dir
-        self.assistants = self._load_assistants()
+        # Prompts are read once per process and reloaded only when their file changes
+        self.prompts: PromptRegistry = get_prompt_registry(assistants_dir)
         logging.info(f"Loaded {len(self.assistants)} assistants: {list(self.assistants.keys())}")
+        self.cache = cache if cache is not None else get_default_cache()
+        self._usage = {}  # assistant -> accumulated token usage, see usage_stats()
+        self._usage_lock = threading.Lock()
+        self._latencies = {}  # assistant -> recent latencies of successful API calls, see latency_percentile()
+
+    @property
+    def assistants(self) -> dict:
+        """
+        Maps assistant names (the .md file names without extension) to their prompts.
+        Served from the shared PromptRegistry; edited files are picked up without a restart.
+        """
+        return self.prompts.contents()
+
+    @staticmethod
+    def _cache_key(prompt: PromptEntry, user_prompt: str, model: str) -> str:
+        # The registry's content hash identifies the base prompt without re-hashing it
+        return ResponseCache.key_for_hash(prompt.name, prompt.sha256, user_prompt, model)
+
+    @staticmethod
+    def _build_messages(prompt: PromptEntry, user_prompt: str) -> list:
+        """
+        Builds the chat messages for a query: the assistant's base prompt as a fixed system
+        message, followed by the user prompt. Every call to the same assistant starts with
+        the same tokens, which lets the provider reuse its cached prompt prefix.
+        """
+        # logging.debug(f"User prompt being sent:\n{user_prompt}") # Uncomment for debugging prompts
+        return [
+            {"role": "system", "content": prompt.content},
+            {"role": "user", "content": user_prompt},
+        ]
 
-    def _load_assistants(self):
+    def _record_usage(self, assistant_name: str, model: str, usage) -> dict:
         """
-        Loads assistant prompts from .md files in the assistants directory.
-        The filename (without extension) is used as the assistant name.
+        Records the token usage of one API call: prompt tokens, the part of them served
+        from the provider's prompt cache (cached_tokens) and completion tokens.
 
         Returns:
-            dict: A dictionary mapping assistant names to their prompt content.
+            dict: The usage of this call, or None if the response carried no usage.
         """
-        assistants = {}
-        if not os.path.isdir(self.assistants_dir):
-            logging.warning(f"Assistants directory '{self.assistants_dir}' not found. No assistants loaded.")
-            return assistants
+        if usage is None:
+            return None
+        details = getattr(usage, "prompt_tokens_details", None)
+        record = {
+            "assistant": assistant_name,
+            "model": model,
+            "prompt_tokens": usage.prompt_tokens or 0,
+            "cached_tokens": (getattr(details, "cached_tokens", None) or 0) if details else 0,
+            "completion_tokens": usage.completion_tokens or 0,
+        }
+        with self._usage_lock:
+            totals = self._usage.setdefault(assistant_name, {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0})
+            totals["calls"] += 1
+            for name in ("prompt_tokens", "cached_tokens", "completion_tokens"):
+                totals[name] += record[name]
+        logging.info(f"Usage for assistant '{assistant_name}': prompt_tokens={record['prompt_tokens']}, "
+                     f"cached_tokens={record['cached_tokens']}, completion_tokens={record['completion_tokens']}.")
+        return record
 
-        try:
-            for filename in os.listdir(self.assistants_dir):
-                if filename.endswith(".md"):
-                    assistant_name = os.path.splitext(filename)[0]
-                    filepath = os.path.join(self.assistants_dir, filename)
-                    try:
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            assistants[assistant_name] = f.read().strip()
-                        logging.debug(f"Loaded assistant '{assistant_name}' from {filename}")
-                    except Exception as e:
-                        logging.error(f"Error reading assistant file {filepath}: {e}")
-        except Exception as e:
-            logging.error(f"Error listing files in assistants directory '{self.assistants_dir}': {e}")
+    def usage_stats(self) -> dict:
+        """
+        Returns the accumulated token usage per assistant, including the fraction of
+        prompt tokens served from the provider's prompt cache.
+        """
+        with self._usage_lock:
+            return {
+                name: dict(totals, cached_ratio=totals["cached_tokens"] / totals["prompt_tokens"] if totals["prompt_tokens"] else 0.0)
+                for name, totals in self._usage.items()
+            }
+
+    def _record_latency(self, assistant_name: str, latency: float):
+        with self._usage_lock:
+            self._latencies.setdefault(assistant_name, deque(maxlen=LATENCY_HISTORY_SIZE)).append(latency)
+
+    def latency_percentile(self, assistant_name: str, percentile: float, min_samples: int = HEDGE_MIN_SAMPLES) -> float:
+        """
+        Returns the given percentile (0-100, nearest rank) of the recent latencies of
+        successful API calls to an assistant, or None if there are fewer than
+        `min_samples` of them. Cache hits are not counted; hedged calls count once, with
+        their end-to-end latency (see `AsyncGPTClient.query_hedged`).
+        """
+        with self._usage_lock:
+            samples = sorted(self._latencies.get(assistant_name, ()))
+        if not samples or len(samples) < min_samples:
+            return None
+        rank = max(1, min(len(samples), math.ceil(percentile / 100 * len(samples))))
+        return samples[rank - 1]
+
+    def cached_response(self, assistant_name: str, user_prompt: str, model: str = "gpt-4o"):
+        """
+        Returns (response, age in seconds) of the last cached answer of an assistant to a
+        prompt, even if it has expired, or None. See `ResponseCache.get_stale`.
+        """
+        prompt = self._prompt_entry(assistant_name)
+        return self.cache.get_stale(self._cache_key(prompt, user_prompt, model))
+
+    @abstractmethod
+    def _create_client(self, api_key: str):
+        """Returns the OpenAI SDK client (sync or async) used for API calls."""
 
-        return assistants
+    def _prompt_entry(self, assistant_name: str) -> PromptEntry:
+        """
+        Returns a snapshot of an assistant's prompt. A call uses this one entry for both its
+        cache key and its messages, so a prompt edited mid-call cannot cache the answer to
+        one version of the prompt under the key of the other.
+        """
+        prompt = self.prompts.get(assistant_name)
+        if prompt is None:
+            logging.error(f"Assistant '{assistant_name}' not found. Available: {list(self.assistants.keys())}")
+            raise ValueError(f"Assistant '{assistant_name}' not found.")
+        return prompt
+
+
+class GPTClient(_BaseGPTClient):
+    """
+    A client to interact with OpenAI's GPT-4o model using specific assistant prompts.
+    """
+    def _create_client(self, api_key: str):
+        return OpenAI(api_key=api_key, max_retries=0, timeout=self.retry_policy.attempt_timeout)
 
-    def query(self, assistant_name: str, user_prompt: str, model: str = "gpt-4o") -> str:
+    def query(self, assistant_name: str, user_prompt: str, model: str = "gpt-4o", use_cache: bool = True,
+              response_schema: dict = None) -> str:
         """
         Sends a query to the specified GPT model using a selected assistant's prompt.
+        Successful responses are cached by assistant, base prompt, user prompt and model.
 
         Args:
             assistant_name (str): The name of the assistant to use (must match a .txt file name).
             user_prompt (str): The specific prompt or question from the user.
             model (str): The OpenAI model to use. Defaults to "gpt-4o".
+            use_cache (bool): If False, bypasses the cache lookup (the fresh response is still stored).
+            response_schema (dict, optional): A structured-output JSON schema ({"name", "strict", "schema"}).
+                If given, the model is constrained to it and the response is checked to be valid JSON.
 
         Returns:
-            str: The content of the model's response.
+            str: The content of the model's response (a JSON document when response_schema is given).
 
         Raises:
             ValueError: If the specified assistant_name is not found.
             Exception: If there is an error during the API call.
         """
-        if assistant_name not in self.assistants:
-            logging.error(f"Assistant '{assistant_name}' not found. Available: {list(self.assistants.keys())}")
-            raise ValueError(f"Assistant '{assistant_name}' not found.")
+        prompt = self._prompt_entry(assistant_name)
+
+        # Structured and free-text answers to the same prompt are cached separately
+        cache_model = f"{model}:{response_schema['name']}" if response_schema else model
+        cache_key = self._cache_key(prompt, user_prompt, cache_model)
+        if use_cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logging.info(f"Cache hit for assistant '{assistant_name}' (model '{model}').")
+                metrics.record_call(assistant_name, model, 0.0, status="cache_hit")
+                return cached
 
-        base_prompt = self.assistants[assistant_name]
-        full_prompt = f"{base_prompt}\n\n{user_prompt}"
         logging.info(f"Querying model '{model}' with assistant '{assistant_name}'.")
-        # logging.debug(f"Full prompt being sent:\n{full_prompt}") # Uncomment for debugging prompts
 
+        started = time.perf_counter()
+        status, usage, retries = "error", None, []
         try:
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "user", "content": full_prompt}
-                ]
-                # You can add other parameters like max_tokens, temperature, etc. here
-                # max_tokens=150,
-                # temperature=0.7,
+            extra_params = {}
+            if response_schema:
+                extra_params["response_format"] = {"type": "json_schema", "json_schema": response_schema}
+            response = call_with_retry(
+                lambda timeout: self.client.chat.completions.create(
+                    model=model,
+                    messages=self._build_messages(prompt, user_prompt),
+                    timeout=timeout,
+                    **extra_params
+                    # You can add other parameters like max_tokens, temperature, etc. here
+                    # max_tokens=150,
+                    # temperature=0.7,
+                ),
+                self.retry_policy, _is_retryable_error, _retry_after, client="openai",
+                description=f"OpenAI call for assistant '{assistant_name}'", on_retry=retries.append,
             )
             # Check if response and choices are valid
             if response and response.choices and len(response.choices) > 0:
-                content = response.choices[0].message.content
+                message = response.choices[0].message
+                if getattr(message, "refusal", None):
+                    logging.error(f"Model '{model}' refused the request: {message.refusal}")
+                    return f"Error: Model refused the request: {message.refusal}"
+                content = message.content
                 logging.info(f"Received response from model '{model}'.")
-                return content.strip() if content else ""
+                usage = self._record_usage(assistant_name, model, getattr(response, "usage", None))
+                content = content.strip() if content else ""
+                if response_schema:
+                    try:
+                        json.loads(content)
+                    except ValueError as e:
+                        logging.error(f"Structured response from model '{model}' is not valid JSON: {e}")
+                        return f"Error: Invalid JSON in structured response: {e}"
+                status = "ok"
+                if content:
+                    self.cache.set(cache_key, content)
+                return content
             else:
                 logging.error("Invalid response structure received from OpenAI API.")
                 return "Error: Invalid response structure from API."
@@ -110,6 +279,258 @@ class GPTClient:
             # Consider re-raising or returning a specific error message
             # raise e # Option: re-raise the exception
             return f"Error interacting with OpenAI: {e}"
+        finally:
+            metrics.record_call(assistant_name, model, time.perf_counter() - started, usage=usage, status=status,
+                                retries=len(retries))
+
+    def query_stream(self, assistant_name: str, user_prompt: str, model: str = "gpt-4o", use_cache: bool = True):
+        """
+        Streaming variant of `query`: a generator that yields the response text in
+        chunks as the model produces them. A cached response is yielded as a single chunk,
+        and the complete streamed response is stored in the cache once it finishes.
+
+        Args:
+            assistant_name (str): The name of the assistant to use (must match a .md file name).
+            user_prompt (str): The specific prompt or question from the user.
+            model (str): The OpenAI model to use. Defaults to "gpt-4o".
+            use_cache (bool): If False, bypasses the cache lookup.
+
+        Yields:
+            str: Consecutive fragments of the model's response.
+
+        Raises:
+            ValueError: If the specified assistant_name is not found.
+            Exception: If the API call fails. Unlike `query`, errors are raised rather than
+                       returned as text, so they are not mixed into an already-started stream.
+        """
+        prompt = self._prompt_entry(assistant_name)
+
+        cache_key = self._cache_key(prompt, user_prompt, model)
+        if use_cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logging.info(f"Cache hit for assistant '{assistant_name}' (model '{model}').")
+                metrics.record_call(assistant_name, model, 0.0, status="cache_hit")
+                yield cached
+                return
+
+        logging.info(f"Streaming from model '{model}' with assistant '{assistant_name}'.")
+        started = time.perf_counter()
+        status, usage, ttft, retries = "error", None, None, []
+        parts = []
+        try:
+            # Only opening the stream is retried: a stream that fails midway has already yielded text
+            stream = call_with_retry(
+                lambda timeout: self.client.chat.completions.create(
+                    model=model,
+                    messages=self._build_messages(prompt, user_prompt),
+                    stream=True,
+                    stream_options={"include_usage": True},
+                    timeout=timeout,
+                ),
+                self.retry_policy, _is_retryable_error, _retry_after, client="openai",
+                description=f"OpenAI stream for assistant '{assistant_name}'", on_retry=retries.append,
+            )
+            for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    # With include_usage, the last chunk carries the usage and no choices
+                    usage = self._record_usage(assistant_name, model, chunk.usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if ttft is None:
+                        ttft = time.perf_counter() - started
+                    parts.append(delta)
+                    yield delta
+            status = "ok"
+        finally:
+            metrics.record_call(assistant_name, model, time.perf_counter() - started, usage=usage,
+                                status=status, ttft=ttft, retries=len(retries))
+        logging.info(f"Finished streaming response from model '{model}'.")
+
+        content = "".join(parts).strip()
+        if content:
+            self.cache.set(cache_key, content)
+
+
+class AsyncGPTClient(_BaseGPTClient):
+    """
+    Asyncio counterpart of GPTClient built on AsyncOpenAI. Many concurrent queries
+    share one event loop and one HTTP connection pool instead of one thread each.
+    """
+    def _create_client(self, api_key: str):
+        return AsyncOpenAI(api_key=api_key, max_retries=0, timeout=self.retry_policy.attempt_timeout)
+
+    async def query(self, assistant_name: str, user_prompt: str, model: str = "gpt-4o", use_cache: bool = True,
+                    record_latency: bool = True) -> str:
+        """
+        Async version of `GPTClient.query`, with the same caching and error behavior.
+
+        Args:
+            assistant_name (str): The name of the assistant to use (must match a .md file name).
+            user_prompt (str): The specific prompt or question from the user.
+            model (str): The OpenAI model to use. Defaults to "gpt-4o".
+            use_cache (bool): If False, bypasses the cache lookup (the fresh response is still stored).
+            record_latency (bool): If False, a successful call is not added to the latency
+                history used for hedging (the caller records it, see `query_hedged`).
+
+        Returns:
+            str: The content of the model's response, or an error message if the API call failed.
+
+        Raises:
+            ValueError: If the specified assistant_name is not found.
+        """
+        prompt = self._prompt_entry(assistant_name)
+
+        cache_key = self._cache_key(prompt, user_prompt, model)
+        if use_cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logging.info(f"Cache hit for assistant '{assistant_name}' (model '{model}').")
+                metrics.record_call(assistant_name, model, 0.0, status="cache_hit")
+                return cached
+
+        logging.info(f"Querying model '{model}' with assistant '{assistant_name}' (async).")
+        started = time.perf_counter()
+        status, usage, retries = "error", None, []
+        try:
+            response = await async_call_with_retry(
+                lambda timeout: self.client.chat.completions.create(
+                    model=model,
+                    messages=self._build_messages(prompt, user_prompt),
+                    timeout=timeout,
+                ),
+                self.retry_policy, _is_retryable_error, _retry_after, client="openai",
+                description=f"OpenAI call for assistant '{assistant_name}'", on_retry=retries.append,
+            )
+            if response and response.choices and len(response.choices) > 0:
+                content = response.choices[0].message.content
+                logging.info(f"Received response from model '{model}' for assistant '{assistant_name}'.")
+                usage = self._record_usage(assistant_name, model, getattr(response, "usage", None))
+                content = content.strip() if content else ""
+                status = "ok"
+                if content:
+                    self.cache.set(cache_key, content)
+                return content
+            else:
+                logging.error("Invalid response structure received from OpenAI API.")
+                return "Error: Invalid response structure from API."
+
+        except asyncio.CancelledError:
+            # E.g. the losing request of a hedged pair; not an API error
+            status = "cancelled"
+            raise
+        except Exception as e:
+            logging.error(f"Error calling OpenAI API: {e}")
+            return f"Error interacting with OpenAI: {e}"
+        finally:
+            latency = time.perf_counter() - started
+            if status == "ok" and record_latency:
+                self._record_latency(assistant_name, latency)
+            metrics.record_call(assistant_name, model, latency, usage=usage, status=status, retries=len(retries))
+
+    async def query_hedged(self, assistant_name: str, user_prompt: str, model: str = "gpt-4o",
+                           hedge_percentile: float = 95.0) -> str:
+        """
+        `query` with a hedged duplicate: if the call has not finished after the
+        `hedge_percentile` of this assistant's recent latencies, an identical request is
+        sent, the first successful response of the two is returned and the other is cancelled.
+        Without enough latency history (or on a cache hit) it behaves like `query`.
+
+        Every call is counted in `gpt_hedge_requests_total` by outcome: 'not_needed',
+        'primary_won' or 'hedge_won'. The latency history gets the end-to-end latency of
+        the call, from the primary's start to the first success: the hedge's own (shorter)
+        latency is never recorded, since that would pull the percentile down and make
+        hedging ever more aggressive.
+
+        Returns:
+            str: The response, or the primary request's error message if both failed.
+
+        Raises:
+            ValueError: If the specified assistant_name is not found.
+        """
+        self._prompt_entry(assistant_name)
+        delay = self.latency_percentile(assistant_name, hedge_percentile)
+        if delay is None:
+            return await self.query(assistant_name, user_prompt, model=model)
+
+        started = time.perf_counter()
+        primary = asyncio.ensure_future(self.query(assistant_name, user_prompt, model=model))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                self._count_hedge(assistant_name, model, "not_needed")
+                return primary.result()
+
+            logging.info(f"Assistant '{assistant_name}' slower than its p{hedge_percentile:g} ({delay:.2f}s); "
+                         f"sending a hedged request.")
+            # The duplicate skips the cache lookup: the primary already missed it
+            hedge = asyncio.ensure_future(self.query(assistant_name, user_prompt, model=model, use_cache=False,
+                                                     record_latency=False))
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in (primary, hedge):
+                    if task in done and not task.result().startswith("Error"):
+                        if task is hedge:
+                            # The cancelled primary took at least this long
+                            self._record_latency(assistant_name, time.perf_counter() - started)
+                        self._count_hedge(assistant_name, model, "hedge_won" if task is hedge else "primary_won")
+                        return task.result()
+            self._count_hedge(assistant_name, model, "primary_won")
+            return primary.result()
+        finally:
+            # Also reached when the caller cancels us (e.g. a timeout): no request is left running
+            for task in pending:
+                task.cancel()
+
+    @staticmethod
+    def _count_hedge(assistant_name: str, model: str, outcome: str):
+        metrics.registry.inc("gpt_hedge_requests_total", help_text="Hedge-eligible model calls by outcome.",
+                             assistant=assistant_name, model=model, outcome=outcome)
+
+    async def gather_experts(self, assistant_names: list, user_prompt: str, model: str = "gpt-4o",
+                             max_concurrency: int = 4, hedge_percentile: float = None, timeout: float = None) -> dict:
+        """
+        Queries several assistants with the same prompt concurrently, with at most
+        `max_concurrency` requests in flight.
+
+        Args:
+            assistant_names (list): Names of the assistants to query.
+            user_prompt (str): The prompt sent to every assistant.
+            model (str): The OpenAI model to use. Defaults to "gpt-4o".
+            max_concurrency (int): Maximum number of simultaneous requests.
+            hedge_percentile (float, optional): If given, each query is hedged at this
+                percentile of its assistant's latency (see `query_hedged`).
+            timeout (float, optional): Seconds each assistant has to answer, counted once its
+                request starts. A query that runs out of time is cancelled and maps to an
+                asyncio.TimeoutError.
+
+        Returns:
+            dict: Maps each assistant name to its response, or to the exception it raised.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _query(assistant_name):
+            if hedge_percentile is not None:
+                return await self.query_hedged(assistant_name, user_prompt, model=model,
+                                               hedge_percentile=hedge_percentile)
+            return await self.query(assistant_name, user_prompt, model=model)
+
+        async def _limited(assistant_name):
+            async with semaphore:
+                return await asyncio.wait_for(_query(assistant_name), timeout=timeout)
+
+        results = await asyncio.gather(
+            *(_limited(name) for name in assistant_names), return_exceptions=True
+        )
+        return dict(zip(assistant_names, results))
+
+    async def aclose(self):
+        """Closes the underlying HTTP connection pool."""
+        await self.client.close()
 
 # Example Usage (optional, can be run if this file is executed directly)
 if __name__ == '__main__':
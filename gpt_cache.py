@@ -0,0 +1,174 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Default settings, overridable through environment variables (.env)
+DEFAULT_TTL_SECONDS = 12 * 3600
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_DISK_ENTRIES = 5000
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier cache for model responses: an in-memory LRU tier and an optional
+    on-disk SQLite tier that survives restarts.
+
+    Entries expire after `ttl_seconds`; each tier evicts its least recently
+    used (memory) or oldest (disk) entries once it exceeds its size limit.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 disk_path: str = None, max_disk_entries: int = DEFAULT_MAX_DISK_ENTRIES):
+        """
+        Args:
+            max_entries (int): Maximum number of entries kept in memory.
+            ttl_seconds (float): Time to live of an entry, in seconds. None disables expiry.
+            disk_path (str, optional): SQLite file for the on-disk tier. None disables it.
+            max_disk_entries (int): Maximum number of entries kept on disk.
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_path = disk_path
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self._disk = None
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            with self._disk:
+                self._disk.execute(
+                    "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, stored_at REAL, value TEXT)"
+                )
+
+    @staticmethod
+    def make_key(assistant_name: str, base_prompt: str, user_prompt: str, model: str) -> str:
+        """
+        Builds the cache key from the assistant name, a hash of its base prompt,
+        a hash of the user prompt and the model.
+        """
+        return ResponseCache.key_for_hash(assistant_name, _sha256(base_prompt), user_prompt, model)
+
+    @staticmethod
+    def key_for_hash(assistant_name: str, prompt_hash: str, user_prompt: str, model: str) -> str:
+        """
+        Same key as `make_key`, from the SHA-256 hex digest of the base prompt (e.g. the
+        content hash kept by the PromptRegistry) instead of the prompt itself.
+        """
+        return f"{assistant_name}:{prompt_hash[:16]}:{_sha256(user_prompt)[:16]}:{model}"
+
+    def _is_fresh(self, stored_at: float) -> bool:
+        return self.ttl_seconds is None or (time.time() - stored_at) < self.ttl_seconds
+
+    def get(self, key: str):
+        """
+        Returns the cached response for `key`, or None on a miss (absent or expired).
+        A disk hit is promoted to the memory tier.
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None and self._disk is not None:
+                row = self._disk.execute(
+                    "SELECT stored_at, value FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    entry = (row[0], row[1])
+                    self._store_in_memory(key, entry)
+            if entry is not None and self._is_fresh(entry[0]):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def get_stale(self, key: str):
+        """
+        Returns (response, age in seconds) for `key` even if the entry has expired, or
+        None if it is absent. Meant as a fallback when a fresh response cannot be
+        obtained; it does not count as a hit or a miss.
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None and self._disk is not None:
+                row = self._disk.execute(
+                    "SELECT stored_at, value FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    entry = (row[0], row[1])
+            if entry is None:
+                return None
+            return entry[1], time.time() - entry[0]
+
+    def set(self, key: str, value: str):
+        """Stores a response in every enabled tier."""
+        entry = (time.time(), value)
+        with self._lock:
+            self._store_in_memory(key, entry)
+            if self._disk is not None:
+                with self._disk:
+                    self._disk.execute(
+                        "INSERT OR REPLACE INTO responses (key, stored_at, value) VALUES (?, ?, ?)",
+                        (key, entry[0], value),
+                    )
+                    self._disk.execute(
+                        """DELETE FROM responses WHERE key NOT IN (
+                               SELECT key FROM responses ORDER BY stored_at DESC LIMIT ?)""",
+                        (self.max_disk_entries,),
+                    )
+
+    def _store_in_memory(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        """Removes every entry from both tiers. Counters are kept."""
+        with self._lock:
+            self._memory.clear()
+            if self._disk is not None:
+                with self._disk:
+                    self._disk.execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and the current size of the memory tier."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_enabled": self._disk is not None,
+            }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> ResponseCache:
+    """
+    Returns the process-wide cache shared by every GPTClient that does not get
+    its own. Configured through GPT_CACHE_TTL_SECONDS, GPT_CACHE_MAX_ENTRIES and
+    GPT_CACHE_PATH (enables the on-disk tier).
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache(
+                max_entries=int(os.getenv("GPT_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+                ttl_seconds=float(os.getenv("GPT_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+                disk_path=os.getenv("GPT_CACHE_PATH") or None,
+            )
+            logging.info(f"Response cache initialized (disk tier: {_default_cache.disk_path or 'disabled'}).")
+        return _default_cache
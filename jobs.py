@@ -0,0 +1,133 @@
+import concurrent.futures
+import datetime
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from dotenv import load_dotenv
+
+# Configuración por defecto, sobreescribible con variables de entorno (.env)
+DEFAULT_JOB_WORKERS = 2
+DEFAULT_JOB_MAX_QUEUE = 20
+# Trabajos terminados que se conservan para consultar su resultado
+DEFAULT_MAX_FINISHED_JOBS = 100
+
+
+class QueueFullError(Exception):
+    """La cola de trabajos alcanzó su capacidad máxima."""
+
+
+@dataclass
+class Job:
+    """Estado de un trabajo en segundo plano."""
+    id: str
+    name: str
+    status: str = "queued"  # queued | running | succeeded | failed
+    created_at: str = field(default_factory=lambda: datetime.datetime.now().isoformat())
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    stage_timings: dict = field(default_factory=dict)
+    result: Any = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "stage_timings": dict(self.stage_timings),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """
+    Ejecuta trabajos bloqueantes (p. ej. el pipeline de planificación) en un pool de
+    hilos propio, fuera del event loop de la API, con una cola de capacidad acotada.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_JOB_WORKERS, max_queue: int = DEFAULT_JOB_MAX_QUEUE,
+                 max_finished: int = DEFAULT_MAX_FINISHED_JOBS):
+        """
+        Parámetros:
+           max_workers (int): Trabajos ejecutándose a la vez.
+           max_queue (int): Trabajos en espera admitidos antes de rechazar nuevos.
+           max_finished (int): Trabajos terminados que se conservan en memoria.
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.max_finished = max_finished
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, name: str, func, *args, **kwargs) -> Job:
+        """
+        Encola func(*args, timings=job.stage_timings, **kwargs). func puede registrar en
+        `timings` la duración de cada etapa. Si retorna un texto que contiene "Error:",
+        el trabajo se marca como fallido.
+
+        Raises:
+            QueueFullError: Si ya hay max_queue trabajos esperando.
+        """
+        with self._lock:
+            if self.queue_depth() >= self.max_queue:
+                raise QueueFullError(f"La cola de trabajos está llena ({self.max_queue} en espera).")
+            job = Job(id=uuid.uuid4().hex, name=name)
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, func, args, kwargs)
+        logging.info(f"Trabajo '{name}' encolado con ID {job.id}.")
+        return job
+
+    def _run(self, job: Job, func, args, kwargs):
+        job.status = "running"
+        job.started_at = datetime.datetime.now().isoformat()
+        start = time.perf_counter()
+        try:
+            result = func(*args, timings=job.stage_timings, **kwargs)
+            if isinstance(result, str) and "Error:" in result:
+                job.status, job.error = "failed", result
+            else:
+                job.status, job.result = "succeeded", result
+        except Exception as e:
+            logging.exception(f"Error en el trabajo {job.id} ('{job.name}').")
+            job.status, job.error = "failed", str(e)
+        finally:
+            job.stage_timings["total"] = round(time.perf_counter() - start, 3)
+            job.finished_at = datetime.datetime.now().isoformat()
+            logging.info(f"Trabajo {job.id} ('{job.name}') terminado con estado '{job.status}'.")
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def queue_depth(self) -> int:
+        """Número de trabajos en espera (no incluye los que se están ejecutando)."""
+        return sum(1 for job in self._jobs.values() if job.status == "queued")
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in ("succeeded", "failed")]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait)
+
+
+def job_manager_from_env() -> JobManager:
+    """Crea un JobManager configurado con JOB_WORKERS y JOB_MAX_QUEUE."""
+    load_dotenv()
+    return JobManager(
+        max_workers=int(os.getenv("JOB_WORKERS", DEFAULT_JOB_WORKERS)),
+        max_queue=int(os.getenv("JOB_MAX_QUEUE", DEFAULT_JOB_MAX_QUEUE)),
+    )
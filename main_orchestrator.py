@@ -1,10 +1,18 @@
 import logging
+import os
 import re
+import sys
 import datetime
+from typing import Union
 from weekly_planner import get_weekly_plan
 from calendar_processor import get_formatted_next_week_schedule
 from gpt import GPTClient
 from calendar_google import GoogleCalendar
+from clients import get_google_calendar, get_gpt_client
+from pipeline import Stage, StageError, run_dag
+from reconciler import OP_CREATE, reconcile_calendar
+from metrics import track_run
+from schedule_schema import SCHEDULE_RESPONSE_SCHEMA, Schedule, ScheduleValidationError
 try:
     from tzlocal import get_localzone
     local_tz = get_localzone()
@@ -17,16 +25,75 @@ except Exception as tz_err: # Capturar otros posibles errores de tzlocal
     logging.warning(f"Error al inicializar tzlocal: {tz_err}. No se usará timezone local.")
 
 
+# Calendario donde se escriben los eventos [PLAN], si no se indica otro
+DEFAULT_TARGET_CALENDAR = 'PersonalCoach'
+
 # --- Change: Set logging level to DEBUG for detailed output ---
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 # --- End Change ---
 
-def parse_and_create_events(schedule_string: str, gc: GoogleCalendar, target_calendar: str = 'PersonalCoach'):
+def _localize(start_dt_naive: datetime.datetime, end_dt_naive: datetime.datetime):
+    """Attaches the local timezone (tzlocal) to a naive start/end pair, if available."""
+    if not local_tz:
+        logging.warning("  Creando evento sin timezone explícita (tzlocal no disponible/falló).")
+        return start_dt_naive, end_dt_naive
+    try:
+        start_dt_aware = start_dt_naive.replace(tzinfo=local_tz)
+        end_dt_aware = end_dt_naive.replace(tzinfo=local_tz)
+        logging.debug(f"  Datetimes aware creados: Inicio={start_dt_aware}, Fin={end_dt_aware}")
+        return start_dt_aware, end_dt_aware
+    except Exception as tz_apply_err:
+        logging.error(f"  Error al aplicar timezone a {start_dt_naive}/{end_dt_naive}: {tz_apply_err}. Usando naive.")
+        return start_dt_naive, end_dt_naive
+
+def _create_event_bodies(event_bodies: list, gc: GoogleCalendar, target_calendar: str) -> list:
+    """Inserts the collected event bodies with one batched call and logs the outcome."""
+    if not event_bodies:
+        return []
+
+    results = gc.create_events_batch(event_bodies, calendar_target=target_calendar)
+    created_count = sum(1 for r in results if r['event'])
+    for r in results:
+        if r['error']:
+            logging.warning(f"  -> Evento '{r['summary']}' NO fue creado: {r['error']}")
+    logging.info(f"Eventos [PLAN] creados en '{target_calendar}': {created_count}/{len(results)}")
+    return results
+
+def schedule_event_bodies(schedule: Schedule) -> list:
+    """Builds the Calendar event bodies for the planned (timed) events of a structured schedule."""
+    event_bodies = []
+    for day, event in schedule.planned_events():
+        start_dt, end_dt = _localize(datetime.datetime.combine(day.date, event.start),
+                                     datetime.datetime.combine(day.date, event.end))
+        event_bodies.append(GoogleCalendar.build_event_body(
+            summary=event.summary,
+            start_datetime=start_dt,
+            end_datetime=end_dt,
+            description=event.description,
+            location=event.location
+        ))
+    logging.info(f"Eventos [PLAN] en el calendario estructurado: {len(event_bodies)}")
+    return event_bodies
+
+def create_schedule_events(schedule: Schedule, gc: GoogleCalendar, target_calendar: str = DEFAULT_TARGET_CALENDAR):
     """
-    Parses the integrated schedule string and creates Google Calendar events for entries marked with [PLAN].
-    Includes detailed logging for debugging.
+    Creates Google Calendar events for the planned (timed) events of a structured schedule,
+    with a single batched call to `GoogleCalendar.create_events_batch`.
+
+    Returns:
+        list: Per-event results from `create_events_batch` (empty if nothing is planned).
     """
-    logging.info(f"Iniciando parseo del calendario integrado para crear eventos en '{target_calendar}'.")
+    return _create_event_bodies(schedule_event_bodies(schedule), gc, target_calendar)
+
+def parse_schedule_events(schedule_string: str) -> list:
+    """
+    Parses the integrated schedule string and builds the Calendar event bodies for the
+    entries marked with [PLAN]. Includes detailed logging for debugging.
+
+    Returns:
+        list: Event bodies as built by `GoogleCalendar.build_event_body`.
+    """
+    logging.info("Iniciando parseo del calendario integrado.")
     # --- Change: Adjust event_pattern to match leading '* ' ---
     # Original: r"\*\*\s*(\d{2}:\d{2})\s*-\s*(\d{2}:\d{2})\s*\*\*:\s*\[PLAN\]\s*(.*)"
     # Nuevo: Añadir `\s*\*\s*` al principio para capturar el asterisco y espacios opcionales
@@ -38,7 +105,7 @@ def parse_and_create_events(schedule_string: str, gc: GoogleCalendar, target_cal
     date_pattern = re.compile(r"(\d{4}-\d{2}-\d{2})")
 
     current_date_str = None
-    created_count = 0
+    event_bodies = []
     lines = schedule_string.splitlines()
     logging.debug(f"Número total de líneas a parsear: {len(lines)}")
 
@@ -92,66 +159,83 @@ def parse_and_create_events(schedule_string: str, gc: GoogleCalendar, target_cal
                 end_dt_naive = datetime.datetime.strptime(f"{current_date_str} {end_time_str}", "%Y-%m-%d %H:%M")
                 logging.debug(f"  Datetimes naive creados: Inicio={start_dt_naive}, Fin={end_dt_naive}")
 
-                start_dt_aware = start_dt_naive
-                end_dt_aware = end_dt_naive
-                if local_tz:
-                    try:
-                        start_dt_aware = start_dt_naive.replace(tzinfo=local_tz)
-                        end_dt_aware = end_dt_naive.replace(tzinfo=local_tz)
-                        logging.debug(f"  Datetimes aware creados: Inicio={start_dt_aware}, Fin={end_dt_aware}")
-                    except Exception as tz_apply_err:
-                         logging.error(f"  Error al aplicar timezone a {start_dt_naive}/{end_dt_naive}: {tz_apply_err}. Usando naive.")
-                         # Se usarán los naive definidos antes del bloque if
-                else:
-                    logging.warning("  Creando evento sin timezone explícita (tzlocal no disponible/falló).")
+                start_dt_aware, end_dt_aware = _localize(start_dt_naive, end_dt_naive)
 
-                logging.debug(f"  Llamando a gc.create_event con: summary='{summary}', start='{start_dt_aware}', end='{end_dt_aware}', desc='{description}', loc='{location}', target='{target_calendar}'")
-                created = gc.create_event(
+                logging.debug(f"  Evento encolado para creación batch: summary='{summary}', start='{start_dt_aware}', end='{end_dt_aware}', desc='{description}', loc='{location}'")
+                event_bodies.append(GoogleCalendar.build_event_body(
                     summary=summary,
                     start_datetime=start_dt_aware,
                     end_datetime=end_dt_aware,
                     description=description,
-                    location=location,
-                    calendar_target=target_calendar
-                )
-                if created:
-                    created_count += 1
-                    logging.info(f"  -> Evento '{summary}' CREADO exitosamente en Google Calendar.")
-                else:
-                    logging.warning(f"  -> Llamada a create_event para '{summary}' NO retornó un evento (posible fallo, revisar logs de GoogleCalendar).")
+                    location=location
+                ))
 
             except ValueError as ve:
                 logging.error(f"  Error de formato de fecha/hora para evento '{summary}' en {current_date_str}: {ve}")
             except Exception as e:
-                logging.error(f"  Error inesperado al procesar/crear evento '{summary}': {e}", exc_info=True) # Log con traceback
+                logging.error(f"  Error inesperado al procesar evento '{summary}': {e}", exc_info=True) # Log con traceback
         # --- Change: Log if line didn't match date or event pattern ---
         elif not line.startswith("*   **Ubicaciones Principales:") and not line.startswith("*   **Eventos:") and line and not line.startswith("**"):
              logging.debug(f"Línea no reconocida como fecha, evento [PLAN] o cabecera: '{line}'")
         # --- End Change ---
 
 
-    logging.info(f"Parseo completado. Intentos de creación de eventos [PLAN]: {created_count}") # Ajustado para reflejar intentos
+    logging.info(f"Parseo completado. Eventos [PLAN] detectados: {len(event_bodies)}")
+    return event_bodies
 
+def parse_and_create_events(schedule_string: str, gc: GoogleCalendar, target_calendar: str = DEFAULT_TARGET_CALENDAR,
+                            dry_run: bool = False):
+    """
+    Parses the integrated schedule string and creates Google Calendar events for entries marked with [PLAN].
+    Events are collected while parsing and inserted with a single batched call to
+    `GoogleCalendar.create_events_batch`.
 
-def generate_integrated_schedule():
-    # ... (Código inicial sin cambios: obtener plan, obtener calendario, preparar prompt, consultar integrador) ...
-    try:
-        logging.info("Iniciando la obtención de la planificación semanal recomendada...")
-        recommended_plan = get_weekly_plan()
-        if "Error:" in recommended_plan:
-            logging.error(f"Fallo al obtener la planificación recomendada: {recommended_plan}")
-            return f"Error al obtener la planificación recomendada: {recommended_plan}"
-        logging.info("Planificación semanal recomendada obtenida.")
+    Args:
+        dry_run (bool): If True, nothing is sent to Google Calendar (`gc` may be None) and the
+            create operations are returned instead, in the format of `reconciler.plan_reconciliation`.
 
-        logging.info("Iniciando la obtención del calendario formateado de la próxima semana...")
-        existing_schedule_raw = get_formatted_next_week_schedule()
-        if "Error:" in existing_schedule_raw:
-             logging.error(f"Fallo al obtener el calendario existente: {existing_schedule_raw}")
-             return f"Error al obtener el calendario existente: {existing_schedule_raw}"
-        logging.info("Calendario existente formateado obtenido.")
+    Returns:
+        list: Per-event results from `create_events_batch` (empty if nothing was parsed),
+              or the create operations in dry-run mode.
+    """
+    event_bodies = parse_schedule_events(schedule_string)
+    if dry_run:
+        logging.info(f"Dry run: {len(event_bodies)} eventos [PLAN] se crearían en '{target_calendar}'.")
+        return [{'op': OP_CREATE, 'event_id': None, 'summary': body['summary'], 'body': body} for body in event_bodies]
+    logging.info(f"Creando eventos [PLAN] en '{target_calendar}'.")
+    return _create_event_bodies(event_bodies, gc, target_calendar)
+
+
+INTEGRATOR_ASSISTANT = "schedule_integrator"
 
-        integrator_assistant_name = "schedule_integrator"
-        integration_prompt = f"""
+# Integrator output: 'json' asks for SCHEDULE_RESPONSE_SCHEMA (structured outputs) and renders
+# the Markdown locally; 'markdown' keeps the free-text answer parsed with regexes.
+INTEGRATOR_OUTPUT_JSON = "json"
+INTEGRATOR_OUTPUT_MARKDOWN = "markdown"
+
+STRUCTURED_OUTPUT_INSTRUCTION = """
+**FORMATO DE RESPUESTA:** En lugar de Markdown, responde con el JSON del esquema indicado: un elemento en `days` por cada día de la semana (Lunes a Domingo) con sus eventos existentes y nuevos en orden cronológico. Usa `start`/`end` en formato HH:MM, o null para eventos de todo el día. Marca con `planned: true` las actividades añadidas desde la planificación recomendada y no incluyas el prefijo [PLAN] en `summary`.
+"""
+
+def get_integrator_output_mode(output_mode: str = None) -> str:
+    """
+    Returns the integrator output mode: `output_mode` if given, otherwise
+    INTEGRATOR_OUTPUT_MODE, defaulting to 'json'.
+
+    Raises:
+        ValueError: If the mode is not 'json' or 'markdown'.
+    """
+    mode = (output_mode or os.getenv("INTEGRATOR_OUTPUT_MODE") or INTEGRATOR_OUTPUT_JSON).strip().lower()
+    if mode not in (INTEGRATOR_OUTPUT_JSON, INTEGRATOR_OUTPUT_MARKDOWN):
+        raise ValueError(f"Unknown integrator output mode '{mode}'. Options: json, markdown.")
+    return mode
+
+def build_integration_prompt(recommended_plan: str, existing_schedule_raw: str, structured: bool = False) -> str:
+    """
+    Builds the prompt for the schedule_integrator assistant from the plan and the formatted calendar.
+    With `structured`, the final instruction asks for the JSON schedule instead of Markdown.
+    """
+    return f"""
 **1. PLANIFICACIÓN SEMANAL RECOMENDADA:**
 
 {recommended_plan}
@@ -165,66 +249,217 @@ def generate_integrated_schedule():
 ---
 
 **INSTRUCCIÓN FINAL:** Por favor, integra la planificación recomendada en el calendario existente siguiendo las reglas especificadas en tu prompt base. Genera el calendario final detallado y aumentado.
-"""
-        logging.debug("Prompt preparado para el asistente integrador.")
+{STRUCTURED_OUTPUT_INSTRUCTION if structured else ""}"""
 
-        logging.info("Inicializando GPTClient para la integración final...")
-        gpt_client = GPTClient()
-        if integrator_assistant_name not in gpt_client.assistants:
-            error_msg = f"Error: Asistente integrador '{integrator_assistant_name}' no encontrado."
+def apply_schedule_to_calendar(final_integrated_schedule: Union[str, Schedule], target_calendar: str = DEFAULT_TARGET_CALENDAR,
+                               gc: GoogleCalendar = None, dry_run: bool = False):
+    """
+    Makes next week's events in the target calendar match the [PLAN] events of the
+    integrated schedule (the planned events of a structured `Schedule`, or the ones parsed
+    from a Markdown string). Only the needed inserts, patches and deletes are issued; see
+    `reconciler.reconcile_calendar`. Calendar errors are logged, not raised.
+    With `dry_run`, the calendar is only read and the report lists the planned 'operations'.
+
+    Returns:
+        dict: The reconciliation report ('created', 'updated', 'deleted', 'unchanged', 'failed'),
+              or None if the calendar interaction failed.
+    """
+    try:
+        if gc is None:
+            gc = get_google_calendar()
+
+        today = datetime.date.today()
+        days_until_monday = (0 - today.weekday() + 7) % 7
+        if days_until_monday == 0: days_until_monday = 7
+        next_monday = today + datetime.timedelta(days=days_until_monday)
+        next_sunday = next_monday + datetime.timedelta(days=6)
+        start_date_str = next_monday.strftime('%Y-%m-%d')
+        end_date_str = next_sunday.strftime('%Y-%m-%d')
+
+        # Eventos deseados: directamente desde el calendario estructurado, o parseando el Markdown
+        if isinstance(final_integrated_schedule, Schedule):
+            desired_bodies = schedule_event_bodies(final_integrated_schedule)
+        else:
+            desired_bodies = parse_schedule_events(final_integrated_schedule)
+
+        return reconcile_calendar(gc, desired_bodies, start_date_str, end_date_str,
+                                  calendar_target=target_calendar, tz=local_tz, dry_run=dry_run)
+
+    except Exception as cal_error:
+        logging.error(f"Error durante la interacción con Google Calendar (reconciliación): {cal_error}", exc_info=True)
+        return None
+
+class _StageFailed(Exception):
+    """A pipeline stage produced an error message instead of a result."""
+
+def _input_stages(gc: GoogleCalendar, gpt_client: GPTClient, calendars: list = None, week_events: tuple = None) -> list:
+    """
+    The two independent input stages: the recommended plan (expert assistants + planner)
+    and the formatted existing calendar (Calendar fetch + formatter) of `calendars`, or of
+    the already fetched `week_events`.
+    """
+    def weekly_plan():
+        logging.info("Iniciando la obtención de la planificación semanal recomendada...")
+        recommended_plan = get_weekly_plan()
+        if "Error:" in recommended_plan:
+            logging.error(f"Fallo al obtener la planificación recomendada: {recommended_plan}")
+            raise _StageFailed(f"Error al obtener la planificación recomendada: {recommended_plan}")
+        logging.info("Planificación semanal recomendada obtenida.")
+        return recommended_plan
+
+    def calendar_schedule():
+        logging.info("Iniciando la obtención del calendario formateado de la próxima semana...")
+        existing_schedule_raw = get_formatted_next_week_schedule(gc=gc, gpt_client=gpt_client, calendars=calendars,
+                                                                 week_events=week_events)
+        if "Error:" in existing_schedule_raw:
+             logging.error(f"Fallo al obtener el calendario existente: {existing_schedule_raw}")
+             raise _StageFailed(f"Error al obtener el calendario existente: {existing_schedule_raw}")
+        logging.info("Calendario existente formateado obtenido.")
+        return existing_schedule_raw
+
+    return [Stage('weekly_plan', weekly_plan), Stage('calendar_schedule', calendar_schedule)]
+
+@track_run("generate_integrated_schedule")
+def generate_integrated_schedule(timings: dict = None, gc: GoogleCalendar = None, gpt_client: GPTClient = None,
+                                 output_mode: str = None, dry_run: bool = False, calendars: list = None,
+                                 target_calendar: str = DEFAULT_TARGET_CALENDAR, week_events: tuple = None):
+    """
+    Runs the full pipeline as a DAG: the recommended plan and the formatted calendar
+    run concurrently, then the integration and the creation of the [PLAN] events in
+    Google Calendar. End-to-end latency is roughly the longer input branch plus the
+    integration, instead of the sum of both branches.
+
+    Args:
+        timings (dict, optional): If given, filled with the wall time in seconds of each
+            stage ('weekly_plan', 'calendar_schedule', 'integration', 'calendar_write').
+        gc (GoogleCalendar, optional): Calendar client. Defaults to the shared process-wide one.
+        gpt_client (GPTClient, optional): GPT client. Defaults to the shared process-wide one.
+        output_mode (str, optional): 'json' (structured output, the default) or 'markdown'.
+            Defaults to INTEGRATOR_OUTPUT_MODE.
+        dry_run (bool): If True, the calendar_write stage only computes the event operations
+            (create / update / delete, with payloads) and writes nothing to Google Calendar.
+        calendars (list, optional): Calendars that make up the existing schedule.
+            Defaults to calendar_processor.DEFAULT_CALENDARS_TO_INCLUDE.
+        target_calendar (str): Calendar where the [PLAN] events are written.
+        week_events (tuple, optional): Next week's events as already returned by
+            `calendar_processor.get_next_week_events`; if given, the calendar is not fetched again.
+
+    Returns:
+        str: The integrated schedule as Markdown, or an error message containing "Error".
+             In dry-run mode, a dict {'schedule': Markdown, 'operations': [...], 'summary': {...}}
+             instead of the Markdown string.
+    """
+    try:
+        if gpt_client is None:
+            gpt_client = get_gpt_client()
+        structured = get_integrator_output_mode(output_mode) == INTEGRATOR_OUTPUT_JSON
+        if INTEGRATOR_ASSISTANT not in gpt_client.assistants:
+            error_msg = f"Error: Asistente integrador '{INTEGRATOR_ASSISTANT}' no encontrado."
             logging.error(error_msg)
             return error_msg
-        logging.info(f"Consultando al asistente '{integrator_assistant_name}' para generar el calendario integrado...")
-        final_integrated_schedule = gpt_client.query(integrator_assistant_name, integration_prompt)
-        logging.info("Calendario integrado final recibido.")
-        # --- Change: Log the received schedule for inspection ---
-        logging.debug("===== CALENDARIO INTEGRADO FINAL (RECIBIDO DE GPT) =====")
-        logging.debug(final_integrated_schedule)
-        logging.debug("======================================================")
-        # --- End Change ---
 
-        try:
-            logging.info("Inicializando Google Calendar para la creación de eventos...")
-            gc = GoogleCalendar()
-
-            # ... (Borrado previo opcional - sin cambios, sigue comentado) ...
-            today = datetime.date.today()
-            days_until_monday = (0 - today.weekday() + 7) % 7
-            if days_until_monday == 0: days_until_monday = 7
-            next_monday = today + datetime.timedelta(days=days_until_monday)
-            next_sunday = next_monday + datetime.timedelta(days=6)
-            start_date_str = next_monday.strftime('%Y-%m-%d')
-            end_date_str = next_sunday.strftime('%Y-%m-%d')
-            # --- Change: Remove summary_prefix_filter to delete ALL events in range ---
-            logging.info(f"BORRADO ACTIVO: Borrando TODOS los eventos existentes en 'PersonalCoach' para la semana {start_date_str} a {end_date_str}...")
-            deleted_count = gc.delete_events_in_range(
-                start_date_str=start_date_str,
-                end_date_str=end_date_str,
-                calendar_target='PersonalCoach'
-                # summary_prefix_filter="[PLAN]" # REMOVED
-            )
-            logging.info(f"Se borraron {deleted_count} eventos existentes en el rango.")
+        def integration(weekly_plan, calendar_schedule):
+            integration_prompt = build_integration_prompt(weekly_plan, calendar_schedule, structured=structured)
+            logging.info(f"Consultando al asistente '{INTEGRATOR_ASSISTANT}' para generar el calendario integrado...")
+            if structured:
+                response = gpt_client.query(INTEGRATOR_ASSISTANT, integration_prompt,
+                                            response_schema=SCHEDULE_RESPONSE_SCHEMA)
+                if response.startswith("Error"):
+                    raise _StageFailed(f"Error al obtener el calendario integrado: {response}")
+                try:
+                    schedule = Schedule.from_json(response)
+                except ScheduleValidationError as e:
+                    raise _StageFailed(f"Error: el calendario integrado no es válido: {e}") from e
+                logging.info(f"Calendario integrado estructurado recibido ({len(schedule.days)} días).")
+                return schedule
+            final_integrated_schedule = gpt_client.query(INTEGRATOR_ASSISTANT, integration_prompt)
+            logging.info("Calendario integrado final recibido.")
+            # --- Change: Log the received schedule for inspection ---
+            logging.debug("===== CALENDARIO INTEGRADO FINAL (RECIBIDO DE GPT) =====")
+            logging.debug(final_integrated_schedule)
+            logging.debug("======================================================")
             # --- End Change ---
+            return final_integrated_schedule
+
+        def calendar_write(integration):
+            return apply_schedule_to_calendar(integration, target_calendar=target_calendar, gc=gc, dry_run=dry_run)
+
+        stages = _input_stages(gc, gpt_client, calendars, week_events) + [
+            Stage('integration', integration, depends_on=('weekly_plan', 'calendar_schedule')),
+            Stage('calendar_write', calendar_write, depends_on=('integration',)),
+        ]
+        results = run_dag(stages, timings=timings)
+        schedule = results['integration']
+        if isinstance(schedule, Schedule):
+            schedule = schedule.to_markdown()
+        if not dry_run:
+            return schedule
+
+        report = results['calendar_write']
+        if report is None:
+            return "Error: no se pudo calcular el plan de cambios en Google Calendar (dry run)."
+        if report.get('error'):
+            return f"Error: {report['error']}"
+        operations = report.pop('operations')
+        return {'schedule': schedule, 'operations': operations, 'summary': report}
+
+    except StageError as e:
+        if isinstance(e.__cause__, _StageFailed):
+            return str(e.__cause__)
+        logging.error(f"Error inesperado en la etapa '{e.stage}': {e.__cause__}", exc_info=True)
+        return f"Error inesperado durante la orquestación: {e.__cause__}"
+    except Exception as e:
+        logging.error(f"Error inesperado en el orquestador principal: {e}", exc_info=True)
+        return f"Error inesperado durante la orquestación: {e}"
 
+def stream_integrated_schedule(gc: GoogleCalendar = None, gpt_client: GPTClient = None, calendars: list = None,
+                               target_calendar: str = DEFAULT_TARGET_CALENDAR):
+    """
+    Streaming variant of `generate_integrated_schedule`: a generator that yields the
+    integrator's output in chunks as it arrives. Once the stream is complete, the
+    [PLAN] events are written to Google Calendar exactly as in the blocking version.
+    Partial JSON cannot be shown, so the stream always uses the Markdown output mode.
 
-            # Parsear el resultado y crear eventos
-            parse_and_create_events(final_integrated_schedule, gc, target_calendar='PersonalCoach')
+    Yields:
+        str: Consecutive fragments of the integrated schedule.
 
-        except Exception as cal_error:
-            logging.error(f"Error durante la interacción con Google Calendar (borrado/creación): {cal_error}", exc_info=True)
+    Raises:
+        RuntimeError: If the recommended plan or the existing calendar could not be obtained,
+                      or the integrator assistant is missing.
+    """
+    if gpt_client is None:
+        gpt_client = get_gpt_client()
+    if INTEGRATOR_ASSISTANT not in gpt_client.assistants:
+        raise RuntimeError(f"Error: Asistente integrador '{INTEGRATOR_ASSISTANT}' no encontrado.")
+    try:
+        inputs = run_dag(_input_stages(gc, gpt_client, calendars))
+    except StageError as e:
+        raise RuntimeError(str(e.__cause__)) from e.__cause__
 
-        return final_integrated_schedule
+    logging.info(f"Consultando al asistente '{INTEGRATOR_ASSISTANT}' en streaming...")
+    parts = []
+    integration_prompt = build_integration_prompt(inputs['weekly_plan'], inputs['calendar_schedule'])
+    for chunk in gpt_client.query_stream(INTEGRATOR_ASSISTANT, integration_prompt):
+        parts.append(chunk)
+        yield chunk
+    logging.info("Calendario integrado final recibido (streaming).")
 
-    except Exception as e:
-        logging.error(f"Error inesperado en el orquestador principal: {e}", exc_info=True)
-        return f"Error inesperado durante la orquestación: {e}"
+    apply_schedule_to_calendar("".join(parts), target_calendar=target_calendar, gc=gc)
 
 if __name__ == "__main__":
-    # ... (Llamada a generate_integrated_schedule y print final sin cambios) ...
+    # Uso: python main_orchestrator.py [--dry-run]
+    dry_run = "--dry-run" in sys.argv
     print("Iniciando el proceso de generación de calendario semanal integrado y creación de eventos...")
-    final_schedule = generate_integrated_schedule()
+    final_schedule = generate_integrated_schedule(dry_run=dry_run)
+    if dry_run and isinstance(final_schedule, dict):
+        print("\n===== CALENDARIO SEMANAL INTEGRADO FINAL (TEXTO) =====")
+        print(final_schedule['schedule'])
+        print("\n===== OPERACIONES (DRY RUN, NO SE ESCRIBIÓ NADA) =====")
+        for operation in final_schedule['operations']:
+            print(f"  {operation['op']:<6} {operation['event_id'] or '-':<30} {operation['summary']}")
+        print(f"Resumen: {final_schedule['summary']}")
+        sys.exit(0)
     print("\n===== CALENDARIO SEMANAL INTEGRADO FINAL (TEXTO) =====")
     print(final_schedule)
     print("======================================================")
-    print("\nNOTA: Los eventos marcados con [PLAN] deberían haber sido creados en el calendario 'PersonalCoach' de Google Calendar (si no hubo errores). Revisa los logs para detalles.")
-
+    print(f"\nNOTA: Los eventos marcados con [PLAN] deberían haber sido creados en el calendario '{DEFAULT_TARGET_CALENDAR}' de Google Calendar (si no hubo errores). Revisa los logs para detalles.")
@@ -0,0 +1,252 @@
+import contextvars
+import functools
+import logging
+import threading
+import time
+from collections import defaultdict
+
+# USD per million tokens: (input, cached input, output). Unknown models are costed at 0.
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+}
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+
+def estimate_cost(model: str, prompt_tokens: int, cached_tokens: int, completion_tokens: int) -> float:
+    """Estimated cost in USD of one call, billing cached prompt tokens at the cached rate."""
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        # Versioned names such as "gpt-4o-2024-08-06" are priced as their base model
+        prices = next((p for name, p in sorted(MODEL_PRICES.items(), key=lambda i: -len(i[0]))
+                       if model.startswith(name)), (0.0, 0.0, 0.0))
+    input_price, cached_price, output_price = prices
+    uncached = max(0, prompt_tokens - cached_tokens)
+    return (uncached * input_price + cached_tokens * cached_price + completion_tokens * output_price) / 1_000_000
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+class MetricsRegistry:
+    """
+    Minimal thread-safe store of counters, gauges and histograms, rendered in the
+    Prometheus text exposition format. Metric names are declared on first use.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}
+        self._types = {}
+        self._values = defaultdict(float)  # (name, labels) -> value, for counters and gauges
+        self._histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+        self._buckets = {}
+
+    def _declare(self, name: str, kind: str, help_text: str):
+        if name not in self._types:
+            self._types[name] = kind
+            self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1.0, help_text: str = "", **labels):
+        with self._lock:
+            self._declare(name, "counter", help_text)
+            self._values[(name, tuple(sorted(labels.items())))] += value
+
+    def set_gauge(self, name: str, value: float, help_text: str = "", **labels):
+        with self._lock:
+            self._declare(name, "gauge", help_text)
+            self._values[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name: str, value: float, help_text: str = "", buckets=LATENCY_BUCKETS, **labels):
+        with self._lock:
+            self._declare(name, "histogram", help_text)
+            self._buckets.setdefault(name, tuple(buckets))
+            bounds = self._buckets[name]
+            key = (name, tuple(sorted(labels.items())))
+            series = self._histograms.setdefault(key, [0] * len(bounds) + [0.0, 0])
+            for i, bound in enumerate(bounds):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> str:
+        """Returns every metric in the Prometheus text format (version 0.0.4)."""
+        with self._lock:
+            lines = []
+            for name in sorted(self._types):
+                lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {self._types[name]}")
+                if self._types[name] == "histogram":
+                    bounds = self._buckets[name]
+                    for (metric, labels), series in sorted(self._histograms.items()):
+                        if metric != name:
+                            continue
+                        for bound, count in zip(bounds, series):
+                            lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {count}")
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {series[-1]}")
+                        lines.append(f"{name}_sum{_format_labels(labels)} {series[-2]}")
+                        lines.append(f"{name}_count{_format_labels(labels)} {series[-1]}")
+                else:
+                    for (metric, labels), value in sorted(self._values.items()):
+                        if metric == name:
+                            lines.append(f"{name}{_format_labels(labels)} {value}")
+            return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class RunMetrics:
+    """Totals of the model calls made during one pipeline run (see `track_run`)."""
+
+    def __init__(self, name: str, parent: "RunMetrics" = None):
+        self.name = name
+        self.parent = parent
+        self.started_at = time.perf_counter()
+        self.duration = None
+        self.calls = 0
+        self.cache_hits = 0
+        self.errors = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, record: dict):
+        with self._lock:
+            self.calls += 1
+            self.cache_hits += record["status"] == "cache_hit"
+            self.errors += record["status"] == "error"
+            self.retries += record["retries"]
+            self.prompt_tokens += record["prompt_tokens"]
+            self.cached_tokens += record["cached_tokens"]
+            self.completion_tokens += record["completion_tokens"]
+            self.cost_usd += record["cost_usd"]
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "run": self.name,
+                "duration_s": round(self.duration if self.duration is not None else time.perf_counter() - self.started_at, 3),
+                "calls": self.calls,
+                "cache_hits": self.cache_hits,
+                "errors": self.errors,
+                "retries": self.retries,
+                "prompt_tokens": self.prompt_tokens,
+                "cached_tokens": self.cached_tokens,
+                "completion_tokens": self.completion_tokens,
+                "cost_usd": round(self.cost_usd, 6),
+            }
+
+
+# Run being measured in the current context. Propagated to pipeline stages and to the
+# async runtime with the rest of the context, so calls made there count towards it.
+_current_run = contextvars.ContextVar("current_run", default=None)
+
+
+def current_run() -> RunMetrics:
+    """Returns the innermost run being measured in this context, or None."""
+    return _current_run.get()
+
+
+def record_call(assistant: str, model: str, latency: float, usage: dict = None, status: str = "ok",
+                ttft: float = None, retries: int = 0) -> dict:
+    """
+    Records one model call in the process-wide registry and in every enclosing run.
+
+    Args:
+        assistant (str): Assistant name.
+        model (str): Model name.
+        latency (float): Wall time of the call in seconds.
+        usage (dict, optional): Token usage as returned by `GPTClient._record_usage`.
+        status (str): 'ok', 'error' or 'cache_hit'.
+        ttft (float, optional): Time to first token in seconds (streaming calls).
+        retries (int): Retries made before the final attempt.
+
+    Returns:
+        dict: The call record, including its estimated cost.
+    """
+    usage = usage or {}
+    record = {
+        "assistant": assistant,
+        "model": model,
+        "status": status,
+        "latency_s": latency,
+        "ttft_s": ttft,
+        "retries": retries,
+        "prompt_tokens": usage.get("prompt_tokens", 0),
+        "cached_tokens": usage.get("cached_tokens", 0),
+        "completion_tokens": usage.get("completion_tokens", 0),
+    }
+    record["cost_usd"] = estimate_cost(model, record["prompt_tokens"], record["cached_tokens"], record["completion_tokens"])
+
+    labels = {"assistant": assistant, "model": model}
+    registry.inc("gpt_requests_total", help_text="Model calls by outcome.", status=status, **labels)
+    registry.observe("gpt_request_latency_seconds", latency, help_text="Wall latency of model calls.", **labels)
+    if ttft is not None:
+        registry.observe("gpt_time_to_first_token_seconds", ttft, help_text="Time to first streamed token.", **labels)
+    for kind in ("prompt", "cached", "completion"):
+        if record[f"{kind}_tokens"]:
+            registry.inc("gpt_tokens_total", record[f"{kind}_tokens"], help_text="Tokens by type.", type=kind, **labels)
+    if retries:
+        registry.inc("gpt_retries_total", retries, help_text="Retried model call attempts.", **labels)
+    if record["cost_usd"]:
+        registry.inc("gpt_cost_usd_total", record["cost_usd"], help_text="Estimated model cost in USD.", **labels)
+
+    run = _current_run.get()
+    while run is not None:
+        run.add(record)
+        run = run.parent
+    logging.info(f"GPT call metrics: assistant='{assistant}' model='{model}' status={status} "
+                 f"latency={latency:.2f}s ttft={'-' if ttft is None else f'{ttft:.2f}s'} retries={retries} "
+                 f"cost=${record['cost_usd']:.4f}")
+    return record
+
+
+def _is_error_result(result) -> bool:
+    return isinstance(result, str) and result.startswith("Error")
+
+
+def track_run(name: str):
+    """
+    Decorator that measures a pipeline run: every model call made while the function
+    runs (including in stages and async tasks started from it) is added to the run's
+    totals, which are logged and exported when it finishes. Runs can be nested; calls
+    count towards every enclosing run. A returned string starting with "Error" counts
+    as a failed run.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            run = RunMetrics(name, parent=_current_run.get())
+            token = _current_run.set(run)
+            status = "error"
+            try:
+                result = func(*args, **kwargs)
+                status = "error" if _is_error_result(result) else "ok"
+                return result
+            finally:
+                _current_run.reset(token)
+                run.duration = time.perf_counter() - run.started_at
+                registry.inc("pipeline_runs_total", help_text="Pipeline runs by outcome.", pipeline=name, status=status)
+                registry.observe("pipeline_run_duration_seconds", run.duration,
+                                 help_text="Wall time of pipeline runs.", pipeline=name)
+                if run.cost_usd:
+                    registry.inc("pipeline_cost_usd_total", run.cost_usd,
+                                 help_text="Estimated model cost of pipeline runs in USD.", pipeline=name)
+                logging.info(f"Run metrics: {run.summary()}")
+        return wrapper
+    return decorator
@@ -0,0 +1,89 @@
+import concurrent.futures
+import contextvars
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Tuple
+
+
+@dataclass
+class Stage:
+    """
+    A pipeline step. `func` is called with the results of its dependencies as
+    keyword arguments named after them, e.g. `func(weekly_plan=..., calendar_schedule=...)`.
+    """
+    name: str
+    func: Callable[..., Any]
+    depends_on: Tuple[str, ...] = ()
+
+
+class StageError(Exception):
+    """A stage raised an exception. The original exception is available as `__cause__`."""
+
+    def __init__(self, stage: str, error: Exception):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+
+
+def run_dag(stages: list, timings: dict = None, max_workers: int = None) -> dict:
+    """
+    Runs the stages as a small DAG: every stage starts as soon as all of its
+    dependencies have finished, so independent stages run concurrently.
+
+    Args:
+        stages (list): The Stage objects. Names must be unique and dependencies must exist.
+        timings (dict, optional): Filled with each stage's wall time in seconds as it finishes.
+        max_workers (int, optional): Thread pool size. Defaults to the number of stages.
+
+    Returns:
+        dict: Maps each stage name to its result.
+
+    Raises:
+        ValueError: If the graph has unknown dependencies or a cycle.
+        StageError: If a stage raises. Stages not yet started are skipped.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        unknown = [dep for dep in stage.depends_on if dep not in by_name]
+        if unknown:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {unknown}")
+
+    results = {}
+    pending = dict(by_name)
+    running = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers or len(stages) or 1,
+                                               thread_name_prefix="stage") as executor:
+        while pending or running:
+            ready = [stage for stage in pending.values() if all(dep in results for dep in stage.depends_on)]
+            for stage in ready:
+                del pending[stage.name]
+                kwargs = {dep: results[dep] for dep in stage.depends_on}
+                # Each stage runs in a copy of the caller's context (logging/metrics context vars)
+                context = contextvars.copy_context()
+                future = executor.submit(context.run, _timed_call, stage.func, kwargs)
+                running[future] = stage.name
+                logging.info(f"Etapa '{stage.name}' iniciada.")
+
+            if not running:
+                raise ValueError(f"Dependency cycle between stages: {sorted(pending)}")
+
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    result, elapsed = future.result()
+                except Exception as e:
+                    for other in running:
+                        other.cancel()
+                    raise StageError(name, e) from e
+                results[name] = result
+                if timings is not None:
+                    timings[name] = round(elapsed, 3)
+                logging.info(f"Etapa '{name}' completada en {elapsed:.2f}s.")
+    return results
+
+
+def _timed_call(func, kwargs):
+    start = time.perf_counter()
+    result = func(**kwargs)
+    return result, time.perf_counter() - start
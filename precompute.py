@@ -0,0 +1,464 @@
+import datetime
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from dotenv import load_dotenv
+
+import metrics
+from calendar_processor import (FORMATTER_MODE_LOCAL, get_formatted_next_week_schedule, get_next_week_events,
+                                render_schedule_markdown, resolve_formatter_mode)
+from clients import get_google_calendar, get_gpt_client
+from main_orchestrator import apply_schedule_to_calendar, generate_integrated_schedule, get_integrator_output_mode
+
+# Archivo por defecto del almacén de resultados precalculados
+DEFAULT_PRECOMPUTE_DB = 'precomputed.db'
+# Tipos de resultado
+KIND_FORMATTED = 'formatted_schedule'
+KIND_SCHEDULE = 'integrated_schedule'
+# Cada cuánto el scheduler revisa si cambió el calendario de la próxima semana
+DEFAULT_CHECK_INTERVAL_SECONDS = 15 * 60
+# Momento semanal a partir del cual se genera la planificación de la semana siguiente: domingo 22:00
+DEFAULT_WEEKLY_RUN = (6, 22, 0)  # (weekday, hora, minuto)
+# Antigüedad máxima de un resultado servido sin regenerar (el scheduler lo renueva antes si hay cambios)
+DEFAULT_MAX_AGE_SECONDS = 24 * 3600
+# Las lecturas reutilizan los eventos sincronizados hace menos de esto en vez de sincronizar de nuevo
+DEFAULT_INPUTS_MAX_AGE_SECONDS = 60
+
+
+def _hash(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def _is_error(value) -> bool:
+    return isinstance(value, str) and value.startswith("Error")
+
+
+class StaleResultError(RuntimeError):
+    """El resultado guardado se calculó con entradas (eventos o prompts) distintas de las actuales."""
+
+
+@dataclass
+class PrecomputedResult:
+    """Un resultado precalculado, con la semana, el momento de generación y el hash de sus entradas."""
+    kind: str
+    week_start: str
+    generated_at: str
+    inputs_hash: str
+    value: Any
+    duration_s: float = 0.0
+
+    def age_seconds(self) -> float:
+        generated = datetime.datetime.fromisoformat(self.generated_at)
+        return (datetime.datetime.now(datetime.timezone.utc) - generated).total_seconds()
+
+    def to_dict(self) -> dict:
+        return {
+            "kind": self.kind,
+            "week_start": self.week_start,
+            "generated_at": self.generated_at,
+            "inputs_hash": self.inputs_hash,
+            "duration_s": self.duration_s,
+            "value": self.value,
+        }
+
+
+class PrecomputedStore:
+    """Almacén SQLite del último resultado de cada tipo por semana."""
+
+    def __init__(self, path: str = DEFAULT_PRECOMPUTE_DB):
+        """
+        Parámetros:
+           path: Ruta del archivo SQLite. Usar ':memory:' para un almacén temporal.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS results (
+                       kind TEXT NOT NULL,
+                       week_start TEXT NOT NULL,
+                       generated_at TEXT NOT NULL,
+                       inputs_hash TEXT NOT NULL,
+                       duration_s REAL NOT NULL,
+                       value TEXT NOT NULL,
+                       PRIMARY KEY (kind, week_start)
+                   )"""
+            )
+
+    def get(self, kind: str, week_start: str) -> Optional[PrecomputedResult]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT generated_at, inputs_hash, duration_s, value FROM results WHERE kind = ? AND week_start = ?",
+                (kind, week_start),
+            ).fetchone()
+        if row is None:
+            return None
+        return PrecomputedResult(kind, week_start, row[0], row[1], json.loads(row[3]), row[2])
+
+    def put(self, result: PrecomputedResult):
+        """Guarda un resultado y descarta los de semanas anteriores del mismo tipo."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (kind, week_start, generated_at, inputs_hash, duration_s, value) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (result.kind, result.week_start, result.generated_at, result.inputs_hash, result.duration_s,
+                 json.dumps(result.value, ensure_ascii=False, default=str)),
+            )
+            self._conn.execute("DELETE FROM results WHERE kind = ? AND week_start < ?", (result.kind, result.week_start))
+
+
+def _next_week_start(today: datetime.date = None) -> datetime.date:
+    """Lunes de la próxima semana, con el mismo criterio que calendar_processor (un lunes apunta al siguiente)."""
+    today = today or datetime.date.today()
+    return today + datetime.timedelta(days=(0 - today.weekday() + 7) % 7 or 7)
+
+
+class Precomputer:
+    """
+    Calcula y guarda el calendario formateado y la planificación integrada de la próxima
+    semana. Las lecturas comparan el resultado guardado con los eventos de la última
+    sincronización (a lo sumo una cada `inputs_max_age_seconds`, una petición incremental por
+    calendario) y lo devuelven si sus entradas siguen siendo las actuales y no supera
+    `max_age_seconds`; si no, lo calculan con esos mismos eventos y lo guardan. Si la
+    sincronización falla, las lecturas sirven lo último guardado sin comprobarlo.
+
+    La planificación se precalcula en modo dry run (sin escribir en Google Calendar): el
+    resultado guardado es el calendario integrado, que `apply_schedule` escribe después
+    sin volver a consultar a los asistentes.
+    """
+
+    def __init__(self, store: PrecomputedStore = None, gc=None, gpt_client=None,
+                 max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS,
+                 inputs_max_age_seconds: float = DEFAULT_INPUTS_MAX_AGE_SECONDS):
+        """
+        Parámetros:
+           store: Almacén de resultados. Por defecto PRECOMPUTE_DB_PATH o DEFAULT_PRECOMPUTE_DB.
+           gc, gpt_client: Clientes a usar. Por defecto, los compartidos del proceso.
+           max_age_seconds: Antigüedad máxima de un resultado servido sin regenerar.
+           inputs_max_age_seconds: Antigüedad máxima de los eventos sincronizados con los que
+                                   las lecturas comprueban lo guardado.
+        """
+        self.store = store or PrecomputedStore(os.getenv("PRECOMPUTE_DB_PATH") or DEFAULT_PRECOMPUTE_DB)
+        self._gc = gc
+        self._gpt_client = gpt_client
+        self.max_age_seconds = max_age_seconds
+        self.inputs_max_age_seconds = inputs_max_age_seconds
+        # Última sincronización: (time.monotonic() al terminarla, entradas de calendar_inputs)
+        self._last_inputs = None
+        self._inputs_lock = threading.Lock()
+        # Un cálculo a la vez por tipo: las peticiones concurrentes esperan y reutilizan el resultado
+        self._locks = {KIND_FORMATTED: threading.Lock(), KIND_SCHEDULE: threading.Lock()}
+
+    @property
+    def gc(self):
+        return self._gc or get_google_calendar()
+
+    @property
+    def gpt_client(self):
+        return self._gpt_client or get_gpt_client()
+
+    def _prompts_hash(self) -> str:
+        return _hash(self.gpt_client.prompts.hashes())
+
+    def calendar_inputs(self):
+        """
+        Sincroniza y lee los eventos de la próxima semana.
+
+        Returns:
+            tuple: (eventos por día, lunes, domingo, hash de los eventos).
+        """
+        events_data, next_monday, next_sunday = get_next_week_events(self.gc)
+        inputs = events_data, next_monday, next_sunday, _hash(events_data)
+        with self._inputs_lock:
+            self._last_inputs = (time.monotonic(), inputs)
+        return inputs
+
+    def recent_inputs(self):
+        """
+        Las entradas de `calendar_inputs`, reutilizando las de la última sincronización si
+        tiene menos de inputs_max_age_seconds.
+
+        Returns:
+            tuple: Como `calendar_inputs`, o None si hacía falta sincronizar y falló.
+        """
+        with self._inputs_lock:
+            last = self._last_inputs
+        if last is not None and time.monotonic() - last[0] <= self.inputs_max_age_seconds:
+            return last[1]
+        try:
+            return self.calendar_inputs()
+        except Exception as e:
+            logging.warning(f"No se pudo sincronizar el calendario para comprobar lo precalculado: {e}")
+            metrics.registry.inc("precompute_sync_errors_total",
+                                 help_text="Failed calendar syncs when checking precomputed results.")
+            return None
+
+    def is_fresh(self, result: Optional[PrecomputedResult]) -> bool:
+        """Indica si un resultado guardado no supera max_age_seconds."""
+        return result is not None and result.age_seconds() <= self.max_age_seconds
+
+    def is_current(self, result: Optional[PrecomputedResult], inputs_hash: str) -> bool:
+        """Indica si un resultado guardado puede servirse: no supera max_age_seconds y sus entradas son las actuales."""
+        return self.is_fresh(result) and result.inputs_hash == inputs_hash
+
+    def _serve(self, kind: str, key_kind: str, inputs_hash, compute, refresh: bool) -> PrecomputedResult:
+        # Sin el scheduler nada más invalida lo guardado: se compara con el calendario reciente
+        inputs = self.recent_inputs()
+        if inputs is None:
+            # Sin calendario no se puede comprobar ni recalcular: se sirve lo último guardado
+            stored = self.store.get(key_kind, _next_week_start().isoformat())
+            if refresh or stored is None:
+                raise RuntimeError("No se pudo sincronizar el calendario de la próxima semana.")
+            metrics.registry.inc("precompute_served_total", help_text="Precomputed results served, by source.",
+                                 kind=kind, source="unverified")
+            return stored
+        week_start = inputs[1].isoformat()
+        expected_hash = inputs_hash(inputs[3])
+        if not refresh:
+            stored = self.store.get(key_kind, week_start)
+            if self.is_current(stored, expected_hash):
+                metrics.registry.inc("precompute_served_total", help_text="Precomputed results served, by source.",
+                                     kind=kind, source="stored")
+                return stored
+        with self._locks[kind]:
+            stored = self.store.get(key_kind, week_start)
+            if not refresh and self.is_current(stored, expected_hash):
+                # Otro hilo lo calculó mientras esperábamos
+                return stored
+            if refresh:
+                trigger = "refresh"
+            else:
+                trigger = "change" if stored is not None and stored.inputs_hash != expected_hash else "miss"
+            result = compute(trigger, inputs)
+        metrics.registry.inc("precompute_served_total", help_text="Precomputed results served, by source.",
+                             kind=kind, source="computed")
+        return result
+
+    def _store(self, kind: str, key_kind: str, week_start: datetime.date, inputs_hash: str, value, started: float,
+               trigger: str) -> PrecomputedResult:
+        if _is_error(value):
+            # Los errores no se guardan: la próxima lectura vuelve a intentarlo
+            raise RuntimeError(value)
+        result = PrecomputedResult(
+            kind=key_kind,
+            week_start=week_start.isoformat(),
+            generated_at=datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            inputs_hash=inputs_hash,
+            value=value,
+            duration_s=round(time.perf_counter() - started, 3),
+        )
+        self.store.put(result)
+        metrics.registry.inc("precompute_runs_total", help_text="Precomputations by result kind and trigger.",
+                             kind=kind, trigger=trigger)
+        logging.info(f"Precalculado '{key_kind}' de la semana {result.week_start} en {result.duration_s:.1f}s ({trigger}).")
+        return result
+
+    # --- Calendario formateado ---
+
+    def _formatted_inputs_hash(self, events_hash: str, mode: str) -> str:
+        # El formateo local no depende de los prompts de los asistentes
+        if mode == FORMATTER_MODE_LOCAL:
+            return _hash([events_hash, mode])
+        return _hash([events_hash, mode, self._prompts_hash()])
+
+    def _compute_formatted(self, mode: str, trigger: str, inputs=None) -> PrecomputedResult:
+        started = time.perf_counter()
+        events_data, next_monday, next_sunday, events_hash = inputs or self.calendar_inputs()
+        # Se formatean los mismos eventos de los que sale el hash, sin volver a consultar el calendario
+        if mode == FORMATTER_MODE_LOCAL:
+            value = render_schedule_markdown(events_data, next_monday, next_sunday)
+        else:
+            value = get_formatted_next_week_schedule(gc=self.gc, gpt_client=self.gpt_client, mode=mode,
+                                                     week_events=(events_data, next_monday, next_sunday))
+        return self._store(KIND_FORMATTED, f"{KIND_FORMATTED}:{mode}", next_monday,
+                           self._formatted_inputs_hash(events_hash, mode), value, started, trigger)
+
+    def formatted_schedule(self, mode: str = None, refresh: bool = False) -> PrecomputedResult:
+        """
+        Calendario formateado de la próxima semana (ver `get_formatted_next_week_schedule`).
+
+        Raises:
+            RuntimeError: Si no se pudo generar.
+        """
+        mode = resolve_formatter_mode(mode)
+        return self._serve(KIND_FORMATTED, f"{KIND_FORMATTED}:{mode}",
+                           lambda events_hash: self._formatted_inputs_hash(events_hash, mode),
+                           lambda trigger, inputs: self._compute_formatted(mode, trigger, inputs), refresh)
+
+    # --- Planificación integrada ---
+
+    def _schedule_inputs_hash(self, events_hash: str) -> str:
+        return _hash([events_hash, get_integrator_output_mode(None), self._prompts_hash()])
+
+    def _compute_schedule(self, trigger: str, inputs=None, timings: dict = None) -> PrecomputedResult:
+        started = time.perf_counter()
+        events_data, next_monday, next_sunday, events_hash = inputs or self.calendar_inputs()
+        output = generate_integrated_schedule(timings=timings, gc=self.gc, gpt_client=self.gpt_client, dry_run=True,
+                                              week_events=(events_data, next_monday, next_sunday))
+        value = output if isinstance(output, str) else {'schedule': output['schedule'], 'summary': output['summary']}
+        return self._store(KIND_SCHEDULE, KIND_SCHEDULE, next_monday, self._schedule_inputs_hash(events_hash),
+                           value, started, trigger)
+
+    def integrated_schedule(self, refresh: bool = False, timings: dict = None) -> PrecomputedResult:
+        """
+        Planificación integrada de la próxima semana ({'schedule': Markdown, 'summary': cambios
+        previstos en Google Calendar}), calculada en modo dry run.
+
+        Raises:
+            RuntimeError: Si no se pudo generar.
+        """
+        return self._serve(KIND_SCHEDULE, KIND_SCHEDULE, self._schedule_inputs_hash,
+                           lambda trigger, inputs: self._compute_schedule(trigger, inputs, timings=timings), refresh)
+
+    def stored_schedule(self) -> Optional[PrecomputedResult]:
+        """La planificación guardada de la próxima semana, sin calcularla, o None."""
+        return self.store.get(KIND_SCHEDULE, _next_week_start().isoformat())
+
+    def current_schedule(self, allow_unverified: bool = False) -> PrecomputedResult:
+        """
+        La planificación guardada de la próxima semana, comprobando antes (con los eventos de
+        `recent_inputs`) que se calculó con el calendario y los prompts actuales.
+
+        Args:
+            allow_unverified: Si la sincronización falla, retornarla sin comprobar (para lecturas).
+
+        Raises:
+            LookupError: Si no hay planificación guardada para la próxima semana.
+            StaleResultError: Si sus entradas ya no son las actuales; hay que regenerarla.
+            RuntimeError: Si no se pudo sincronizar el calendario y no se permite sin comprobar.
+        """
+        stored = self.stored_schedule()
+        if stored is None:
+            raise LookupError("No hay una planificación precalculada para la próxima semana.")
+        inputs = self.recent_inputs()
+        if inputs is None:
+            if allow_unverified:
+                return stored
+            raise RuntimeError("No se pudo sincronizar el calendario para comprobar la planificación precalculada.")
+        if stored.week_start != inputs[1].isoformat() or stored.inputs_hash != self._schedule_inputs_hash(inputs[3]):
+            raise StaleResultError("La planificación precalculada está desactualizada: el calendario o los "
+                                   "prompts cambiaron desde que se generó. Regenérala con ?refresh=true.")
+        return stored
+
+    def apply_schedule(self, timings: dict = None):
+        """
+        Escribe en Google Calendar la planificación guardada de la próxima semana (reconciliación,
+        sin consultar a los asistentes). Retorna el reporte de `apply_schedule_to_calendar`.
+
+        Raises:
+            LookupError: Si no hay planificación guardada para la próxima semana.
+            StaleResultError: Si la planificación guardada ya no corresponde al calendario actual.
+            RuntimeError: Si no se pudo sincronizar el calendario para comprobarlo.
+        """
+        stored = self.current_schedule()
+        return apply_schedule_to_calendar(stored.value['schedule'], gc=self.gc)
+
+    # --- Usado por el scheduler ---
+
+    def refresh_if_changed(self, generate_schedule: bool = False) -> dict:
+        """
+        Regenera lo que quedó desactualizado respecto del calendario actual: el calendario
+        formateado (modo por defecto) si cambiaron los eventos, y la planificación si ya
+        existía y cambiaron sus entradas, o si no existe y `generate_schedule` es True.
+
+        Returns:
+            dict: {'formatted': bool, 'schedule': bool} indicando qué se regeneró.
+        """
+        refreshed = {'formatted': False, 'schedule': False}
+        inputs = self.calendar_inputs()
+        week_start = inputs[1].isoformat()
+
+        mode = resolve_formatter_mode()
+        with self._locks[KIND_FORMATTED]:
+            stored = self.store.get(f"{KIND_FORMATTED}:{mode}", week_start)
+            if stored is None or stored.inputs_hash != self._formatted_inputs_hash(inputs[3], mode):
+                self._compute_formatted(mode, "change" if stored else "scheduled", inputs)
+                refreshed['formatted'] = True
+
+        with self._locks[KIND_SCHEDULE]:
+            stored = self.store.get(KIND_SCHEDULE, week_start)
+            changed = stored is not None and stored.inputs_hash != self._schedule_inputs_hash(inputs[3])
+            if changed or (stored is None and generate_schedule):
+                self._compute_schedule("change" if changed else "scheduled", inputs)
+                refreshed['schedule'] = True
+        return refreshed
+
+
+def _weekly_slot(week_start: datetime.date, weekly_run=DEFAULT_WEEKLY_RUN) -> datetime.datetime:
+    """Momento (hora local) desde el cual se genera la planificación de la semana que empieza en week_start."""
+    weekday, hour, minute = weekly_run
+    previous_monday = week_start - datetime.timedelta(days=7)
+    return datetime.datetime.combine(previous_monday + datetime.timedelta(days=weekday), datetime.time(hour, minute))
+
+
+class PrecomputeScheduler:
+    """
+    Hilo en segundo plano que mantiene precalculados los resultados de la próxima semana:
+    cada `check_interval` segundos sincroniza el calendario y regenera lo que cambió, y
+    desde el momento semanal (domingo 22:00 por defecto) genera la planificación si falta.
+    """
+
+    def __init__(self, precomputer: Precomputer, check_interval: float = DEFAULT_CHECK_INTERVAL_SECONDS,
+                 weekly_run=DEFAULT_WEEKLY_RUN):
+        self.precomputer = precomputer
+        self.check_interval = check_interval
+        self.weekly_run = weekly_run
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="precompute", daemon=True)
+            self._thread.start()
+            logging.info(f"Scheduler de precálculo iniciado (revisión cada {self.check_interval:.0f}s).")
+
+    def stop(self):
+        self._stop.set()
+
+    def run_once(self) -> dict:
+        """Una revisión: regenera lo desactualizado. Los errores se registran y no detienen el scheduler."""
+        schedule_due = datetime.datetime.now() >= _weekly_slot(_next_week_start(), self.weekly_run)
+        try:
+            return self.precomputer.refresh_if_changed(generate_schedule=schedule_due)
+        except Exception as e:
+            logging.error(f"Error en el precálculo programado: {e}", exc_info=True)
+            metrics.registry.inc("precompute_errors_total", help_text="Failed scheduled precomputations.")
+            return {'formatted': False, 'schedule': False, 'error': str(e)}
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.check_interval)
+
+
+def scheduler_from_env(precomputer: Precomputer) -> Optional[PrecomputeScheduler]:
+    """
+    Crea el scheduler si PRECOMPUTE_ENABLED está activado, con PRECOMPUTE_CHECK_SECONDS como
+    intervalo de revisión y PRECOMPUTE_WEEKLY_AT ('<weekday 0-6> HH:MM', por defecto '6 22:00').
+    """
+    load_dotenv()
+    if (os.getenv("PRECOMPUTE_ENABLED") or "").strip().lower() not in ("1", "true", "yes", "on"):
+        return None
+    weekly_run = DEFAULT_WEEKLY_RUN
+    weekly_at = (os.getenv("PRECOMPUTE_WEEKLY_AT") or "").strip()
+    if weekly_at:
+        try:
+            weekday, hour_minute = weekly_at.split()
+            hour, minute = hour_minute.split(":")
+            weekly_run = (int(weekday) % 7, int(hour), int(minute))
+        except ValueError:
+            raise ValueError(f"PRECOMPUTE_WEEKLY_AT debe tener la forma '<weekday 0-6> HH:MM', no '{weekly_at}'.") from None
+    return PrecomputeScheduler(
+        precomputer,
+        check_interval=float(os.getenv("PRECOMPUTE_CHECK_SECONDS", DEFAULT_CHECK_INTERVAL_SECONDS)),
+        weekly_run=weekly_run,
+    )
@@ -0,0 +1,159 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+DEFAULT_ASSISTANTS_DIR = "asistentes"
+# Minimum seconds between two scans of the directory for changed files
+DEFAULT_CHECK_INTERVAL_SECONDS = 2.0
+
+
+@dataclass(frozen=True)
+class PromptEntry:
+    """An assistant prompt as loaded from `<directory>/<name>.md`."""
+    name: str
+    path: str
+    content: str
+    sha256: str
+    mtime_ns: int
+    size: int
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.sha256[:32]}"'
+
+
+class PromptRegistry:
+    """
+    In-memory registry of the assistant prompts of a directory. Files are read once and
+    kept with the SHA-256 of their (stripped) content; afterwards the directory is
+    re-scanned at most every `check_interval` seconds and only files whose mtime or size
+    changed are read again. Added and removed files are picked up by the same scan.
+    """
+
+    def __init__(self, directory: str = DEFAULT_ASSISTANTS_DIR, check_interval: float = DEFAULT_CHECK_INTERVAL_SECONDS):
+        self.directory = directory
+        self.check_interval = check_interval
+        self._entries: Dict[str, PromptEntry] = {}
+        self._contents: Dict[str, str] = {}  # name -> content, replaced (not mutated) on every change
+        self._lock = threading.Lock()
+        self._checked_at = None
+        self.reloads = 0
+        self.refresh(force=True)
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Re-scans the directory if `check_interval` has passed (or `force`), re-reading
+        new and modified files. Returns True if any prompt was added, changed or removed.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._checked_at is not None and now - self._checked_at < self.check_interval:
+                return False
+            self._checked_at = now
+
+            if not os.path.isdir(self.directory):
+                had_entries = bool(self._entries)
+                if had_entries or force:
+                    logging.warning(f"Assistants directory '{self.directory}' not found. No assistants loaded.")
+                self._entries, self._contents = {}, {}
+                return had_entries
+
+            entries = {}
+            changed = False
+            try:
+                with os.scandir(self.directory) as scan:
+                    files = [f for f in scan if f.name.endswith(".md") and f.is_file()]
+            except OSError as e:
+                logging.error(f"Error listing files in assistants directory '{self.directory}': {e}")
+                return False
+            for file in files:
+                name = os.path.splitext(file.name)[0]
+                stat = file.stat()
+                current = self._entries.get(name)
+                if current is not None and current.mtime_ns == stat.st_mtime_ns and current.size == stat.st_size:
+                    entries[name] = current
+                    continue
+                entry = self._read(name, file.path, stat)
+                if entry is None:
+                    if current is not None:
+                        entries[name] = current
+                    continue
+                entries[name] = entry
+                if current is None:
+                    changed = True
+                    logging.debug(f"Loaded assistant '{name}' from {file.name}")
+                elif current.sha256 != entry.sha256:
+                    changed = True
+                    logging.info(f"Reloaded assistant prompt '{name}' (content changed).")
+            if set(entries) != set(self._entries):
+                changed = True
+            if changed:
+                self.reloads += 1
+                self._contents = {name: entry.content for name, entry in entries.items()}
+            self._entries = entries
+            return changed
+
+    @staticmethod
+    def _read(name: str, path: str, stat) -> Optional[PromptEntry]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                content = f.read().strip()
+        except Exception as e:
+            logging.error(f"Error reading assistant file {path}: {e}")
+            return None
+        return PromptEntry(
+            name=name,
+            path=path,
+            content=content,
+            sha256=hashlib.sha256(content.encode("utf-8")).hexdigest(),
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+        )
+
+    def get(self, name: str) -> Optional[PromptEntry]:
+        """Returns the prompt entry of an assistant, or None if there is no such file."""
+        self.refresh()
+        return self._entries.get(name)
+
+    def contents(self) -> Dict[str, str]:
+        """
+        Returns {assistant name: prompt}. The dict is shared and replaced as a whole when a
+        prompt changes, so callers must not modify it.
+        """
+        self.refresh()
+        return self._contents
+
+    def content_hash(self, name: str) -> str:
+        """
+        SHA-256 of an assistant's prompt, usable as a cache key component.
+
+        Raises:
+            KeyError: If the assistant does not exist.
+        """
+        entry = self.get(name)
+        if entry is None:
+            raise KeyError(name)
+        return entry.sha256
+
+    def hashes(self) -> Dict[str, str]:
+        """Returns {assistant name: SHA-256 of its prompt}."""
+        self.refresh()
+        return {name: entry.sha256 for name, entry in self._entries.items()}
+
+
+_registries: Dict[str, PromptRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_prompt_registry(directory: str = DEFAULT_ASSISTANTS_DIR) -> PromptRegistry:
+    """Returns the process-wide registry of a directory, creating it on first use."""
+    key = os.path.abspath(directory)
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = _registries[key] = PromptRegistry(directory)
+        return registry
@@ -0,0 +1,201 @@
+import datetime
+import logging
+from collections import defaultdict
+
+from calendar_google import GoogleCalendar, RECONCILE_LIST_FIELDS
+
+# Operaciones de un plan de reconciliación
+OP_CREATE = "create"
+OP_UPDATE = "update"
+OP_DELETE = "delete"
+
+# Campos que se actualizan con PATCH si el evento coincide por clave pero difiere en ellos
+_PATCHABLE_FIELDS = ("description", "location")
+
+
+def _wall_clock(value: str, tz=None) -> datetime.datetime:
+    """Parses an RFC3339 dateTime into a naive wall-clock datetime, converted to `tz` if it is aware."""
+    dt = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if dt.tzinfo is not None and tz is not None:
+        dt = dt.astimezone(tz)
+    return dt.replace(tzinfo=None)
+
+
+def event_key(event: dict, tz=None) -> tuple:
+    """
+    Stable content key of an event: (date, start HH:MM, end HH:MM, summary). Times are
+    compared as wall-clock times in `tz`, so the same event matches whether its dateTime
+    carries the calendar's offset or the local one. All-day events have empty times.
+    """
+    start = event.get('start', {})
+    end = event.get('end', {})
+    summary = (event.get('summary') or '').strip()
+    if 'dateTime' not in start:
+        return (start.get('date', ''), '', '', summary)
+    start_dt = _wall_clock(start['dateTime'], tz)
+    end_dt = _wall_clock(end.get('dateTime', start['dateTime']), tz)
+    return (start_dt.date().isoformat(), start_dt.strftime('%H:%M'), end_dt.strftime('%H:%M'), summary)
+
+
+def _field(event: dict, name: str) -> str:
+    return (event.get(name) or '').strip()
+
+
+def _changed_fields(current: dict, desired: dict, names) -> dict:
+    return {name: desired.get(name) for name in names if _field(current, name) != _field(desired, name)}
+
+
+def _operation(op: str, event_id=None, summary=None, body=None) -> dict:
+    return {'op': op, 'event_id': event_id, 'summary': summary, 'body': body}
+
+
+def plan_reconciliation(current_events: list, desired_bodies: list, tz=None) -> list:
+    """
+    Computes the operations that turn `current_events` into `desired_bodies`.
+
+    Events are first paired by `event_key`; a pair whose description or location differs
+    becomes a PATCH of those fields. Remaining events with the same date and summary are
+    paired next and become a PATCH of their times, instead of a delete plus an insert.
+    Everything else is an insert (desired only) or a delete (current only).
+
+    Args:
+        current_events (list): Events currently in the calendar (with 'id').
+        desired_bodies (list): Event bodies as built by `GoogleCalendar.build_event_body`.
+        tz (tzinfo, optional): Timezone in which times are compared.
+
+    Returns:
+        list: Operations {'op': 'create' | 'update' | 'delete', 'event_id', 'summary', 'body'},
+              where 'body' is the full body to insert or the partial body to patch.
+    """
+    operations = []
+    unchanged = 0
+
+    current_by_key = defaultdict(list)
+    for event in current_events:
+        current_by_key[event_key(event, tz)].append(event)
+
+    unmatched_desired = []
+    for body in desired_bodies:
+        candidates = current_by_key.get(event_key(body, tz))
+        if not candidates:
+            unmatched_desired.append(body)
+            continue
+        current = candidates.pop(0)
+        patch = _changed_fields(current, body, _PATCHABLE_FIELDS)
+        if patch:
+            operations.append(_operation(OP_UPDATE, current['id'], body.get('summary'), patch))
+        else:
+            unchanged += 1
+
+    # Segunda pasada: mismo día y título, distinto horario -> PATCH de start/end
+    leftover_by_day = defaultdict(list)
+    for events in current_by_key.values():
+        for event in events:
+            date, _, _, summary = event_key(event, tz)
+            leftover_by_day[(date, summary)].append(event)
+
+    for body in unmatched_desired:
+        date, _, _, summary = event_key(body, tz)
+        candidates = leftover_by_day.get((date, summary))
+        if candidates and 'dateTime' in candidates[0].get('start', {}):
+            current = candidates.pop(0)
+            patch = dict(_changed_fields(current, body, _PATCHABLE_FIELDS), start=body['start'], end=body['end'])
+            operations.append(_operation(OP_UPDATE, current['id'], body.get('summary'), patch))
+        else:
+            operations.append(_operation(OP_CREATE, None, body.get('summary'), body))
+
+    for events in leftover_by_day.values():
+        for event in events:
+            operations.append(_operation(OP_DELETE, event['id'], event.get('summary')))
+
+    logging.info(f"Plan de reconciliación: {summarize_operations(operations)} (sin cambios: {unchanged}).")
+    return operations
+
+
+def summarize_operations(operations: list) -> dict:
+    """Counts the operations of a plan by type."""
+    counts = {OP_CREATE: 0, OP_UPDATE: 0, OP_DELETE: 0}
+    for operation in operations:
+        counts[operation['op']] += 1
+    return counts
+
+
+def apply_operations(gc: GoogleCalendar, calendar_id: str, operations: list) -> dict:
+    """
+    Applies a reconciliation plan with batched calls: inserts and patches first, deletes
+    last, so the calendar never lacks the desired events while the run is in progress.
+
+    Returns:
+        dict: {'created': int, 'updated': int, 'deleted': int,
+               'failed': [{'op', 'event_id', 'summary', 'error'}, ...]}
+    """
+    creates = [op for op in operations if op['op'] == OP_CREATE]
+    updates = [op for op in operations if op['op'] == OP_UPDATE]
+    deletes = [op for op in operations if op['op'] == OP_DELETE]
+    report = {'created': 0, 'updated': 0, 'deleted': 0, 'failed': []}
+
+    for op, r in zip(creates, gc.create_events_batch([op['body'] for op in creates], calendar_target=calendar_id)):
+        if r['error']:
+            report['failed'].append({'op': OP_CREATE, 'event_id': None, 'summary': op['summary'], 'error': r['error']})
+        else:
+            report['created'] += 1
+
+    for op, r in zip(updates, gc.patch_events_batch([(op['event_id'], op['body']) for op in updates], calendar_id)):
+        if r['error']:
+            report['failed'].append({'op': OP_UPDATE, 'event_id': op['event_id'], 'summary': op['summary'], 'error': r['error']})
+        else:
+            report['updated'] += 1
+
+    if deletes:
+        delete_result = gc.delete_events_batch([op['event_id'] for op in deletes], calendar_id)
+        report['deleted'] = len(delete_result['deleted'])
+        summaries = {op['event_id']: op['summary'] for op in deletes}
+        for failure in delete_result['failed']:
+            report['failed'].append({'op': OP_DELETE, 'event_id': failure['id'],
+                                     'summary': summaries.get(failure['id']), 'error': failure['error']})
+    return report
+
+
+def reconcile_calendar(gc: GoogleCalendar, desired_bodies: list, start_date_str: str, end_date_str: str,
+                       calendar_target: str = 'PersonalCoach', tz=None, dry_run: bool = False) -> dict:
+    """
+    Makes the events of `calendar_target` between two dates ('YYYY-MM-DD', inclusive)
+    match `desired_bodies`, issuing only the inserts, patches and deletes that are needed.
+    Every event in the range is considered managed by the plan.
+
+    With `dry_run`, the current events are still read but nothing is written: the report
+    counts the operations that would be applied and lists them under 'operations'.
+
+    Returns:
+        dict: The report of `apply_operations` plus 'unchanged' (events left as they were).
+              Includes an 'error' message if the calendar could not be found.
+    """
+    report = {'created': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0, 'failed': []}
+    calendar_id = gc.resolve_calendar_id(calendar_target)
+    if not calendar_id:
+        logging.error(f"No se encontró el calendario '{calendar_target}'. Reconciliación cancelada.")
+        return dict(report, error=f"Calendar '{calendar_target}' not found.")
+
+    start_dt = datetime.datetime.strptime(start_date_str, '%Y-%m-%d')
+    end_dt = datetime.datetime.strptime(end_date_str, '%Y-%m-%d')
+    time_min = start_dt.isoformat() + 'Z'
+    time_max = end_dt.replace(hour=23, minute=59, second=59).isoformat() + 'Z'
+    current_events = list(gc.iter_events(calendar_id, time_min, time_max, fields=RECONCILE_LIST_FIELDS))
+    logging.info(f"Reconciliando '{calendar_target}' ({start_date_str} a {end_date_str}): "
+                 f"{len(current_events)} eventos actuales, {len(desired_bodies)} deseados.")
+
+    operations = plan_reconciliation(current_events, desired_bodies, tz=tz)
+    touched = {op['event_id'] for op in operations if op['event_id']}
+    report['unchanged'] = len(current_events) - len(touched)
+    if dry_run:
+        counts = summarize_operations(operations)
+        report.update(created=counts[OP_CREATE], updated=counts[OP_UPDATE], deleted=counts[OP_DELETE],
+                      dry_run=True, operations=operations)
+        logging.info(f"Dry run en '{calendar_target}': {counts} (no se escribió nada).")
+        return report
+    report.update(apply_operations(gc, calendar_id, operations))
+
+    logging.info(f"Reconciliación completada en '{calendar_target}': {report['created']} creados, "
+                 f"{report['updated']} actualizados, {report['deleted']} borrados, "
+                 f"{report['unchanged']} sin cambios, {len(report['failed'])} fallidos.")
+    return report
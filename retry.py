@@ -0,0 +1,143 @@
+import asyncio
+import email.utils
+import logging
+import random
+import time
+from dataclasses import dataclass
+
+import metrics
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter: before retry n (1-based) the caller sleeps a
+    random time in [0, min(max_delay, base_delay * 2**(n-1))], or the server's
+    Retry-After if it asks for longer. No attempt starts once `total_budget` seconds
+    have passed since the first one, and each attempt gets at most `attempt_timeout`
+    seconds (less if the budget is about to run out).
+    """
+    max_attempts: int = 5
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+    attempt_timeout: float = 60.0
+    total_budget: float = 180.0
+
+    def backoff(self, retry_number: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry_number - 1)))
+
+
+# Model calls are long; Calendar calls are short but hit per-user rate limits
+OPENAI_RETRY_POLICY = RetryPolicy(max_attempts=4, base_delay=1.0, max_delay=30.0, attempt_timeout=120.0, total_budget=300.0)
+CALENDAR_RETRY_POLICY = RetryPolicy(max_attempts=5, base_delay=0.5, max_delay=16.0, attempt_timeout=30.0, total_budget=90.0)
+
+
+def parse_retry_after(value) -> float:
+    """
+    Parses a Retry-After header (seconds or an HTTP date) into seconds to wait.
+    Returns None if it is missing or unparseable.
+    """
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+        return max(0.0, when.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _Attempts:
+    """Shared bookkeeping of the sync and async retry loops."""
+
+    def __init__(self, policy: RetryPolicy, client: str, description: str, is_retryable, retry_after):
+        self.policy = policy
+        self.client = client
+        self.description = description
+        self.is_retryable = is_retryable
+        self.retry_after = retry_after
+        self.deadline = time.monotonic() + policy.total_budget
+        self.retries = 0
+
+    def attempt_timeout(self) -> float:
+        return max(0.0, min(self.policy.attempt_timeout, self.deadline - time.monotonic()))
+
+    def next_delay(self, attempt: int, error: Exception) -> float:
+        """Returns the pause before the next attempt, or None if `error` must be raised."""
+        if attempt >= self.policy.max_attempts or not self.is_retryable(error):
+            return None
+        delay = self.policy.backoff(attempt)
+        server_delay = self.retry_after(error) if self.retry_after else None
+        if server_delay is not None:
+            delay = max(delay, server_delay)
+        if time.monotonic() + delay >= self.deadline:
+            logging.warning(f"{self.description}: retry budget of {self.policy.total_budget:.0f}s exhausted.")
+            return None
+        self.retries += 1
+        metrics.registry.inc("retries_total", help_text="Retried API calls by client.", client=self.client)
+        logging.warning(f"{self.description} failed ({error}); retry {attempt}/{self.policy.max_attempts - 1} "
+                        f"in {delay:.1f}s.")
+        return delay
+
+
+def call_with_retry(func, policy: RetryPolicy, is_retryable, retry_after=None, client: str = "",
+                    description: str = "API call", on_retry=None):
+    """
+    Calls `func(timeout)` until it succeeds, retrying the errors accepted by `is_retryable`.
+
+    Args:
+        func: Callable taking the seconds available for this attempt (it should pass them to
+            its HTTP client as the request timeout, or ignore them if the client has its own).
+        policy (RetryPolicy): Backoff, attempt limit, per-attempt timeout and total budget.
+        is_retryable: Predicate on the raised exception.
+        retry_after (optional): Returns the server-requested delay in seconds for an exception, or None.
+        client (str): Label of the `retries_total` metric (e.g. 'openai', 'calendar').
+        description (str): Used in log messages.
+        on_retry (optional): Called with the exception before each retry.
+
+    Returns:
+        The result of the first successful attempt.
+
+    Raises:
+        The last exception if it is not retryable, or attempts or budget ran out.
+    """
+    attempts = _Attempts(policy, client, description, is_retryable, retry_after)
+    attempt = 1
+    while True:
+        try:
+            return func(attempts.attempt_timeout())
+        except Exception as e:
+            delay = attempts.next_delay(attempt, e)
+            if delay is None:
+                raise
+            if on_retry:
+                on_retry(e)
+        time.sleep(delay)
+        attempt += 1
+
+
+async def async_call_with_retry(func, policy: RetryPolicy, is_retryable, retry_after=None, client: str = "",
+                                description: str = "API call", on_retry=None):
+    """
+    Async version of `call_with_retry`: `func(timeout)` returns an awaitable, each attempt
+    is also bounded with asyncio.wait_for, and pauses use asyncio.sleep.
+    Timeouts of an attempt are raised as asyncio.TimeoutError and are retried if
+    `is_retryable` accepts them.
+    """
+    attempts = _Attempts(policy, client, description, is_retryable, retry_after)
+    attempt = 1
+    while True:
+        timeout = attempts.attempt_timeout()
+        try:
+            return await asyncio.wait_for(func(timeout), timeout=timeout or None)
+        except Exception as e:
+            delay = attempts.next_delay(attempt, e)
+            if delay is None:
+                raise
+            if on_retry:
+                on_retry(e)
+        await asyncio.sleep(delay)
+        attempt += 1
@@ -0,0 +1,216 @@
+import datetime
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple
+
+DIAS_SEMANA = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
+
+_NULLABLE_STRING = {"type": ["string", "null"]}
+
+# Latest end of a timed event: events that cross midnight are cut here
+END_OF_DAY = datetime.time(23, 59)
+
+# JSON schema for OpenAI structured outputs (response_format type "json_schema").
+# Strict mode requires every property to be listed as required; optional values are nullable.
+SCHEDULE_RESPONSE_SCHEMA = {
+    "name": "weekly_schedule",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "additionalProperties": False,
+        "required": ["days"],
+        "properties": {
+            "days": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "additionalProperties": False,
+                    "required": ["date", "main_locations", "events"],
+                    "properties": {
+                        "date": {"type": "string", "description": "YYYY-MM-DD"},
+                        "main_locations": {"type": "string"},
+                        "events": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "additionalProperties": False,
+                                "required": ["start", "end", "summary", "description", "location", "planned"],
+                                "properties": {
+                                    "start": {"type": ["string", "null"], "description": "HH:MM, null for all-day events"},
+                                    "end": {"type": ["string", "null"], "description": "HH:MM, null for all-day events"},
+                                    "summary": {"type": "string", "description": "Title without the [PLAN] prefix"},
+                                    "description": _NULLABLE_STRING,
+                                    "location": _NULLABLE_STRING,
+                                    "planned": {"type": "boolean", "description": "True for activities added from the recommended plan"},
+                                },
+                            },
+                        },
+                    },
+                },
+            },
+        },
+    },
+}
+
+
+class ScheduleValidationError(ValueError):
+    """The model's structured output does not describe a valid schedule."""
+
+
+@dataclass
+class ScheduleEvent:
+    """An event of the integrated schedule. `start`/`end` are None for all-day events."""
+    summary: str
+    start: Optional[datetime.time] = None
+    end: Optional[datetime.time] = None
+    description: Optional[str] = None
+    location: Optional[str] = None
+    planned: bool = False
+
+    @property
+    def all_day(self) -> bool:
+        return self.start is None
+
+
+@dataclass
+class ScheduleDay:
+    date: datetime.date
+    main_locations: str = ""
+    events: List[ScheduleEvent] = field(default_factory=list)
+
+
+@dataclass
+class Schedule:
+    """The integrated weekly schedule, as returned by the integrator in structured-output mode."""
+    days: List[ScheduleDay] = field(default_factory=list)
+
+    @classmethod
+    def from_json(cls, text: str) -> "Schedule":
+        """
+        Parses and validates the integrator's JSON output.
+
+        Raises:
+            ScheduleValidationError: If the text is not JSON or does not match the schema.
+        """
+        try:
+            data = json.loads(text)
+        except (TypeError, ValueError) as e:
+            raise ScheduleValidationError(f"Structured output is not valid JSON: {e}") from e
+        return cls.from_dict(data)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Schedule":
+        """
+        Builds a Schedule from data shaped like SCHEDULE_RESPONSE_SCHEMA, checking dates,
+        HH:MM times and that every timed event ends after it starts.
+
+        An invalid event is logged and dropped instead of invalidating the whole week; an
+        event that crosses midnight (e.g. 23:30-00:15) is kept with its end clamped to 23:59.
+
+        Raises:
+            ScheduleValidationError: If the overall structure or a day is invalid, naming its path.
+        """
+        if not isinstance(data, dict) or not isinstance(data.get("days"), list):
+            raise ScheduleValidationError("Expected an object with a 'days' list.")
+
+        days = []
+        for i, raw_day in enumerate(data["days"]):
+            path = f"days[{i}]"
+            if not isinstance(raw_day, dict):
+                raise ScheduleValidationError(f"{path}: expected an object.")
+            day = ScheduleDay(
+                date=_parse_date(raw_day.get("date"), f"{path}.date"),
+                main_locations=raw_day.get("main_locations") or "",
+            )
+            raw_events = raw_day.get("events") or []
+            if not isinstance(raw_events, list):
+                raise ScheduleValidationError(f"{path}.events: expected a list.")
+            for j, raw_event in enumerate(raw_events):
+                try:
+                    day.events.append(_parse_event(raw_event, f"{path}.events[{j}]"))
+                except ScheduleValidationError as e:
+                    logging.warning(f"Dropping invalid event from the integrated schedule: {e}")
+            days.append(day)
+        return cls(days=days)
+
+    def planned_events(self) -> Iterator[Tuple[ScheduleDay, ScheduleEvent]]:
+        """Yields (day, event) for every timed event added from the recommended plan."""
+        for day in self.days:
+            for event in day.events:
+                if event.planned and not event.all_day:
+                    yield day, event
+
+    def to_markdown(self) -> str:
+        """
+        Renders the schedule in the Markdown layout of the formatted calendar,
+        marking planned events with the [PLAN] prefix.
+        """
+        blocks = []
+        for day in self.days:
+            lines = [
+                f"**{DIAS_SEMANA[day.date.weekday()]} {day.date.isoformat()}**",
+                "",
+                f"*   **Ubicaciones Principales:** {day.main_locations or 'No especificadas'}",
+                "*   **Eventos:**",
+            ]
+            for event in sorted(day.events, key=lambda e: (not e.all_day, e.start or datetime.time.min)):
+                if event.all_day:
+                    label = "**Todo el día**"
+                else:
+                    label = f"**{event.start.strftime('%H:%M')} - {event.end.strftime('%H:%M')}**"
+                title = f"[PLAN] {event.summary}" if event.planned else event.summary
+                lines.append(f"    *   {label}: {title}")
+                if event.description:
+                    lines.append(f"        *   Descripción: {event.description}")
+                if event.location:
+                    lines.append(f"        *   Ubicación: {event.location}")
+            if not day.events:
+                lines.append("    *   Sin eventos programados.")
+            blocks.append("\n".join(lines))
+        return "\n\n".join(blocks) + "\n"
+
+
+def _parse_date(value, path: str) -> datetime.date:
+    try:
+        return datetime.date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ScheduleValidationError(f"{path}: expected a YYYY-MM-DD date, got {value!r}.") from None
+
+
+def _parse_time(value, path: str) -> datetime.time:
+    try:
+        return datetime.datetime.strptime(value, "%H:%M").time()
+    except (TypeError, ValueError):
+        raise ScheduleValidationError(f"{path}: expected an HH:MM time, got {value!r}.") from None
+
+
+def _parse_event(raw: dict, path: str) -> ScheduleEvent:
+    if not isinstance(raw, dict):
+        raise ScheduleValidationError(f"{path}: expected an object.")
+    summary = (raw.get("summary") or "").strip()
+    if not summary:
+        raise ScheduleValidationError(f"{path}.summary: must not be empty.")
+    planned = bool(raw.get("planned"))
+    if summary.startswith("[PLAN]"):
+        summary, planned = summary[len("[PLAN]"):].strip(), True
+
+    start = end = None
+    if raw.get("start") is not None or raw.get("end") is not None:
+        start = _parse_time(raw.get("start"), f"{path}.start")
+        end = _parse_time(raw.get("end"), f"{path}.end")
+        if end < start:
+            # Crosses midnight: the part after 00:00 belongs to the next day, which has its own events
+            logging.warning(f"{path}: end {raw['end']} is before start {raw['start']}; clamping it to 23:59.")
+            end = END_OF_DAY
+        if end <= start:
+            raise ScheduleValidationError(f"{path}: end {raw['end']} is not after start {raw['start']}.")
+
+    return ScheduleEvent(
+        summary=summary,
+        start=start,
+        end=end,
+        description=(raw.get("description") or "").strip() or None,
+        location=(raw.get("location") or "").strip() or None,
+        planned=planned,
+    )
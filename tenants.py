@@ -0,0 +1,207 @@
+import argparse
+import datetime
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+from dataclasses import asdict, dataclass
+from typing import List, Optional
+
+from calendar_google import GoogleCalendar
+from main_orchestrator import DEFAULT_TARGET_CALENDAR
+
+# Directorio raíz del almacén de usuarios: un subdirectorio por usuario con su
+# config.json, su token.json y su almacén local de eventos (calendar_events.db)
+DEFAULT_TENANTS_DIR = 'tenants'
+CONFIG_FILE = 'config.json'
+TOKEN_FILE = 'token.json'
+EVENT_STORE_FILE = 'calendar_events.db'
+
+# Los user_id se usan como nombre de directorio
+_USER_ID_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._@-]{0,127}$')
+
+
+@dataclass
+class UserConfig:
+    """
+    Configuración de un usuario: qué calendarios se leen y dónde se escribe su plan.
+    `calendars` es obligatorio y no puede estar vacío: no hay calendarios por defecto
+    que tenga sentido leer para un usuario cualquiera.
+    """
+    user_id: str
+    calendars: List[str]
+    target_calendar: str = DEFAULT_TARGET_CALENDAR
+    enabled: bool = True
+    # Resultado de la última ejecución batch (lo actualiza el batch driver)
+    last_run_at: Optional[str] = None
+    last_status: Optional[str] = None
+    last_success_at: Optional[str] = None
+
+    def __post_init__(self):
+        if (not isinstance(self.calendars, list) or not self.calendars
+                or not all(isinstance(name, str) and name.strip() for name in self.calendars)):
+            raise ValueError(f"El usuario '{self.user_id}' debe tener al menos un calendario en 'calendars'.")
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "UserConfig":
+        """
+        Raises:
+            ValueError: Si la configuración no indica calendarios.
+        """
+        known = {name: data[name] for name in cls.__dataclass_fields__ if name in data}
+        known.setdefault('calendars', [])
+        return cls(**known)
+
+
+class TenantStore:
+    """
+    Almacén de configuración y credenciales por usuario, en disco:
+
+        <root>/<user_id>/config.json         UserConfig
+        <root>/<user_id>/token.json          Token OAuth del usuario
+        <root>/<user_id>/calendar_events.db  Almacén local de eventos (sincronización incremental)
+
+    El archivo de cliente OAuth (credentials.json) es de la aplicación y se comparte entre usuarios.
+    Cada usuario tiene su propio token y su propio almacén de eventos, así que los clientes de
+    Calendar de distintos usuarios no comparten estado.
+    """
+
+    def __init__(self, root: str = DEFAULT_TENANTS_DIR, credentials_file: str = 'credentials.json'):
+        self.root = root
+        self.credentials_file = credentials_file
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def user_dir(self, user_id: str) -> str:
+        """
+        Retorna el directorio del usuario.
+
+        Raises:
+            ValueError: Si el user_id no es válido como nombre de directorio.
+        """
+        if not isinstance(user_id, str) or not _USER_ID_PATTERN.match(user_id) or user_id in ('.', '..'):
+            raise ValueError(f"user_id inválido: {user_id!r}")
+        return os.path.join(self.root, user_id)
+
+    def token_file(self, user_id: str) -> str:
+        return os.path.join(self.user_dir(user_id), TOKEN_FILE)
+
+    def has_token(self, user_id: str) -> bool:
+        return os.path.exists(self.token_file(user_id))
+
+    def user_ids(self) -> List[str]:
+        """Retorna los user_id registrados (con config.json), ordenados."""
+        return [name for name in sorted(os.listdir(self.root))
+                if os.path.exists(os.path.join(self.root, name, CONFIG_FILE))]
+
+    def list_users(self, enabled_only: bool = True) -> List[UserConfig]:
+        """
+        Retorna la configuración de los usuarios registrados, ordenados por user_id.
+
+        Raises:
+            ValueError: Si la configuración de algún usuario no es válida.
+        """
+        users = []
+        for user_id in self.user_ids():
+            config = self.get(user_id)
+            if config.enabled or not enabled_only:
+                users.append(config)
+        return users
+
+    def get(self, user_id: str) -> UserConfig:
+        """
+        Retorna la configuración de un usuario.
+
+        Raises:
+            KeyError: Si el usuario no está registrado.
+            ValueError: Si el user_id o su configuración no son válidos.
+        """
+        path = os.path.join(self.user_dir(user_id), CONFIG_FILE)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            raise KeyError(f"Usuario '{user_id}' no registrado en '{self.root}'.") from None
+        return UserConfig.from_dict(dict(data, user_id=user_id))
+
+    def save(self, config: UserConfig):
+        """Crea o reemplaza la configuración de un usuario (escritura atómica)."""
+        user_dir = self.user_dir(config.user_id)
+        with self._lock:
+            os.makedirs(user_dir, exist_ok=True)
+            path = os.path.join(user_dir, CONFIG_FILE)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(asdict(config), f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
+
+    def record_run(self, user_id: str, status: str, at: datetime.datetime = None):
+        """Guarda el resultado de la última ejecución batch de un usuario ('ok' o 'error')."""
+        config = self.get(user_id)
+        config.last_run_at = (at or datetime.datetime.now(datetime.timezone.utc)).isoformat()
+        config.last_status = status
+        if status == 'ok':
+            config.last_success_at = config.last_run_at
+        self.save(config)
+
+    def import_token(self, user_id: str, token_path: str):
+        """Copia al almacén un token.json obtenido fuera de este proceso (p. ej. en otra máquina)."""
+        self.get(user_id)
+        shutil.copyfile(token_path, self.token_file(user_id))
+
+    def calendar_client(self, user_id: str, interactive: bool = False) -> GoogleCalendar:
+        """
+        Crea el cliente de Calendar de un usuario con su token y su almacén de eventos.
+        Por defecto no es interactivo: si el token no es válido ni renovable lanza
+        AuthorizationRequiredError en lugar de abrir el navegador. El llamador debe
+        cerrarlo con close() al terminar.
+        """
+        user_dir = self.user_dir(user_id)
+        return GoogleCalendar(
+            credentials_file=self.credentials_file,
+            token_file=os.path.join(user_dir, TOKEN_FILE),
+            event_store_path=os.path.join(user_dir, EVENT_STORE_FILE),
+            interactive=interactive,
+        )
+
+    def authorize(self, user_id: str):
+        """Ejecuta el flujo OAuth interactivo (abre el navegador) y guarda el token del usuario."""
+        self.get(user_id)
+        self.calendar_client(user_id, interactive=True).close()
+        logging.info(f"Token de '{user_id}' guardado en {self.token_file(user_id)}.")
+
+
+if __name__ == "__main__":
+    # Uso:
+    #   python tenants.py add <user_id> --calendar <nombre> [--calendar <nombre> ...] [--target PersonalCoach]
+    #   python tenants.py authorize <user_id>            (interactivo, abre el navegador)
+    #   python tenants.py import-token <user_id> <token.json>
+    #   python tenants.py list
+    parser = argparse.ArgumentParser(description="Administra los usuarios del almacén multiusuario.")
+    parser.add_argument('--root', default=DEFAULT_TENANTS_DIR)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    add_parser = subparsers.add_parser('add')
+    add_parser.add_argument('user_id')
+    add_parser.add_argument('--calendar', action='append', required=True, dest='calendars')
+    add_parser.add_argument('--target', default=DEFAULT_TARGET_CALENDAR)
+    subparsers.add_parser('authorize').add_argument('user_id')
+    import_parser = subparsers.add_parser('import-token')
+    import_parser.add_argument('user_id')
+    import_parser.add_argument('token_path')
+    subparsers.add_parser('list')
+    args = parser.parse_args()
+
+    store = TenantStore(args.root)
+    if args.command == 'add':
+        store.save(UserConfig(user_id=args.user_id, calendars=args.calendars, target_calendar=args.target))
+        print(f"Usuario '{args.user_id}' guardado. Autorízalo con: python tenants.py authorize {args.user_id}")
+    elif args.command == 'authorize':
+        store.authorize(args.user_id)
+    elif args.command == 'import-token':
+        store.import_token(args.user_id, args.token_path)
+    else:
+        for config in store.list_users(enabled_only=False):
+            token = 'token' if store.has_token(config.user_id) else 'SIN TOKEN'
+            print(f"{config.user_id:<30} {token:<10} {config.last_status or '-':<8} {config.last_run_at or '-'}")
@@ -0,0 +1,120 @@
+import datetime
+import sqlite3
+
+import pytest
+
+from calendar_emulator import CalendarEmulator
+from calendar_google import SYNC_HORIZON_DAYS
+from event_store import EventStore
+
+CALENDAR_ID = 'coach@group.calendar.google.com'
+
+
+def day(offset):
+    """Fecha (UTC) a `offset` días de hoy: la sincronización completa cubre un rango relativo a ahora."""
+    return (datetime.datetime.now(datetime.timezone.utc).date() + datetime.timedelta(days=offset)).isoformat()
+
+
+def event(summary, offset):
+    return {'summary': summary, 'start': {'dateTime': f'{day(offset)}T10:00:00Z'},
+            'end': {'dateTime': f'{day(offset)}T11:00:00Z'}}
+
+
+def stored_summaries(gc, first=-7, last=SYNC_HORIZON_DAYS + 60):
+    return sorted(e['summary'] for e in gc.event_store.events_in_range(CALENDAR_ID, day(first), day(last)))
+
+
+@pytest.fixture
+def emulator():
+    emulator = CalendarEmulator()
+    emulator.add_calendar('PersonalCoach', calendar_id=CALENDAR_ID)
+    emulator.add_events(CALENDAR_ID, [event('Correr', 1), event('Yoga', 2)])
+    return emulator
+
+
+@pytest.fixture
+def gc(emulator):
+    gc = emulator.client()
+    yield gc
+    gc.close()
+
+
+def delete(gc, event_id):
+    gc.service.events().delete(calendarId=CALENDAR_ID, eventId=event_id).execute()
+
+
+def test_full_sync_then_delta(emulator, gc):
+    assert gc.sync_calendar(CALENDAR_ID) == 2
+    assert gc.event_store.get_sync_token(CALENDAR_ID)
+    assert stored_summaries(gc) == ['Correr', 'Yoga']
+
+    yoga = next(e for e in emulator.events(CALENDAR_ID) if e['summary'] == 'Yoga')
+    delete(gc, yoga['id'])
+    emulator.add_event(CALENDAR_ID, event('Nadar', 3))
+
+    # El delta trae solo los dos cambios, no el calendario completo
+    assert gc.sync_calendar(CALENDAR_ID) == 2
+    assert stored_summaries(gc) == ['Correr', 'Nadar']
+    assert gc.sync_calendar(CALENDAR_ID) == 0
+
+
+def test_expired_token_forces_full_resync_that_clears_stale_rows(emulator, gc):
+    gc.sync_calendar(CALENDAR_ID)
+    yoga = next(e for e in emulator.events(CALENDAR_ID) if e['summary'] == 'Yoga')
+    delete(gc, yoga['id'])
+    emulator.expire_sync_tokens()
+    emulator.reset_stats()
+
+    # La sincronización completa no lista los eventos borrados: la fila vieja debe descartarse
+    assert gc.sync_calendar(CALENDAR_ID) == 1
+    assert stored_summaries(gc) == ['Correr']
+    assert emulator.stats()['errors'] == {410: 1}
+
+
+def test_full_sync_stops_at_the_horizon(emulator, gc):
+    emulator.add_event(CALENDAR_ID, event('Congreso', SYNC_HORIZON_DAYS + 30))
+
+    gc.sync_calendar(CALENDAR_ID)
+
+    assert stored_summaries(gc) == ['Correr', 'Yoga']
+    assert gc.event_store.get_synced_until(CALENDAR_ID) == day(SYNC_HORIZON_DAYS)
+
+
+def test_read_beyond_the_horizon_forces_full_sync(emulator, gc):
+    emulator.add_event(CALENDAR_ID, event('Congreso', SYNC_HORIZON_DAYS + 30))
+    gc.sync_calendar(CALENDAR_ID)
+
+    assert gc.sync_calendar(CALENDAR_ID, until=day(SYNC_HORIZON_DAYS + 30)) == 3
+    assert stored_summaries(gc) == ['Congreso', 'Correr', 'Yoga']
+    assert gc.event_store.get_synced_until(CALENDAR_ID) == day(SYNC_HORIZON_DAYS + 31)
+
+    # Dentro del rango cubierto basta un delta, que conserva el horizonte
+    assert gc.sync_calendar(CALENDAR_ID, until=day(SYNC_HORIZON_DAYS + 30)) == 0
+    assert gc.event_store.get_synced_until(CALENDAR_ID) == day(SYNC_HORIZON_DAYS + 31)
+
+
+def test_synced_reads_come_from_the_store(emulator, gc):
+    events_by_day = gc.buscar_eventos_sincronizados(day(0), day(6), filter_summaries=['PersonalCoach'])
+
+    assert {d: [e['summary'] for e in events] for d, events in events_by_day.items()} == {
+        day(1): ['Correr'], day(2): ['Yoga'],
+    }
+
+
+def test_store_created_before_synced_until_is_migrated(tmp_path):
+    path = str(tmp_path / 'events.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE sync_state (calendar_id TEXT PRIMARY KEY, sync_token TEXT, synced_at TEXT)")
+    conn.execute("INSERT INTO sync_state VALUES (?, 'token', '2026-01-01T00:00:00')", (CALENDAR_ID,))
+    conn.commit()
+    conn.close()
+
+    store = EventStore(path)
+    try:
+        assert store.get_sync_token(CALENDAR_ID) == 'token'
+        assert store.get_synced_until(CALENDAR_ID) is None
+        store.apply_changes(CALENDAR_ID, [], [], 'full', full_resync=True, synced_until='2026-02-01')
+        store.apply_changes(CALENDAR_ID, [], [], 'delta')
+        assert (store.get_sync_token(CALENDAR_ID), store.get_synced_until(CALENDAR_ID)) == ('delta', '2026-02-01')
+    finally:
+        store.close()
@@ -0,0 +1,119 @@
+import hashlib
+
+import pytest
+
+import gpt_cache
+from gpt_cache import ResponseCache
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(gpt_cache.time, 'time', clock)
+    return clock
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResponseCache(ttl_seconds=60)
+    cache.set('k', 'respuesta')
+
+    clock.now += 59
+    assert cache.get('k') == 'respuesta'
+    clock.now += 2
+    assert cache.get('k') is None
+    assert (cache.stats()['hits'], cache.stats()['misses']) == (1, 1)
+
+
+def test_without_ttl_entries_do_not_expire(clock):
+    cache = ResponseCache(ttl_seconds=None)
+    cache.set('k', 'respuesta')
+
+    clock.now += 10 ** 9
+    assert cache.get('k') == 'respuesta'
+
+
+def test_memory_tier_evicts_least_recently_used(clock):
+    cache = ResponseCache(max_entries=2)
+    cache.set('a', '1')
+    cache.set('b', '2')
+    assert cache.get('a') == '1'  # 'b' pasa a ser el menos usado
+
+    cache.set('c', '3')
+
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == ('1', '3')
+    assert cache.stats()['memory_entries'] == 2
+
+
+def test_memory_miss_falls_back_to_disk_and_promotes(clock, tmp_path):
+    path = str(tmp_path / 'cache.db')
+    ResponseCache(disk_path=path).set('k', 'respuesta')
+
+    restarted = ResponseCache(disk_path=path)
+    assert restarted.stats()['memory_entries'] == 0
+    assert restarted.get('k') == 'respuesta'
+    assert restarted.stats()['memory_entries'] == 1
+
+
+def test_entry_evicted_from_memory_is_served_from_disk(clock, tmp_path):
+    cache = ResponseCache(max_entries=1, disk_path=str(tmp_path / 'cache.db'))
+    cache.set('a', '1')
+    cache.set('b', '2')
+
+    assert cache.get('a') == '1'
+
+
+def test_expired_disk_entry_is_a_miss(clock, tmp_path):
+    path = str(tmp_path / 'cache.db')
+    ResponseCache(ttl_seconds=60, disk_path=path).set('k', 'respuesta')
+
+    clock.now += 61
+    assert ResponseCache(ttl_seconds=60, disk_path=path).get('k') is None
+
+
+def test_disk_tier_keeps_the_newest_entries(clock, tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = ResponseCache(max_entries=1, disk_path=path, max_disk_entries=2)
+    for key in ('a', 'b', 'c'):
+        clock.now += 1
+        cache.set(key, key.upper())
+
+    restarted = ResponseCache(disk_path=path)
+    assert [restarted.get(key) for key in ('a', 'b', 'c')] == [None, 'B', 'C']
+
+
+def test_get_stale_returns_expired_entries_with_their_age(clock, tmp_path):
+    cache = ResponseCache(ttl_seconds=60, disk_path=str(tmp_path / 'cache.db'))
+    cache.set('k', 'respuesta')
+    clock.now += 90
+
+    assert cache.get_stale('k') == ('respuesta', 90)
+    assert cache.get_stale('otra') is None
+    # No cuenta como acierto ni fallo
+    assert (cache.stats()['hits'], cache.stats()['misses']) == (0, 0)
+
+
+def test_get_stale_reads_the_disk_tier(clock, tmp_path):
+    path = str(tmp_path / 'cache.db')
+    ResponseCache(ttl_seconds=60, disk_path=path).set('k', 'respuesta')
+    clock.now += 600
+
+    assert ResponseCache(ttl_seconds=60, disk_path=path).get_stale('k') == ('respuesta', 600)
+
+
+def test_key_for_hash_matches_make_key():
+    prompt = 'Eres un nutricionista.'
+    digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+    assert ResponseCache.key_for_hash('nutri', digest, 'hola', 'gpt-4o') == \
+        ResponseCache.make_key('nutri', prompt, 'hola', 'gpt-4o')
+    assert ResponseCache.make_key('nutri', prompt, 'hola', 'gpt-4o') != \
+        ResponseCache.make_key('nutri', prompt + ' ', 'hola', 'gpt-4o')
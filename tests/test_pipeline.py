@@ -0,0 +1,122 @@
+import contextvars
+import threading
+import time
+
+import pytest
+
+from pipeline import Stage, StageError, run_dag
+
+
+def test_stages_receive_their_dependencies_results():
+    stages = [
+        Stage('total', lambda plan, calendar: f'{plan}+{calendar}', depends_on=('plan', 'calendar')),
+        Stage('plan', lambda experts: f'plan({experts})', depends_on=('experts',)),
+        Stage('experts', lambda: 'experts'),
+        Stage('calendar', lambda: 'calendar'),
+    ]
+
+    assert run_dag(stages) == {
+        'experts': 'experts',
+        'calendar': 'calendar',
+        'plan': 'plan(experts)',
+        'total': 'plan(experts)+calendar',
+    }
+
+
+def test_stage_starts_only_after_all_its_dependencies_finish():
+    finished = []
+
+    def stage(name, delay=0.0):
+        def run(**_):
+            time.sleep(delay)
+            finished.append(name)
+        return Stage(name, run)
+
+    slow, fast = stage('slow', 0.05), stage('fast')
+    last = Stage('last', lambda slow, fast: finished.append('last'), depends_on=('slow', 'fast'))
+
+    run_dag([last, slow, fast])
+
+    assert finished == ['fast', 'slow', 'last']
+
+
+def test_independent_stages_run_concurrently():
+    # Cada etapa espera a la otra: en serie, la barrera se rompe por timeout
+    barrier = threading.Barrier(2, timeout=5)
+    stages = [Stage('a', barrier.wait), Stage('b', barrier.wait)]
+
+    assert set(run_dag(stages)) == {'a', 'b'}
+
+
+def test_failing_stage_raises_stage_error_and_skips_dependents():
+    called = []
+
+    def fail():
+        raise RuntimeError('sin conexión')
+
+    stages = [
+        Stage('experts', fail),
+        Stage('plan', lambda experts: called.append('plan'), depends_on=('experts',)),
+        Stage('integration', lambda plan: called.append('integration'), depends_on=('plan',)),
+    ]
+
+    with pytest.raises(StageError, match="'experts' failed: sin conexión") as excinfo:
+        run_dag(stages)
+    assert excinfo.value.stage == 'experts'
+    assert isinstance(excinfo.value.__cause__, RuntimeError)
+    assert called == []
+
+
+def test_unknown_dependency_is_rejected_before_running():
+    called = []
+    stages = [Stage('plan', lambda: called.append('plan')),
+              Stage('integration', lambda plan, calendar: None, depends_on=('plan', 'calendar'))]
+
+    with pytest.raises(ValueError, match='unknown stages'):
+        run_dag(stages)
+    assert called == []
+
+
+@pytest.mark.parametrize('stages', [
+    [Stage('a', lambda b: None, depends_on=('b',)), Stage('b', lambda a: None, depends_on=('a',))],
+    [Stage('root', lambda: None),
+     Stage('a', lambda root, b: None, depends_on=('root', 'b')), Stage('b', lambda a: None, depends_on=('a',))],
+    [Stage('a', lambda a: None, depends_on=('a',))],
+])
+def test_dependency_cycle_is_rejected(stages):
+    with pytest.raises(ValueError, match='cycle'):
+        run_dag(stages)
+
+
+def test_timings_hold_each_finished_stage_wall_time():
+    timings = {}
+    stages = [Stage('sleep', lambda: time.sleep(0.05)),
+              Stage('next', lambda sleep: None, depends_on=('sleep',))]
+
+    run_dag(stages, timings=timings)
+
+    assert set(timings) == {'sleep', 'next'}
+    assert timings['sleep'] >= 0.05
+    assert all(isinstance(seconds, float) and round(seconds, 3) == seconds for seconds in timings.values())
+
+
+def test_timings_omit_the_failed_stage():
+    timings = {}
+
+    def fail(ok):
+        raise ValueError('respuesta inválida')
+
+    with pytest.raises(StageError):
+        run_dag([Stage('ok', lambda: 1), Stage('fail', fail, depends_on=('ok',))], timings=timings)
+    assert set(timings) == {'ok'}
+
+
+def test_stages_run_in_the_callers_context():
+    request_id = contextvars.ContextVar('request_id')
+    request_id.set('abc')
+
+    assert run_dag([Stage('read', request_id.get)], max_workers=1) == {'read': 'abc'}
+
+
+def test_empty_pipeline():
+    assert run_dag([]) == {}
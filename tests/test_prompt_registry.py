@@ -0,0 +1,95 @@
+import os
+
+import pytest
+
+import prompt_registry
+from prompt_registry import PromptRegistry
+
+CHECK_INTERVAL = 2.0
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(prompt_registry.time, 'monotonic', clock)
+    return clock
+
+
+def write(directory, name, content, mtime_ns):
+    path = directory / f'{name}.md'
+    path.write_text(content, encoding='utf-8')
+    # mtime explícito: dos escrituras seguidas pueden caer en el mismo tick del sistema de archivos
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def registry(tmp_path, clock):
+    write(tmp_path, 'nutri', 'Eres un nutricionista.', 1_000)
+    write(tmp_path, 'deporte', 'Eres un entrenador.', 1_000)
+    return PromptRegistry(str(tmp_path), check_interval=CHECK_INTERVAL)
+
+
+def test_edited_prompt_is_picked_up_after_the_check_interval(registry, tmp_path, clock):
+    write(tmp_path, 'nutri', 'Eres una nutricionista deportiva.', 2_000)
+
+    clock.now += CHECK_INTERVAL / 2
+    assert registry.get('nutri').content == 'Eres un nutricionista.'
+
+    clock.now += CHECK_INTERVAL
+    assert registry.get('nutri').content == 'Eres una nutricionista deportiva.'
+    assert registry.contents()['nutri'] == 'Eres una nutricionista deportiva.'
+    assert registry.reloads == 2
+
+
+def test_etag_changes_with_the_content(registry, tmp_path, clock):
+    before, other = registry.get('nutri'), registry.get('deporte')
+    assert before.etag == f'"{before.sha256[:32]}"'
+
+    write(tmp_path, 'nutri', 'Eres una nutricionista deportiva.', 2_000)
+    clock.now += CHECK_INTERVAL
+
+    after = registry.get('nutri')
+    assert after.etag != before.etag
+    assert after.sha256 == registry.content_hash('nutri')
+    assert registry.get('deporte').etag == other.etag
+
+
+def test_touched_file_with_same_content_keeps_its_etag(registry, tmp_path, clock):
+    etag = registry.get('nutri').etag
+
+    # Solo cambian la fecha y los espacios alrededor (el contenido se guarda sin ellos)
+    write(tmp_path, 'nutri', 'Eres un nutricionista.\n\n', 2_000)
+    clock.now += CHECK_INTERVAL
+
+    assert registry.refresh() is False
+    assert registry.get('nutri').etag == etag
+    assert registry.reloads == 1
+
+
+def test_added_and_removed_files_are_picked_up(registry, tmp_path, clock):
+    snapshot = registry.contents()
+    write(tmp_path, 'estres', 'Eres un psicólogo.', 2_000)
+    os.remove(tmp_path / 'deporte.md')
+    clock.now += CHECK_INTERVAL
+
+    assert sorted(registry.contents()) == ['estres', 'nutri']
+    assert registry.get('deporte') is None
+    with pytest.raises(KeyError):
+        registry.content_hash('deporte')
+    # El diccionario entregado antes no se modifica: se reemplaza
+    assert sorted(snapshot) == ['deporte', 'nutri']
+
+
+def test_forced_refresh_ignores_the_interval(registry, tmp_path):
+    write(tmp_path, 'nutri', 'Eres una nutricionista deportiva.', 2_000)
+
+    assert registry.refresh(force=True) is True
+    assert registry.get('nutri').content == 'Eres una nutricionista deportiva.'
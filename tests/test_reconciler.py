@@ -0,0 +1,121 @@
+import datetime
+
+import pytest
+
+from calendar_emulator import CalendarEmulator
+from calendar_google import GoogleCalendar
+from reconciler import OP_CREATE, OP_DELETE, OP_UPDATE, plan_reconciliation, reconcile_calendar
+
+SANTIAGO = datetime.timezone(datetime.timedelta(hours=-3))
+WEEK_START, WEEK_END = '2026-01-05', '2026-01-11'
+
+
+def body(summary, day, start, end, description=None, tz=SANTIAGO):
+    """Cuerpo de evento como lo arma el pipeline (GoogleCalendar.build_event_body)."""
+    date = datetime.date.fromisoformat(day)
+    return GoogleCalendar.build_event_body(
+        summary,
+        datetime.datetime.combine(date, datetime.time.fromisoformat(start), tzinfo=tz),
+        datetime.datetime.combine(date, datetime.time.fromisoformat(end), tzinfo=tz),
+        description=description,
+    )
+
+
+def current(event_id, *args, **kwargs):
+    return dict(body(*args, **kwargs), id=event_id)
+
+
+def test_identical_events_need_no_operations():
+    events = [current('a', 'Correr', WEEK_START, '07:00', '08:00', description='5 km')]
+    desired = [body('Correr', WEEK_START, '07:00', '08:00', description='5 km')]
+
+    assert plan_reconciliation(events, desired, tz=SANTIAGO) == []
+
+
+def test_key_match_with_changed_description_is_patched():
+    events = [current('a', 'Correr', WEEK_START, '07:00', '08:00', description='5 km')]
+    desired = [body('Correr', WEEK_START, '07:00', '08:00', description='8 km')]
+
+    assert plan_reconciliation(events, desired, tz=SANTIAGO) == [
+        {'op': OP_UPDATE, 'event_id': 'a', 'summary': 'Correr', 'body': {'description': '8 km'}},
+    ]
+
+
+def test_same_day_and_title_with_new_times_patches_start_and_end():
+    events = [current('a', 'Correr', WEEK_START, '07:00', '08:00')]
+    desired = [body('Correr', WEEK_START, '18:30', '19:30')]
+
+    operations = plan_reconciliation(events, desired, tz=SANTIAGO)
+
+    assert operations == [{'op': OP_UPDATE, 'event_id': 'a', 'summary': 'Correr',
+                           'body': {'start': desired[0]['start'], 'end': desired[0]['end']}}]
+
+
+def test_extra_events_are_deleted_and_missing_ones_created():
+    events = [
+        current('a', 'Correr', WEEK_START, '07:00', '08:00'),
+        current('b', 'Yoga', WEEK_START, '19:00', '20:00'),
+    ]
+    desired = [
+        body('Correr', WEEK_START, '07:00', '08:00'),
+        body('Nadar', '2026-01-06', '07:00', '08:00'),
+    ]
+
+    operations = plan_reconciliation(events, desired, tz=SANTIAGO)
+
+    assert sorted((op['op'], op['event_id'], op['summary']) for op in operations) == [
+        (OP_CREATE, None, 'Nadar'),
+        (OP_DELETE, 'b', 'Yoga'),
+    ]
+
+
+def test_same_instant_with_another_offset_matches():
+    # El calendario devuelve el evento en UTC; el plan lo escribe con el offset local
+    events = [current('a', 'Correr', WEEK_START, '10:00', '11:00', tz=datetime.timezone.utc)]
+    desired = [body('Correr', WEEK_START, '07:00', '08:00')]
+
+    assert plan_reconciliation(events, desired, tz=SANTIAGO) == []
+
+
+COACH_CALENDAR_ID = 'coach@group.calendar.google.com'
+DESIRED = [
+    body('Correr', WEEK_START, '07:00', '08:00', description='8 km'),
+    body('Nadar', '2026-01-06', '07:00', '08:00'),
+]
+
+
+@pytest.fixture
+def emulator():
+    emulator = CalendarEmulator()
+    emulator.add_calendar('PersonalCoach', calendar_id=COACH_CALENDAR_ID)
+    emulator.add_events(COACH_CALENDAR_ID, [
+        body('Correr', WEEK_START, '07:00', '08:00', description='5 km'),
+        body('Yoga', WEEK_START, '19:00', '20:00'),
+    ])
+    return emulator
+
+
+def _summaries(emulator):
+    return sorted((event['summary'], event.get('description')) for event in emulator.events(COACH_CALENDAR_ID))
+
+
+def test_dry_run_reports_operations_without_writing(emulator):
+    before = _summaries(emulator)
+
+    report = reconcile_calendar(emulator.client(), DESIRED, WEEK_START, WEEK_END, tz=SANTIAGO, dry_run=True)
+
+    assert report['dry_run'] is True
+    assert (report['created'], report['updated'], report['deleted'], report['unchanged']) == (1, 1, 1, 0)
+    assert sorted((op['op'], op['summary']) for op in report['operations']) == [
+        (OP_CREATE, 'Nadar'), (OP_DELETE, 'Yoga'), (OP_UPDATE, 'Correr'),
+    ]
+    assert report['failed'] == []
+    assert _summaries(emulator) == before
+    assert set(emulator.stats()['calls']) <= {'calendarList.list', 'events.list'}
+
+
+def test_reconcile_applies_the_plan(emulator):
+    report = reconcile_calendar(emulator.client(), DESIRED, WEEK_START, WEEK_END, tz=SANTIAGO)
+
+    assert (report['created'], report['updated'], report['deleted'], report['failed']) == (1, 1, 1, [])
+    assert _summaries(emulator) == [('Correr', '8 km'), ('Nadar', None)]
@@ -0,0 +1,157 @@
+import asyncio
+import datetime
+import email.utils
+
+import pytest
+
+import retry
+from retry import RetryPolicy, async_call_with_retry, call_with_retry, parse_retry_after
+
+FAST_POLICY = RetryPolicy(max_attempts=4, base_delay=0.01, max_delay=0.01, attempt_timeout=5.0, total_budget=600.0)
+
+
+class ApiError(Exception):
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.headers = {} if retry_after is None else {'retry-after': retry_after}
+
+
+def is_retryable(error):
+    return isinstance(error, ApiError) and error.status in (429, 503)
+
+
+def retry_after(error):
+    return parse_retry_after(error.headers.get('retry-after'))
+
+
+def http_date(seconds_from_now):
+    when = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=seconds_from_now)
+    return email.utils.format_datetime(when, usegmt=True)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Registra las pausas de los reintentos en vez de dormir."""
+    recorded = []
+
+    async def fake_async_sleep(delay):
+        recorded.append(delay)
+
+    monkeypatch.setattr(retry.time, 'sleep', recorded.append)
+    monkeypatch.setattr(retry.asyncio, 'sleep', fake_async_sleep)
+    return recorded
+
+
+def failing(*errors, result='ok'):
+    """func(timeout) que lanza `errors` en orden y luego retorna `result`; cuenta sus llamadas."""
+    pending = list(errors)
+
+    def func(timeout):
+        func.calls += 1
+        if pending:
+            raise pending.pop(0)
+        return result
+    func.calls = 0
+    return func
+
+
+@pytest.mark.parametrize('value, expected', [('3', 3.0), ('0.5', 0.5), ('-2', 0.0), (None, None), ('pronto', None)])
+def test_parse_retry_after_seconds(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    assert parse_retry_after(http_date(30)) == pytest.approx(30, abs=2)
+    assert parse_retry_after(http_date(-30)) == 0.0
+
+
+def test_retry_after_seconds_is_honored(sleeps):
+    func = failing(ApiError(429, retry_after='5'))
+
+    assert call_with_retry(func, FAST_POLICY, is_retryable, retry_after) == 'ok'
+    assert func.calls == 2
+    assert sleeps == [5.0]
+
+
+def test_retry_after_http_date_is_honored(sleeps):
+    func = failing(ApiError(503, retry_after=http_date(20)))
+
+    assert call_with_retry(func, FAST_POLICY, is_retryable, retry_after) == 'ok'
+    assert sleeps == [pytest.approx(20, abs=2)]
+
+
+def test_non_retryable_status_is_raised_immediately(sleeps):
+    func = failing(ApiError(400))
+
+    with pytest.raises(ApiError, match='400'):
+        call_with_retry(func, FAST_POLICY, is_retryable, retry_after)
+    assert func.calls == 1
+    assert sleeps == []
+
+
+def test_retries_stop_at_max_attempts(sleeps):
+    func = failing(*[ApiError(503) for _ in range(10)])
+    retried = []
+
+    with pytest.raises(ApiError, match='503'):
+        call_with_retry(func, FAST_POLICY, is_retryable, retry_after, on_retry=retried.append)
+    assert func.calls == FAST_POLICY.max_attempts
+    assert len(sleeps) == len(retried) == FAST_POLICY.max_attempts - 1
+
+
+def test_retry_after_beyond_the_budget_is_not_waited(sleeps):
+    policy = RetryPolicy(max_attempts=5, base_delay=0.01, max_delay=0.01, total_budget=10.0)
+    func = failing(ApiError(429, retry_after='60'))
+
+    with pytest.raises(ApiError):
+        call_with_retry(func, policy, is_retryable, retry_after)
+    assert func.calls == 1
+    assert sleeps == []
+
+
+def test_jittered_backoff_stays_within_the_cap():
+    policy = RetryPolicy(base_delay=0.5, max_delay=4.0)
+    for retry_number in range(1, 10):
+        cap = min(policy.max_delay, policy.base_delay * 2 ** (retry_number - 1))
+        delays = [policy.backoff(retry_number) for _ in range(200)]
+        assert all(0 <= delay <= cap for delay in delays)
+        # Jitter completo: las pausas no son todas iguales
+        assert len(set(delays)) > 1
+
+
+def test_retry_delays_stay_within_the_cap(sleeps):
+    policy = RetryPolicy(max_attempts=8, base_delay=0.5, max_delay=2.0)
+    func = failing(*[ApiError(503) for _ in range(7)])
+
+    call_with_retry(func, policy, is_retryable, retry_after)
+    assert len(sleeps) == 7
+    assert all(0 <= delay <= min(policy.max_delay, policy.base_delay * 2 ** n) for n, delay in enumerate(sleeps))
+
+
+def test_async_retry_honors_retry_after(sleeps):
+    errors = [ApiError(429, retry_after='2')]
+    calls = []
+
+    async def func(timeout):
+        calls.append(timeout)
+        if errors:
+            raise errors.pop(0)
+        return 'ok'
+
+    assert asyncio.run(async_call_with_retry(func, FAST_POLICY, is_retryable, retry_after)) == 'ok'
+    assert len(calls) == 2 and all(0 < timeout <= FAST_POLICY.attempt_timeout for timeout in calls)
+    assert sleeps == [2.0]
+
+
+def test_async_retries_stop_at_max_attempts(sleeps):
+    calls = []
+
+    async def func(timeout):
+        calls.append(timeout)
+        raise ApiError(503)
+
+    with pytest.raises(ApiError):
+        asyncio.run(async_call_with_retry(func, FAST_POLICY, is_retryable, retry_after))
+    assert len(calls) == FAST_POLICY.max_attempts
+    assert len(sleeps) == FAST_POLICY.max_attempts - 1
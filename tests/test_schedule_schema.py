@@ -0,0 +1,55 @@
+import datetime
+import json
+
+import pytest
+
+from schedule_schema import END_OF_DAY, Schedule, ScheduleValidationError
+
+
+def event(summary, start, end, planned=True):
+    return {'start': start, 'end': end, 'summary': summary, 'description': None, 'location': None,
+            'planned': planned}
+
+
+def schedule_json(*events, date='2026-01-05'):
+    return json.dumps({'days': [{'date': date, 'main_locations': 'Casa', 'events': list(events)}]})
+
+
+def test_inverted_event_is_dropped_and_the_rest_kept():
+    text = schedule_json(event('Correr', '07:00', '08:00'), event('Roto', '10:00', '10:00'),
+                         event('Leer', '21:00', '22:00'))
+
+    schedule = Schedule.from_json(text)
+
+    assert [e.summary for e in schedule.days[0].events] == ['Correr', 'Leer']
+
+
+def test_event_crossing_midnight_is_clamped_to_end_of_day():
+    schedule = Schedule.from_json(schedule_json(event('Cine', '23:30', '00:15'), event('Correr', '07:00', '08:00')))
+
+    cine, correr = schedule.days[0].events
+    assert (cine.start, cine.end) == (datetime.time(23, 30), END_OF_DAY)
+    assert (correr.start, correr.end) == (datetime.time(7, 0), datetime.time(8, 0))
+
+
+def test_event_with_malformed_time_is_dropped():
+    schedule = Schedule.from_json(schedule_json(event('Correr', '7am', '08:00'), event('Leer', '21:00', '22:00')))
+
+    assert [e.summary for e in schedule.days[0].events] == ['Leer']
+
+
+def test_plan_prefix_marks_event_as_planned():
+    schedule = Schedule.from_json(schedule_json(event('[PLAN] Meditar', '08:00', '08:15', planned=False)))
+
+    (day, planned), = schedule.planned_events()
+    assert (planned.summary, planned.planned) == ('Meditar', True)
+
+
+@pytest.mark.parametrize('text', [
+    'no es json',
+    json.dumps({'dias': []}),
+    json.dumps({'days': [{'date': '05/01/2026', 'events': []}]}),
+])
+def test_invalid_structure_rejects_the_schedule(text):
+    with pytest.raises(ScheduleValidationError):
+        Schedule.from_json(text)
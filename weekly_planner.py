@@ -1,30 +1,142 @@
+import asyncio
 import logging
-from gpt import GPTClient # Asegúrate de que gpt.py esté en el mismo directorio o en el PYTHONPATH
-# --- Change: Import ThreadPoolExecutor ---
-import concurrent.futures
-# --- End Change ---
+import os
+from dotenv import load_dotenv
+from gpt import AsyncGPTClient # Asegúrate de que gpt.py esté en el mismo directorio o en el PYTHONPATH
+from async_runtime import run_async
+from clients import get_async_gpt_client
+import metrics
+from metrics import track_run
 
 # Configure logging (opcional, pero útil para depuración)
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def get_weekly_plan():
+EXPERT_ASSISTANTS = ["deporte", "estres", "medico", "nutri"]
+PLANNER_ASSISTANT = "planner" # El asistente que integrará todo
+WEEKLY_QUERY = "me dirías la planificación para esta semana?"
+DEFAULT_EXPERT_TIMEOUT = 120.0 # Segundos que tiene cada experto para responder
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = (os.getenv(name) or "").strip().lower()
+    return default if not value else value in ("1", "true", "yes", "on")
+
+def get_expert_timeout(expert_timeout: float = None) -> float:
+    """
+    Retorna el tiempo máximo de respuesta de cada experto: `expert_timeout` si se indica,
+    si no EXPERT_TIMEOUT_SECONDS, por defecto DEFAULT_EXPERT_TIMEOUT.
+
+    Raises:
+        ValueError: Si no es un número positivo.
+    """
+    if expert_timeout is None:
+        load_dotenv()
+        value = (os.getenv("EXPERT_TIMEOUT_SECONDS") or "").strip()
+        try:
+            expert_timeout = float(value) if value else DEFAULT_EXPERT_TIMEOUT
+        except ValueError:
+            raise ValueError(f"EXPERT_TIMEOUT_SECONDS debe ser un número, no '{value}'.") from None
+    if expert_timeout <= 0:
+        raise ValueError(f"El timeout de los expertos debe ser positivo, no {expert_timeout}.")
+    return expert_timeout
+
+def get_hedge_percentile(hedge_percentile: float = None):
+    """
+    Retorna el percentil de latencia al que se duplican las consultas lentas a los expertos:
+    `hedge_percentile` si se indica, si no EXPERT_HEDGE_PERCENTILE. None (por defecto) desactiva el hedging.
+
+    Raises:
+        ValueError: Si el percentil no es un número entre 0 y 100.
+    """
+    if hedge_percentile is None:
+        load_dotenv()
+        value = (os.getenv("EXPERT_HEDGE_PERCENTILE") or "").strip()
+        if not value:
+            return None
+        try:
+            hedge_percentile = float(value)
+        except ValueError:
+            raise ValueError(f"EXPERT_HEDGE_PERCENTILE debe ser un número, no '{value}'.") from None
+    if not 0 < hedge_percentile <= 100:
+        raise ValueError(f"El percentil de hedging debe estar entre 0 y 100, no {hedge_percentile}.")
+    return hedge_percentile
+
+def build_planner_prompt(expert_responses: dict, stale_responses: dict = None, missing: dict = None) -> str:
+    """
+    Construye la consulta para el asistente 'planner' con las recomendaciones de los expertos.
+
+    Args:
+        expert_responses (dict): Respuestas obtenidas, por experto.
+        stale_responses (dict, opcional): (respuesta, antigüedad en segundos) en caché de los expertos que fallaron.
+        missing (dict, opcional): Motivo del fallo de los expertos sin ninguna respuesta.
+    """
+    stale_responses = stale_responses or {}
+    missing = missing or {}
+    planner_input_parts = ["Aquí están las recomendaciones de los expertos para la semana:"]
+    # Ordenar por nombre de asistente para consistencia
+    for assistant_name in sorted(set(expert_responses) | set(stale_responses) | set(missing)):
+        label = assistant_name.capitalize()
+        if assistant_name in expert_responses:
+            planner_input_parts.append(f"\n--- Recomendación de '{label}' ---\n{expert_responses[assistant_name]}\n--- Fin Recomendación '{label}' ---")
+        elif assistant_name in stale_responses:
+            response, age = stale_responses[assistant_name]
+            planner_input_parts.append(
+                f"\n--- Recomendación de '{label}' (ANTERIOR: respuesta guardada hace {age / 3600:.1f} h, puede estar desactualizada) ---"
+                f"\n{response}\n--- Fin Recomendación '{label}' ---")
+        else:
+            planner_input_parts.append(
+                f"\n--- Recomendación de '{label}': NO DISPONIBLE ({missing[assistant_name]}) ---\n"
+                f"Planifica sin la recomendación de este experto e indícalo en la planificación.")
+    return "\n".join(planner_input_parts)
+
+@track_run("get_weekly_plan")
+def get_weekly_plan(gpt_client: AsyncGPTClient = None, hedge_percentile: float = None, expert_timeout: float = None,
+                    allow_partial: bool = None, stale_fallback: bool = None):
+    """
+    Versión síncrona de `get_weekly_plan_async`: ejecuta el pipeline en el event loop
+    compartido (async_runtime) y espera el resultado.
+
+    Args:
+        gpt_client (AsyncGPTClient, opcional): Cliente a usar. Por defecto, el compartido del proceso.
+        hedge_percentile, expert_timeout, allow_partial, stale_fallback: Ver `get_weekly_plan_async`.
+
+    Returns:
+        str: La planificación semanal integrada generada por el asistente 'planner'.
+             Retorna un mensaje de error si ocurre algún problema.
+    """
+    return run_async(get_weekly_plan_async(gpt_client, hedge_percentile, expert_timeout, allow_partial, stale_fallback))
+
+async def get_weekly_plan_async(gpt_client: AsyncGPTClient = None, hedge_percentile: float = None,
+                                expert_timeout: float = None, allow_partial: bool = None, stale_fallback: bool = None):
     """
     Orquesta la consulta a los asistentes expertos y genera una planificación semanal integrada.
-    Utiliza ejecución paralela para consultar a los expertos.
+    Los expertos se consultan de forma concurrente con AsyncGPTClient.gather_experts.
+
+    Args:
+        gpt_client (AsyncGPTClient, opcional): Cliente a usar. Por defecto, el compartido del proceso.
+        hedge_percentile (float, opcional): Si la consulta a un experto tarda más que este percentil
+            de sus latencias recientes, se envía una consulta duplicada y se usa la primera que
+            responda (ver AsyncGPTClient.query_hedged). Por defecto EXPERT_HEDGE_PERCENTILE; sin valor, desactivado.
+        expert_timeout (float, opcional): Segundos que tiene cada experto para responder.
+            Por defecto EXPERT_TIMEOUT_SECONDS o DEFAULT_EXPERT_TIMEOUT.
+        allow_partial (bool, opcional): Si un experto falla o no responde a tiempo, continuar con las
+            respuestas obtenidas e indicar al 'planner' qué expertos faltan, en lugar de abortar.
+            Por defecto EXPERT_PARTIAL_RESULTS (activado).
+        stale_fallback (bool, opcional): En modo parcial, usar la última respuesta en caché (aunque
+            haya caducado) de los expertos que faltan. Por defecto EXPERT_STALE_FALLBACK (activado).
 
     Returns:
         str: La planificación semanal integrada generada por el asistente 'planner'.
              Retorna un mensaje de error si ocurre algún problema.
     """
     try:
-        # 1. Inicializar el cliente GPT
-        gpt_client = GPTClient(assistants_dir="asistentes")
-        logging.info("GPTClient inicializado.")
+        # 1. Obtener el cliente GPT (compartido: un solo pool de conexiones para todo el proceso)
+        if gpt_client is None:
+            gpt_client = get_async_gpt_client()
 
         # 2. Definir los asistentes expertos y la consulta
-        expert_assistants = ["deporte", "estres", "medico", "nutri"]
-        query = "me dirías la planificación para esta semana?"
-        planner_assistant = "planner" # El asistente que integrará todo
+        expert_assistants = EXPERT_ASSISTANTS
+        query = WEEKLY_QUERY
+        planner_assistant = PLANNER_ASSISTANT
 
         # Verificar que todos los asistentes necesarios existen
         available_assistants = gpt_client.assistants.keys()
@@ -35,58 +147,64 @@ def get_weekly_plan():
             logging.error(error_msg)
             return error_msg
 
-        # --- Change: Consultar a cada experto en paralelo ---
+        # --- Change: Consultar a cada experto de forma concurrente ---
         expert_responses = {}
-        logging.info(f"Consultando a los asistentes expertos en paralelo: {', '.join(expert_assistants)}")
-
-        # Usar ThreadPoolExecutor para llamadas concurrentes a la API
-        with concurrent.futures.ThreadPoolExecutor(max_workers=len(expert_assistants)) as executor:
-            # Crear un diccionario de futuros {future: assistant_name}
-            future_to_assistant = {
-                executor.submit(gpt_client.query, assistant_name, query): assistant_name
-                for assistant_name in expert_assistants
-            }
-
-            # Procesar los resultados a medida que se completan
-            for future in concurrent.futures.as_completed(future_to_assistant):
-                assistant_name = future_to_assistant[future]
-                try:
-                    response = future.result() # Obtener el resultado o la excepción
-                    expert_responses[assistant_name] = response
-                    logging.info(f"Respuesta recibida de '{assistant_name}'.")
-                except Exception as e:
-                    # Capturar cualquier excepción ocurrida durante la ejecución del futuro
-                    error_msg = f"Error al consultar al asistente '{assistant_name}' en paralelo: {e}"
-                    logging.error(error_msg)
-                    # Decidir si detenerse o continuar. Detenerse es más seguro.
-                    # Se podría intentar continuar con las respuestas obtenidas,
-                    # pero el planificador podría no tener toda la información.
-                    # Cancelar futuros restantes si es necesario:
-                    # for f in future_to_assistant: f.cancel()
-                    return error_msg # Detener el proceso si una consulta falla
-
-        # Verificar si se obtuvieron todas las respuestas (importante si se decide no detener en error)
-        if len(expert_responses) != len(expert_assistants):
-             error_msg = "No se pudieron obtener respuestas de todos los asistentes expertos."
-             logging.error(error_msg)
-             return error_msg
+        hedge_percentile = get_hedge_percentile(hedge_percentile)
+        expert_timeout = get_expert_timeout(expert_timeout)
+        if allow_partial is None:
+            allow_partial = _env_flag("EXPERT_PARTIAL_RESULTS", True)
+        if stale_fallback is None:
+            stale_fallback = _env_flag("EXPERT_STALE_FALLBACK", True)
+        logging.info(f"Consultando a los asistentes expertos en paralelo: {', '.join(expert_assistants)} "
+                     f"(timeout {expert_timeout:g}s"
+                     + (f", hedging al p{hedge_percentile:g})" if hedge_percentile is not None else ")"))
+
+        results = await gpt_client.gather_experts(expert_assistants, query, max_concurrency=len(expert_assistants),
+                                                  hedge_percentile=hedge_percentile, timeout=expert_timeout)
+        failures = {}
+        for assistant_name, response in results.items():
+            if isinstance(response, asyncio.TimeoutError):
+                failures[assistant_name] = f"sin respuesta en {expert_timeout:g}s"
+            elif isinstance(response, Exception):
+                failures[assistant_name] = str(response)
+            elif isinstance(response, str) and response.startswith("Error"):
+                # query() devuelve los errores de la API como texto
+                failures[assistant_name] = response
+            else:
+                expert_responses[assistant_name] = response
+                logging.info(f"Respuesta recibida de '{assistant_name}'.")
+                continue
+            logging.error(f"Error al consultar al asistente '{assistant_name}' en paralelo: {failures[assistant_name]}")
+            if not allow_partial:
+                return f"Error al consultar al asistente '{assistant_name}' en paralelo: {failures[assistant_name]}"
+
+        # Modo degradado: usar respuestas en caché caducadas o marcar a los expertos que faltan
+        stale_responses = {}
+        for assistant_name in failures:
+            cached = gpt_client.cached_response(assistant_name, query) if stale_fallback else None
+            if cached is not None:
+                stale_responses[assistant_name] = cached
+            outcome = "stale" if cached is not None else "missing"
+            metrics.registry.inc("expert_degraded_total", help_text="Expert answers replaced in partial-results mode.",
+                                 assistant=assistant_name, outcome=outcome)
+            logging.warning(f"Experto '{assistant_name}' no disponible; se usa "
+                            + ("su última respuesta en caché." if cached is not None else "un marcador de ausencia."))
+
+        if not expert_responses and not stale_responses:
+            error_msg = "No se pudieron obtener respuestas de ningún asistente experto."
+            logging.error(error_msg)
+            return error_msg
         # --- End Change ---
 
         # 4. Formatear las respuestas para el asistente 'planner'
-        planner_input_parts = ["Aquí están las recomendaciones de los expertos para la semana:"]
-        # Ordenar por nombre de asistente para consistencia (opcional)
-        for assistant_name in sorted(expert_responses.keys()):
-            response = expert_responses[assistant_name]
-            formatted_response = f"\n--- Recomendación de '{assistant_name.capitalize()}' ---\n{response}\n--- Fin Recomendación '{assistant_name.capitalize()}' ---"
-            planner_input_parts.append(formatted_response)
-
-        planner_prompt = "\n".join(planner_input_parts)
+        planner_prompt = build_planner_prompt(expert_responses, stale_responses,
+                                              {name: reason for name, reason in failures.items() if name not in stale_responses})
         logging.debug(f"Prompt completo para el asistente 'planner':\n{planner_prompt}")
 
         # 5. Consultar al asistente 'planner'
         logging.info(f"Consultando al asistente '{planner_assistant}' para integrar las recomendaciones...")
         try:
-            final_plan = gpt_client.query(planner_assistant, planner_prompt)
+            final_plan = await gpt_client.query(planner_assistant, planner_prompt)
             logging.info("Planificación semanal integrada recibida.")
             return final_plan
         except ValueError as e: